@@ -0,0 +1,231 @@
+# benchmark_db.py
+# Mide las funciones de base de datos más usadas sobre una base sintética (generador_datos_prueba.py)
+# o sobre una copia existente, y guarda los tiempos en JSON para comparar entre versiones:
+#     python benchmark_db.py --salida benchmark/actual.json --comparar benchmark/anterior.json
+
+import os
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import platform
+import argparse
+import datetime
+import statistics
+import subprocess
+import tempfile
+import database_maraton as db
+import generador_datos_prueba as generador
+
+REPETICIONES = 5
+CARPETA_RESULTADOS = "benchmark"
+UMBRAL_REGRESION = 1.20     # más de un 20 % más lento que la referencia se marca como regresión
+INSCRIPCIONES_IMPORTACION = 500
+TERMINOS_BUSQUEDA = ["gonz", "muñoz rojas", "sofía", "mart", "8000", "valdivia", "díaz pérez", "x"]
+SISTEMA_ALTERNATIVO = {1: 25, 2: 18, 3: 15, 4: 12, 5: 10, 6: 8, 7: 6, 8: 4, 9: 2, 10: 1}
+
+def _version_codigo():
+    """Commit de git del árbol medido, si se puede obtener."""
+    try:
+        salida = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, timeout=5)
+        return salida.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def _evento_mas_grande():
+    with db.conectar_db() as conn:
+        fila = conn.execute("SELECT evento_id, COUNT(*) FROM inscripciones GROUP BY evento_id ORDER BY 2 DESC LIMIT 1").fetchone()
+        if fila is None: return None, []
+        categorias = [c[0] for c in conn.execute("SELECT DISTINCT categoria_id FROM inscripciones WHERE evento_id = ? ORDER BY 1", (fila[0],))]
+    return fila[0], categorias
+
+def _medir(funcion, repeticiones, preparar=None):
+    """Ejecuta funcion() 'repeticiones' veces (con preparar() antes de cada una, fuera del tiempo) y resume."""
+    tiempos, operaciones = [], 0
+    for _ in range(repeticiones):
+        if preparar: preparar()
+        db.limpiar_cache()   # cada repetición mide la lectura real, no la caché
+        inicio = time.perf_counter()
+        operaciones = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return {
+        'operaciones': operaciones,
+        'min_ms': round(min(tiempos) * 1000, 3),
+        'mediana_ms': round(statistics.median(tiempos) * 1000, 3),
+        'promedio_ms': round(statistics.mean(tiempos) * 1000, 3),
+        'max_ms': round(max(tiempos) * 1000, 3),
+        'por_operacion_ms': round(statistics.median(tiempos) * 1000 / max(operaciones, 1), 4),
+    }
+
+def _una_vez(funcion, *args):
+    funcion(*args)
+    return 1
+
+def _entradas_importacion(cantidad, lote):
+    """Entradas para importar_inscripciones_lote: la mitad con deportistas existentes y la mitad nuevos."""
+    with db.conectar_db() as conn:
+        existentes = conn.execute("""
+            SELECT p.nombre || ' ' || p.apellido, p.rut_o_id, p.fecha_nacimiento, p.genero, c.nombre_club
+            FROM participantes p LEFT JOIN clubes c ON c.id = p.club_id WHERE p.genero = 'Masculino' LIMIT ?
+        """, (cantidad // 2,)).fetchall()
+        codigo = conn.execute("SELECT codigo_categoria FROM categorias WHERE codigo_categoria IS NOT NULL ORDER BY id LIMIT 1").fetchone()[0]
+    entradas = [{'codigo_categoria': codigo, 'numero_competidor': None, 'tripulantes': [
+        {'nombre_completo': nombre, 'rut_o_id': rut, 'fecha_nacimiento': fecha, 'genero': genero, 'club': club}]}
+        for nombre, rut, fecha, genero, club in existentes]
+    for i in range(cantidad - len(entradas)):
+        entradas.append({'codigo_categoria': codigo, 'numero_competidor': None, 'tripulantes': [
+            {'nombre_completo': f"Nuevo{lote} Deportista{i}", 'rut_o_id': f"BENCH-{lote}-{i}", 'fecha_nacimiento': "2000-01-01",
+             'genero': 'Masculino', 'club': f"Club Importado {i % 7}"}]})
+    return entradas
+
+def ejecutar_benchmarks(repeticiones=REPETICIONES):
+    """Corre la batería sobre la base de datos activa (db.DB_PATH) y devuelve {nombre: resumen}."""
+    evento_id, categorias = _evento_mas_grande()
+    if evento_id is None:
+        raise ValueError("La base de datos no tiene inscripciones para medir.")
+    resultados = {}
+
+    def leer_categorias():
+        for categoria_id in categorias:
+            db.obtener_inscripciones_por_categoria(evento_id, categoria_id)
+        return len(categorias)
+    resultados['obtener_inscripciones_por_categoria'] = _medir(leer_categorias, repeticiones)
+
+    def borrar_lugares():
+        with db.conectar_db() as conn:
+            conn.execute("UPDATE inscripciones SET lugar_final = NULL WHERE evento_id = ?", (evento_id,))
+            conn.commit()
+    def recalcular():
+        for categoria_id in categorias:
+            db.recalcular_posiciones_categoria(evento_id, categoria_id)
+        return len(categorias)
+    resultados['recalcular_posiciones_categoria'] = _medir(recalcular, repeticiones, preparar=borrar_lugares)
+    resultados['recalcular_posiciones_categoria_sin_cambios'] = _medir(recalcular, repeticiones)
+
+    # Con el sistema guardado se leen las clasificaciones mantenidas por triggers; con otro se calcula en vivo
+    for nombre, funcion in (('calcular_puntuacion_clubes', db.calcular_puntuacion_clubes),
+                            ('calcular_puntuacion_deportistas', db.calcular_puntuacion_deportistas)):
+        resultados[nombre] = _medir(lambda: _una_vez(funcion, evento_id), repeticiones)
+        resultados[f'{nombre}_otro_sistema'] = _medir(lambda: _una_vez(funcion, evento_id, SISTEMA_ALTERNATIVO), repeticiones)
+
+    def buscar():
+        for termino in TERMINOS_BUSQUEDA:
+            db.buscar_deportistas_por_nombre(termino)
+        return len(TERMINOS_BUSQUEDA)
+    resultados['buscar_deportistas_por_nombre'] = _medir(buscar, repeticiones)
+
+    # Cada repetición importa a un evento nuevo para que los tiempos sean comparables
+    lotes = iter(range(1, repeticiones + 1))
+    pendiente = {}
+    def preparar_importacion():
+        lote = next(lotes)
+        evento_nuevo, _ = db.agregar_o_actualizar_evento({'nombre_evento': f"Benchmark importación {lote}", 'fecha': None, 'lugar': None, 'notas': None})
+        pendiente.update(evento_id=evento_nuevo, entradas=_entradas_importacion(INSCRIPCIONES_IMPORTACION, lote))
+    def importar():
+        resultado = db.importar_inscripciones_lote(pendiente['evento_id'], pendiente['entradas'])
+        return sum(1 for inscripcion_id, _ in resultado if inscripcion_id)
+    resultados['importar_inscripciones_lote'] = _medir(importar, repeticiones, preparar=preparar_importacion)
+    return resultados
+
+def _datos_base():
+    with db.conectar_db() as conn:
+        return {tabla: conn.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0]
+                for tabla in ('clubes', 'participantes', 'categorias', 'eventos', 'inscripciones', 'tiempos_vuelta')}
+
+def comparar(actual, referencia, umbral=UMBRAL_REGRESION):
+    """
+    [(nombre, min_ref_ms, min_ms, cociente, es_regresion)] para los benchmarks presentes en ambos.
+    Se compara el mínimo de las repeticiones, que es el valor menos afectado por el ruido de la máquina.
+    """
+    filas = []
+    for nombre, datos in actual['resultados'].items():
+        anterior = referencia.get('resultados', {}).get(nombre)
+        if not anterior or not anterior['min_ms']: continue
+        cociente = datos['min_ms'] / anterior['min_ms']
+        filas.append((nombre, anterior['min_ms'], datos['min_ms'], cociente, cociente > umbral))
+    return filas
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Benchmark de las funciones principales de la base de datos.")
+    parser.add_argument("--db", help="Medir sobre una copia de esta base de datos en vez de generar una sintética.")
+    parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto benchmark/benchmark_<fecha>.json).")
+    parser.add_argument("--comparar", metavar="JSON", help="Resultados anteriores contra los que comparar.")
+    parser.add_argument("--modo", choices=db.MODOS_BASE_DATOS, default='wal', help="Modo de la base de datos durante la medición.")
+    parser.add_argument("--repeticiones", type=int, default=REPETICIONES)
+    parser.add_argument("--clubes", type=int, default=40)
+    parser.add_argument("--deportistas", type=int, default=3000)
+    parser.add_argument("--categorias", type=int, default=60)
+    parser.add_argument("--eventos", type=int, default=3)
+    parser.add_argument("--inscripciones", type=int, default=1000, help="Inscripciones por evento.")
+    parser.add_argument("--semilla", type=int, default=2025)
+    opciones = parser.parse_args(argumentos)
+
+    # Siempre se trabaja sobre un archivo temporal: el benchmark escribe (lugares, importaciones)
+    carpeta_temporal = tempfile.mkdtemp(prefix="benchmark_regatas_")
+    ruta_temporal = os.path.join(carpeta_temporal, "benchmark.db")
+    parametros = {'repeticiones': opciones.repeticiones, 'modo': opciones.modo}
+    try:
+        if opciones.db:
+            with sqlite3.connect(opciones.db) as origen, sqlite3.connect(ruta_temporal) as destino:
+                origen.backup(destino)
+            db.configurar_base_datos(ruta_temporal)
+            db.inicializar_db()
+            parametros['origen'] = os.path.abspath(opciones.db)
+        else:
+            parametros.update(clubes=opciones.clubes, deportistas=opciones.deportistas, categorias=opciones.categorias,
+                              eventos=opciones.eventos, inscripciones_por_evento=opciones.inscripciones, semilla=opciones.semilla)
+            t0 = time.perf_counter()
+            exito, resultado = generador.generar_base_datos(ruta_temporal, opciones.clubes, opciones.deportistas, opciones.categorias,
+                                                            opciones.eventos, opciones.inscripciones, opciones.semilla)
+            if not exito:
+                print(f"[ADVERTENCIA] {resultado}")
+                return 1
+            parametros['generacion_s'] = round(time.perf_counter() - t0, 3)
+        exito, mensaje = db.configurar_base_datos(ruta_temporal, opciones.modo)
+        if not exito:
+            print(f"[ADVERTENCIA] {mensaje}")
+            return 1
+        resultados = ejecutar_benchmarks(opciones.repeticiones)
+        if opciones.modo == 'memoria':
+            db.volcar_memoria_a_disco()   # deja medido un volcado completo con los datos del benchmark
+        informe = {
+            'fecha': datetime.datetime.now().isoformat(timespec='seconds'),
+            'version': _version_codigo(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'plataforma': platform.platform(),
+            'parametros': parametros,
+            'datos': _datos_base(),
+            'almacenamiento': db.obtener_estado_base_datos(),
+            'resultados': resultados,
+        }
+    finally:
+        db.cerrar_base_datos()
+        shutil.rmtree(carpeta_temporal, ignore_errors=True)
+
+    ruta_salida = opciones.salida or os.path.join(CARPETA_RESULTADOS, f"benchmark_{datetime.datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(ruta_salida)), exist_ok=True)
+    with open(ruta_salida, 'w', encoding='utf-8') as f:
+        json.dump(informe, f, ensure_ascii=False, indent=2)
+
+    print(f"{'Benchmark':<48}{'mediana ms':>12}{'por op. ms':>12}")
+    for nombre, datos in informe['resultados'].items():
+        print(f"{nombre:<48}{datos['mediana_ms']:>12.2f}{datos['por_operacion_ms']:>12.3f}")
+    print(f"[INFO] Resultados guardados en {ruta_salida}")
+
+    if opciones.comparar:
+        with open(opciones.comparar, encoding='utf-8') as f:
+            referencia = json.load(f)
+        regresiones = 0
+        print(f"\nComparación con {opciones.comparar} (versión {referencia.get('version')}):")
+        for nombre, anterior, actual, cociente, es_regresion in comparar(informe, referencia):
+            regresiones += es_regresion
+            marca = "  <-- REGRESIÓN" if es_regresion else ""
+            print(f"{nombre:<48}{anterior:>10.2f} → {actual:>10.2f} ms  x{cociente:.2f}{marca}")
+        return 1 if regresiones else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+# cola_resultados.py
+# Hilo escritor de resultados para el día de la regata.
+# La pestaña Resultados encola cada tiempo o cambio de estado y sigue atendiendo al operador;
+# este hilo los agrupa en lotes pequeños, los guarda en una transacción, recalcula los lugares
+# una vez por categoría y avisa con una señal qué filas cambiaron.
+
+import queue
+import time
+import threading
+from PySide6.QtCore import QThread, Signal
+import database_maraton as db
+
+TAMANO_MAXIMO_LOTE = 50
+ESPERA_AGRUPAR_S = 0.05   # ventana para juntar llegadas casi simultáneas en un mismo lote
+
+_FIN = object()
+
+class ColaResultadosWorker(QThread):
+    # (resultados [(inscripcion_id, éxito, mensaje)], posiciones {(evento_id, categoria_id): [(inscripcion_id, lugar)]})
+    lote_aplicado = Signal(object, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._cola = queue.Queue()
+        self._vueltas_pendientes = {}   # inscripcion_id -> {vuelta: tiempo_ms} encolados y aún no guardados
+        self._lock = threading.Lock()
+        self.estadisticas = {'encolados': 0, 'aplicados': 0, 'lotes': 0}
+
+    def encolar_resultado(self, inscripcion_id, tiempo_final, estado, tiempos_vuelta=None):
+        """Agrega un resultado a la cola; no bloquea la interfaz."""
+        if tiempos_vuelta is not None:
+            with self._lock:
+                self._vueltas_pendientes[inscripcion_id] = tiempos_vuelta
+        self._cola.put({'inscripcion_id': inscripcion_id, 'tiempo_final': tiempo_final,
+                        'estado': estado, 'tiempos_vuelta': tiempos_vuelta})
+        self.estadisticas['encolados'] += 1
+
+    def pendientes(self):
+        return self._cola.qsize()
+
+    def vueltas_pendientes(self, inscripcion_id):
+        """Últimos tiempos de vuelta encolados para la inscripción que aún no llegan a la base de datos, o None."""
+        with self._lock:
+            return self._vueltas_pendientes.get(inscripcion_id)
+
+    def detener(self, espera_ms=5000):
+        """Guarda lo que quede en la cola y termina el hilo."""
+        if not self.isRunning(): return
+        self._cola.put(_FIN)
+        self.wait(espera_ms)
+
+    def _tomar_lote(self, primero):
+        lote = [primero]
+        limite = time.monotonic() + ESPERA_AGRUPAR_S
+        while len(lote) < TAMANO_MAXIMO_LOTE:
+            restante = limite - time.monotonic()
+            try:
+                cambio = self._cola.get(timeout=restante) if restante > 0 else self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if cambio is _FIN:
+                self._cola.put(_FIN)  # se procesa después de guardar este lote
+                break
+            lote.append(cambio)
+        return lote
+
+    def run(self):
+        try:
+            while True:
+                primero = self._cola.get()
+                if primero is _FIN: break
+                lote = self._tomar_lote(primero)
+                resultados, posiciones = db.aplicar_resultados_lote(lote)
+                with self._lock:
+                    # Solo se olvidan los tiempos de este lote: si llegó uno más nuevo sigue pendiente
+                    for cambio in lote:
+                        if cambio['tiempos_vuelta'] is not None and self._vueltas_pendientes.get(cambio['inscripcion_id']) is cambio['tiempos_vuelta']:
+                            del self._vueltas_pendientes[cambio['inscripcion_id']]
+                self.estadisticas['aplicados'] += sum(1 for _, exito, _ in resultados if exito)
+                self.estadisticas['lotes'] += 1
+                self.lote_aplicado.emit(resultados, posiciones)
+        finally:
+            print(f"[INFO] Cola de resultados detenida: {self.estadisticas}")
+            db.cerrar_conexion_hilo()
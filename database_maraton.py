@@ -4,53 +4,677 @@
 import sqlite3
 import os
 import datetime
+import threading
+import json
+import re
+import functools
+import time
+from collections import OrderedDict, namedtuple
 from contextlib import contextmanager
-from utils_maraton import resource_path
+from utils_maraton import resource_path, parsear_tiempo_ms, formatear_tiempo_ms
 
 DB_FILENAME = "regatas_maraton.db"
 DB_PATH = resource_path(DB_FILENAME)
 
+# Modo de la base de datos (ver configurar_base_datos):
+#   'archivo' - diario clásico (DELETE) con synchronous FULL: cada transacción confirmada queda en disco.
+#   'wal'     - WAL con synchronous NORMAL (por defecto): lectores y escritor no se bloquean entre sí.
+#   'memoria' - copia completa en RAM, volcada al archivo cada INTERVALO_VOLCADO_S y al cerrar.
+MODOS_BASE_DATOS = ('archivo', 'wal', 'memoria')
+MODO_DB = 'wal'
+INTERVALO_VOLCADO_S = 30
+
+# PRAGMAs que se aplican una sola vez al abrir cada conexión persistente.
+PRAGMAS_CONEXION = (
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA cache_size = -20000",      # ~20 MB de caché de páginas
+    "PRAGMA mmap_size = 268435456",    # 256 MB mapeados en memoria
+    "PRAGMA temp_store = MEMORY",
+)
+PRAGMAS_MODO = {
+    'archivo': ("PRAGMA journal_mode = DELETE", "PRAGMA synchronous = FULL"),
+    'wal': ("PRAGMA journal_mode = WAL", "PRAGMA synchronous = NORMAL"),
+    'memoria': (),   # el VFS memdb solo admite diario en memoria
+}
+
+# --- GESTOR DE CONEXIONES ---
+# Cada hilo (GUI, GeneracionWebThread, futuros workers) mantiene una única
+# conexión abierta que se reutiliza en todas las llamadas a conectar_db().
+_hilo_local = threading.local()
+_conexiones_lock = threading.Lock()
+_conexiones_activas = {}
+_generacion_conexiones = 0
+_estadisticas_conexion = {'conexiones_abiertas': 0, 'usos': 0}
+_traza_sql = None   # callback de sqlite3 para diagnóstico; None = sin costo (ver diagnostico_db.py)
+
+def _abrir_conexion():
+    if MODO_DB == 'memoria' and _memoria['ruta'] == DB_PATH:
+        conn = sqlite3.connect(_memoria['uri'], uri=True, check_same_thread=False)
+    else:
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    for pragma in PRAGMAS_CONEXION:
+        conn.execute(pragma)
+    try:
+        for pragma in PRAGMAS_MODO[MODO_DB]:
+            conn.execute(pragma)
+    except sqlite3.OperationalError as e:
+        # Cambiar de WAL a DELETE exige que nadie más tenga el archivo abierto (p. ej. otra estación)
+        print(f"[ADVERTENCIA] No se pudo aplicar el modo '{MODO_DB}' ({e}); se sigue con el modo actual del archivo.")
+    if _traza_sql is not None:
+        conn.set_trace_callback(_traza_sql)
+    with _conexiones_lock:
+        _conexiones_activas[threading.get_ident()] = conn
+        _estadisticas_conexion['conexiones_abiertas'] += 1
+    return conn
+
+def _conexion_del_hilo():
+    conn = getattr(_hilo_local, 'conn', None)
+    vigente = (getattr(_hilo_local, 'ruta', None) == DB_PATH and
+               getattr(_hilo_local, 'generacion', None) == _generacion_conexiones)
+    if conn is None or not vigente:
+        if conn is not None:
+            cerrar_conexion_hilo()
+        conn = _abrir_conexion()
+        _hilo_local.conn, _hilo_local.ruta, _hilo_local.profundidad = conn, DB_PATH, 0
+        _hilo_local.generacion = _generacion_conexiones
+        _hilo_local.archivos_adjuntos = OrderedDict()   # alias de archivos de temporada, del menos al más usado
+    return conn
+
 @contextmanager
 def conectar_db():
-    """Establece una conexión a la base de datos como un context manager."""
+    """
+    Entrega la conexión persistente del hilo actual como un context manager.
+    Las llamadas anidadas comparten la misma conexión; al salir del bloque más
+    externo se descarta cualquier transacción que haya quedado sin confirmar,
+    igual que ocurría antes al cerrar la conexión.
+    """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.execute("PRAGMA foreign_keys = ON;")
-        yield conn
+        conn = _conexion_del_hilo()
     except sqlite3.Error as e:
         print(f"Error al conectar a la base de datos: {e}")
         raise e
+    _hilo_local.profundidad += 1
+    with _conexiones_lock:
+        _estadisticas_conexion['usos'] += 1
+    try:
+        yield conn
     finally:
-        if 'conn' in locals() and conn:
-            conn.close()
+        _hilo_local.profundidad -= 1
+        if _hilo_local.profundidad == 0 and conn.in_transaction:
+            conn.rollback()
+
+def configurar_traza_sql(callback):
+    """Instala (o quita, con None) un trace callback en las conexiones abiertas y en las que se abran después."""
+    global _traza_sql
+    with _conexiones_lock:
+        _traza_sql = callback
+        conexiones = list(_conexiones_activas.values())
+    for conn in conexiones:
+        conn.set_trace_callback(callback)
+
+def cerrar_conexion_hilo():
+    """Cierra la conexión persistente del hilo actual (p. ej. al terminar un QThread)."""
+    conn = getattr(_hilo_local, 'conn', None)
+    if conn is None: return
+    with _conexiones_lock:
+        _conexiones_activas.pop(threading.get_ident(), None)
+    try: conn.close()
+    except sqlite3.Error: pass
+    _hilo_local.conn = None
+
+def cerrar_todas_las_conexiones():
+    """Cierra las conexiones de todos los hilos. Pensado para el cierre de la aplicación."""
+    global _generacion_conexiones
+    with _conexiones_lock:
+        _generacion_conexiones += 1
+        conexiones = list(_conexiones_activas.values())
+        _conexiones_activas.clear()
+    for conn in conexiones:
+        try: conn.close()
+        except sqlite3.Error: pass
+    _hilo_local.conn = None
+
+def obtener_estadisticas_conexion():
+    """Devuelve cuántas conexiones se han abierto y cuántas veces se ha usado conectar_db()."""
+    with _conexiones_lock:
+        return dict(_estadisticas_conexion, abiertas_ahora=len(_conexiones_activas))
+
+# --- UBICACIÓN Y MODO DE LA BASE DE DATOS ---
+# En modo 'memoria' el archivo se carga al inicio con la API de respaldo en una base memdb compartida por
+# todas las conexiones del proceso (cada hilo sigue teniendo la suya). Una conexión "ancla" mantiene viva
+# la base y es la que vuelca al disco desde un hilo aparte. Los cambios posteriores al último volcado se
+# pierden si el proceso muere: esa es la ventana de durabilidad. Es un modo para un solo puesto; otra
+# estación que abra el archivo no ve los cambios hasta el volcado y los suyos se sobrescriben.
+VARIABLE_RUTA = "REGATAS_DB"
+VARIABLE_MODO = "REGATAS_DB_MODO"
+VARIABLE_VOLCADO = "REGATAS_DB_VOLCADO_S"
+
+_memoria = {'uri': None, 'ruta': None, 'ancla': None, 'intervalo_s': None, 'hilo': None, 'detener': None}
+_volcado_lock = threading.Lock()
+_contador_memoria = 0
+_estadisticas_volcado = {'volcados': 0, 'errores': 0, 'ultimo': None, 'ultimo_ms': None, 'maximo_ms': 0.0,
+                         'total_ms': 0.0, 'carga_ms': None, 'ultimo_error': None}
+
+def _ventana_durabilidad():
+    """(segundos, descripción) de los cambios confirmados que podrían perderse si el proceso o el equipo se caen."""
+    if MODO_DB == 'memoria':
+        return _memoria['intervalo_s'], f"hasta {_memoria['intervalo_s']:g} s de cambios (lo no volcado se pierde si el proceso termina de golpe)"
+    if MODO_DB == 'wal':
+        return 0, "ninguna si se cae la aplicación; un corte de energía puede perder las últimas transacciones"
+    return 0, "ninguna: cada transacción confirmada se sincroniza a disco"
+
+def _cargar_en_memoria(intervalo_s):
+    global _contador_memoria
+    _contador_memoria += 1
+    uri = f"file:/regatas_{os.getpid()}_{_contador_memoria}?vfs=memdb"
+    ancla = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    inicio = time.perf_counter()
+    if os.path.exists(DB_PATH):
+        origen = sqlite3.connect(DB_PATH)
+        try:
+            imagen = bytearray(origen.serialize())
+        finally:
+            origen.close()
+        # memdb no admite WAL: los bytes 18-19 de la cabecera marcan el archivo como WAL y se pasan a diario clásico.
+        # deserialize() deja la base privada de una conexión, por eso se copia de ahí a la base compartida.
+        imagen[18:20] = b"\x01\x01"
+        privada = sqlite3.connect(":memory:")
+        try:
+            privada.deserialize(bytes(imagen))
+            privada.backup(ancla)
+        finally:
+            privada.close()
+    _estadisticas_volcado['carga_ms'] = round((time.perf_counter() - inicio) * 1000, 2)
+    detener = threading.Event()
+    _memoria.update(uri=uri, ruta=DB_PATH, ancla=ancla, intervalo_s=intervalo_s, detener=detener)
+    hilo = threading.Thread(target=_bucle_volcado, args=(detener, intervalo_s), name="VolcadoMemoria", daemon=True)
+    _memoria['hilo'] = hilo
+    hilo.start()
+
+def _bucle_volcado(detener, intervalo_s):
+    while not detener.wait(intervalo_s):
+        exito, mensaje = volcar_memoria_a_disco()
+        if not exito: print(f"[ADVERTENCIA] {mensaje}")
+
+def _descargar_memoria(volcar=True):
+    """Detiene el hilo de volcado, hace el volcado final y libera la copia en memoria."""
+    if _memoria['ancla'] is None: return
+    _memoria['detener'].set()
+    _memoria['hilo'].join()
+    if volcar:
+        exito, mensaje = volcar_memoria_a_disco()
+        print(f"[INFO] {mensaje}" if exito else f"[ADVERTENCIA] {mensaje}")
+    cerrar_todas_las_conexiones()
+    with _volcado_lock:
+        _memoria['ancla'].close()
+        _memoria.update(uri=None, ruta=None, ancla=None, hilo=None, detener=None)
+
+def volcar_memoria_a_disco():
+    """Copia la base en memoria a su archivo en una sola transacción. Solo tiene efecto en modo 'memoria'."""
+    with _volcado_lock:
+        ancla, ruta = _memoria['ancla'], _memoria['ruta']
+        if ancla is None:
+            return False, "La base de datos no está en memoria: no hay nada que volcar."
+        inicio = time.perf_counter()
+        try:
+            destino = sqlite3.connect(ruta, timeout=30)
+            try:
+                ancla.backup(destino)
+            finally:
+                destino.close()
+        except sqlite3.Error as e:
+            _estadisticas_volcado['errores'] += 1
+            _estadisticas_volcado['ultimo_error'] = str(e)
+            return False, f"Error al volcar la base de datos en memoria a {ruta}: {e}"
+        ms = (time.perf_counter() - inicio) * 1000
+        _estadisticas_volcado.update(volcados=_estadisticas_volcado['volcados'] + 1, ultimo_ms=round(ms, 2),
+                                     ultimo=datetime.datetime.now().isoformat(timespec='seconds'),
+                                     maximo_ms=round(max(_estadisticas_volcado['maximo_ms'], ms), 2),
+                                     total_ms=round(_estadisticas_volcado['total_ms'] + ms, 2))
+    return True, f"Base de datos en memoria volcada a {ruta} en {ms:.1f} ms."
+
+def configurar_base_datos(ruta=None, modo=None, intervalo_volcado_s=None):
+    """
+    Cambia la ubicación y/o el modo de la base de datos antes de usarla (o en caliente: se cierran las
+    conexiones y, si se sale del modo 'memoria', se hace un último volcado). Los valores omitidos se conservan.
+    """
+    global DB_PATH, MODO_DB
+    modo = modo or MODO_DB
+    if modo not in MODOS_BASE_DATOS:
+        return False, f"Error: Modo de base de datos '{modo}' desconocido (usa {', '.join(MODOS_BASE_DATOS)})."
+    intervalo_volcado_s = intervalo_volcado_s or _memoria['intervalo_s'] or INTERVALO_VOLCADO_S
+    if intervalo_volcado_s <= 0:
+        return False, "Error: El intervalo de volcado debe ser positivo."
+    _descargar_memoria()
+    cerrar_todas_las_conexiones()
+    limpiar_cache()
+    DB_PATH = os.path.abspath(ruta) if ruta else DB_PATH
+    MODO_DB = modo
+    if modo == 'memoria':
+        try:
+            _cargar_en_memoria(intervalo_volcado_s)
+        except sqlite3.Error as e:
+            MODO_DB = 'wal'
+            return False, f"Error al cargar la base de datos en memoria, se sigue en modo WAL: {e}"
+    _, ventana = _ventana_durabilidad()
+    print(f"[INFO] Base de datos {DB_PATH} en modo '{MODO_DB}'. Ventana de durabilidad: {ventana}.")
+    return True, f"Base de datos en modo '{MODO_DB}'."
+
+def configurar_desde_entorno(ruta=None, modo=None, intervalo_volcado_s=None):
+    """Como configurar_base_datos, completando lo que no se indique con REGATAS_DB, REGATAS_DB_MODO y REGATAS_DB_VOLCADO_S."""
+    ruta = ruta or os.environ.get(VARIABLE_RUTA) or None
+    modo = modo or os.environ.get(VARIABLE_MODO, "").strip().lower() or None
+    if intervalo_volcado_s is None and os.environ.get(VARIABLE_VOLCADO):
+        try: intervalo_volcado_s = float(os.environ[VARIABLE_VOLCADO])
+        except ValueError: return False, f"Error: {VARIABLE_VOLCADO} debe ser un número de segundos."
+    if ruta is None and modo is None and intervalo_volcado_s is None:
+        return True, "Base de datos por defecto."
+    return configurar_base_datos(ruta, modo, intervalo_volcado_s)
+
+def cerrar_base_datos():
+    """Cierre ordenado de la aplicación: volcado final si está en memoria y cierre de todas las conexiones."""
+    _descargar_memoria()
+    cerrar_todas_las_conexiones()
+
+def obtener_estado_base_datos():
+    """Ruta, modo, ventana de durabilidad y tiempos de volcado (estos últimos solo en modo 'memoria')."""
+    segundos, descripcion = _ventana_durabilidad()
+    with _volcado_lock:
+        volcado = dict(_estadisticas_volcado)
+    return {'ruta': DB_PATH, 'modo': MODO_DB, 'intervalo_volcado_s': _memoria['intervalo_s'] if MODO_DB == 'memoria' else None,
+            'ventana_durabilidad_s': segundos, 'ventana_durabilidad': descripcion, 'volcado': volcado}
+
+# --- CACHÉ DE LECTURAS ---
+# Los datos de referencia (eventos, categorías, clubes, sponsors...) se releen en cada cambio de pestaña o
+# de combo. Se guardan en un LRU acotado que se vacía cuando cambia la "marca" de la conexión del hilo:
+# total_changes sube con cualquier escritura de este módulo (incluidos triggers) y PRAGMA data_version
+# cambia cuando otra conexión, de este u otro proceso, confirma cambios en el archivo.
+CACHE_MAX_ENTRADAS = 256
+_cache_lecturas = OrderedDict()
+_cache_lock = threading.Lock()
+_estadisticas_cache = {'aciertos': 0, 'fallos': 0, 'invalidaciones': 0}
+
+def limpiar_cache():
+    """Descarta todas las lecturas cacheadas (p. ej. tras restaurar un respaldo)."""
+    with _cache_lock:
+        if _cache_lecturas:
+            _estadisticas_cache['invalidaciones'] += 1
+        _cache_lecturas.clear()
+
+def _validar_cache(conn):
+    marca = (id(conn), conn.total_changes, conn.execute("PRAGMA data_version").fetchone()[0])
+    if getattr(_hilo_local, 'marca_cache', None) != marca:
+        limpiar_cache()
+        _hilo_local.marca_cache = marca
+
+def _copia_resultado(valor):
+    # Las listas y dicts se copian para que quien llama pueda modificarlos sin alterar la caché.
+    return valor.copy() if isinstance(valor, (list, dict)) else valor
+
+def _lectura_cacheada(funcion):
+    """Decorador read-through para funciones de lectura cuyos argumentos son hashables."""
+    @functools.wraps(funcion)
+    def envoltura(*args):
+        with conectar_db() as conn:
+            if conn.in_transaction:
+                # Dentro de una transacción abierta se leen datos aún no confirmados: no se usa la caché.
+                return funcion(*args)
+            _validar_cache(conn)
+            clave = (funcion.__name__, args)
+            with _cache_lock:
+                if clave in _cache_lecturas:
+                    _cache_lecturas.move_to_end(clave)
+                    _estadisticas_cache['aciertos'] += 1
+                    return _copia_resultado(_cache_lecturas[clave])
+                _estadisticas_cache['fallos'] += 1
+            valor = funcion(*args)
+            with _cache_lock:
+                _cache_lecturas[clave] = valor
+                if len(_cache_lecturas) > CACHE_MAX_ENTRADAS:
+                    _cache_lecturas.popitem(last=False)
+            return _copia_resultado(valor)
+    return envoltura
+
+def obtener_estadisticas_cache():
+    """Aciertos, fallos e invalidaciones de la caché de lecturas, más el número de entradas actuales."""
+    with _cache_lock:
+        return dict(_estadisticas_cache, entradas=len(_cache_lecturas))
 
 def inicializar_db():
-    """Crea todas las tablas necesarias si no existen y realiza migraciones."""
-    with conectar_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute("""CREATE TABLE IF NOT EXISTS eventos (id INTEGER PRIMARY KEY AUTOINCREMENT, nombre_evento TEXT NOT NULL UNIQUE, fecha TEXT, lugar TEXT, notas TEXT)""")
-        cursor.execute("""CREATE TABLE IF NOT EXISTS clubes (id INTEGER PRIMARY KEY AUTOINCREMENT, nombre_club TEXT NOT NULL UNIQUE, abreviatura TEXT, ciudad TEXT, logo_path TEXT)""")
-        cursor.execute("""CREATE TABLE IF NOT EXISTS participantes (id INTEGER PRIMARY KEY AUTOINCREMENT, nombre TEXT NOT NULL, apellido TEXT NOT NULL, rut_o_id TEXT UNIQUE, fecha_nacimiento TEXT, genero TEXT CHECK(genero IN ('Masculino', 'Femenino')), club_id INTEGER, FOREIGN KEY (club_id) REFERENCES clubes (id) ON DELETE SET NULL)""")
-        cursor.execute("""CREATE TABLE IF NOT EXISTS categorias (id INTEGER PRIMARY KEY AUTOINCREMENT, nombre_categoria TEXT NOT NULL, codigo_categoria TEXT UNIQUE, edad_min INTEGER DEFAULT 0, edad_max INTEGER DEFAULT 99, genero TEXT, tipo_embarcacion TEXT, distancia_km REAL, numero_vueltas INTEGER)""")
-        cursor.execute("""CREATE TABLE IF NOT EXISTS inscripciones (id INTEGER PRIMARY KEY AUTOINCREMENT, evento_id INTEGER NOT NULL, categoria_id INTEGER NOT NULL, participante1_id INTEGER NOT NULL, participante2_id INTEGER, participante3_id INTEGER, participante4_id INTEGER, numero_competidor INTEGER, tiempo_final TEXT, tiempo_vueltas TEXT, lugar_final INTEGER, estado TEXT DEFAULT 'Inscrito' CHECK(estado IN ('Inscrito', 'DNS', 'DNF', 'DSQ', 'Finalizado')), FOREIGN KEY (evento_id) REFERENCES eventos (id) ON DELETE CASCADE, FOREIGN KEY (categoria_id) REFERENCES categorias (id) ON DELETE CASCADE, FOREIGN KEY (participante1_id) REFERENCES participantes (id) ON DELETE CASCADE, FOREIGN KEY (participante2_id) REFERENCES participantes (id) ON DELETE CASCADE, FOREIGN KEY (participante3_id) REFERENCES participantes (id) ON DELETE CASCADE, FOREIGN KEY (participante4_id) REFERENCES participantes (id) ON DELETE CASCADE, UNIQUE (evento_id, categoria_id, numero_competidor))""")
-        cursor.execute("""CREATE TABLE IF NOT EXISTS sponsors (id INTEGER PRIMARY KEY AUTOINCREMENT, nombre_sponsor TEXT NOT NULL, logo_path TEXT, evento_id INTEGER NOT NULL, FOREIGN KEY (evento_id) REFERENCES eventos (id) ON DELETE CASCADE)""")
-        cursor.execute("""CREATE TABLE IF NOT EXISTS evento_categorias_estado (evento_id INTEGER NOT NULL, categoria_id INTEGER NOT NULL, es_valida INTEGER NOT NULL DEFAULT 1, PRIMARY KEY (evento_id, categoria_id), FOREIGN KEY (evento_id) REFERENCES eventos (id) ON DELETE CASCADE, FOREIGN KEY (categoria_id) REFERENCES categorias (id) ON DELETE CASCADE)""")
-        cursor.execute("""CREATE TABLE IF NOT EXISTS programa_pruebas (id INTEGER PRIMARY KEY AUTOINCREMENT, evento_id INTEGER NOT NULL, categoria_id INTEGER NOT NULL, orden INTEGER NOT NULL, hora_inicio TEXT, UNIQUE (evento_id, categoria_id), FOREIGN KEY (evento_id) REFERENCES eventos (id) ON DELETE CASCADE, FOREIGN KEY (categoria_id) REFERENCES categorias (id) ON DELETE CASCADE)""")
-
-        cursor.execute("PRAGMA table_info(clubes)")
-        columnas = [info[1] for info in cursor.fetchall()]
-        if 'logo_path' not in columnas:
-            print("[INFO] Migración: Añadiendo columna 'logo_path' a la tabla 'clubes'.")
-            cursor.execute("ALTER TABLE clubes ADD COLUMN logo_path TEXT")
-        
-        conn.commit()
+    """
+    Deja el esquema al día. Si PRAGMA user_version ya es VERSION_ESQUEMA el arranque se limita a esa lectura;
+    si no, se crean las tablas base (solo en una base sin versión) y se aplican las migraciones pendientes.
+    """
+    with conectar_db() as conn:
+        version_actual = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version_actual >= VERSION_ESQUEMA:
+            if version_actual > VERSION_ESQUEMA:
+                print(f"[ADVERTENCIA] La base de datos tiene el esquema {version_actual}, más nuevo que el de esta versión ({VERSION_ESQUEMA}).")
+            return
+        if version_actual == 0:
+            try:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN")
+                _crear_esquema_base(cursor)
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+        _aplicar_migraciones(conn, version_actual)
+
+def _crear_esquema_base(cursor):
+    """Tablas anteriores a las migraciones versionadas; también completa bases creadas antes de user_version."""
+    cursor.execute("""CREATE TABLE IF NOT EXISTS eventos (id INTEGER PRIMARY KEY AUTOINCREMENT, nombre_evento TEXT NOT NULL UNIQUE, fecha TEXT, lugar TEXT, notas TEXT)""")
+    cursor.execute("""CREATE TABLE IF NOT EXISTS clubes (id INTEGER PRIMARY KEY AUTOINCREMENT, nombre_club TEXT NOT NULL UNIQUE, abreviatura TEXT, ciudad TEXT, logo_path TEXT)""")
+    cursor.execute("""CREATE TABLE IF NOT EXISTS participantes (id INTEGER PRIMARY KEY AUTOINCREMENT, nombre TEXT NOT NULL, apellido TEXT NOT NULL, rut_o_id TEXT UNIQUE, fecha_nacimiento TEXT, genero TEXT CHECK(genero IN ('Masculino', 'Femenino')), club_id INTEGER, FOREIGN KEY (club_id) REFERENCES clubes (id) ON DELETE SET NULL)""")
+    cursor.execute("""CREATE TABLE IF NOT EXISTS categorias (id INTEGER PRIMARY KEY AUTOINCREMENT, nombre_categoria TEXT NOT NULL, codigo_categoria TEXT UNIQUE, edad_min INTEGER DEFAULT 0, edad_max INTEGER DEFAULT 99, genero TEXT, tipo_embarcacion TEXT, distancia_km REAL, numero_vueltas INTEGER)""")
+    cursor.execute("""CREATE TABLE IF NOT EXISTS inscripciones (id INTEGER PRIMARY KEY AUTOINCREMENT, evento_id INTEGER NOT NULL, categoria_id INTEGER NOT NULL, participante1_id INTEGER NOT NULL, participante2_id INTEGER, participante3_id INTEGER, participante4_id INTEGER, numero_competidor INTEGER, tiempo_final TEXT, tiempo_vueltas TEXT, lugar_final INTEGER, estado TEXT DEFAULT 'Inscrito' CHECK(estado IN ('Inscrito', 'DNS', 'DNF', 'DSQ', 'Finalizado')), FOREIGN KEY (evento_id) REFERENCES eventos (id) ON DELETE CASCADE, FOREIGN KEY (categoria_id) REFERENCES categorias (id) ON DELETE CASCADE, FOREIGN KEY (participante1_id) REFERENCES participantes (id) ON DELETE CASCADE, FOREIGN KEY (participante2_id) REFERENCES participantes (id) ON DELETE CASCADE, FOREIGN KEY (participante3_id) REFERENCES participantes (id) ON DELETE CASCADE, FOREIGN KEY (participante4_id) REFERENCES participantes (id) ON DELETE CASCADE, UNIQUE (evento_id, categoria_id, numero_competidor))""")
+    cursor.execute("""CREATE TABLE IF NOT EXISTS sponsors (id INTEGER PRIMARY KEY AUTOINCREMENT, nombre_sponsor TEXT NOT NULL, logo_path TEXT, evento_id INTEGER NOT NULL, FOREIGN KEY (evento_id) REFERENCES eventos (id) ON DELETE CASCADE)""")
+    cursor.execute("""CREATE TABLE IF NOT EXISTS evento_categorias_estado (evento_id INTEGER NOT NULL, categoria_id INTEGER NOT NULL, es_valida INTEGER NOT NULL DEFAULT 1, PRIMARY KEY (evento_id, categoria_id), FOREIGN KEY (evento_id) REFERENCES eventos (id) ON DELETE CASCADE, FOREIGN KEY (categoria_id) REFERENCES categorias (id) ON DELETE CASCADE)""")
+    cursor.execute("""CREATE TABLE IF NOT EXISTS programa_pruebas (id INTEGER PRIMARY KEY AUTOINCREMENT, evento_id INTEGER NOT NULL, categoria_id INTEGER NOT NULL, orden INTEGER NOT NULL, hora_inicio TEXT, UNIQUE (evento_id, categoria_id), FOREIGN KEY (evento_id) REFERENCES eventos (id) ON DELETE CASCADE, FOREIGN KEY (categoria_id) REFERENCES categorias (id) ON DELETE CASCADE)""")
+
+    cursor.execute("PRAGMA table_info(clubes)")
+    columnas = [info[1] for info in cursor.fetchall()]
+    if 'logo_path' not in columnas:
+        print("[INFO] Migración: Añadiendo columna 'logo_path' a la tabla 'clubes'.")
+        cursor.execute("ALTER TABLE clubes ADD COLUMN logo_path TEXT")
+
+# --- MIGRACIONES VERSIONADAS ---
+# Cada migración se ejecuta una sola vez; la versión aplicada se guarda en PRAGMA user_version.
+
+def _migracion_indices_inscripciones(cursor):
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_inscripciones_evento_cat_estado_tiempo ON inscripciones (evento_id, categoria_id, estado, tiempo_final)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_inscripciones_evento_estado_lugar ON inscripciones (evento_id, estado, lugar_final)")
+    for n in range(1, 5):
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_inscripciones_participante{n} ON inscripciones (participante{n}_id)")
+
+def _migracion_tabla_tripulantes(cursor):
+    cursor.execute("""CREATE TABLE IF NOT EXISTS inscripcion_tripulantes (inscripcion_id INTEGER NOT NULL, participante_id INTEGER NOT NULL, posicion INTEGER NOT NULL, PRIMARY KEY (inscripcion_id, posicion), FOREIGN KEY (inscripcion_id) REFERENCES inscripciones (id) ON DELETE CASCADE, FOREIGN KEY (participante_id) REFERENCES participantes (id) ON DELETE CASCADE) WITHOUT ROWID""")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tripulantes_participante ON inscripcion_tripulantes (participante_id, inscripcion_id)")
+    for n in range(1, 5):
+        cursor.execute(f"""
+            INSERT OR IGNORE INTO inscripcion_tripulantes (inscripcion_id, participante_id, posicion)
+            SELECT i.id, i.participante{n}_id, {n} FROM inscripciones i
+            JOIN participantes p ON p.id = i.participante{n}_id
+        """)
+
+def _migracion_tiempo_final_ms(cursor):
+    columnas = [info[1] for info in cursor.execute("PRAGMA table_info(inscripciones)")]
+    if 'tiempo_final_ms' not in columnas:
+        cursor.execute("ALTER TABLE inscripciones ADD COLUMN tiempo_final_ms INTEGER")
+    convertidos = []
+    for insc_id, tiempo_final in cursor.execute("SELECT id, tiempo_final FROM inscripciones WHERE tiempo_final IS NOT NULL AND tiempo_final != ''").fetchall():
+        try:
+            tiempo_ms = parsear_tiempo_ms(tiempo_final)
+        except ValueError:
+            print(f"[ADVERTENCIA] Migración: tiempo '{tiempo_final}' de la inscripción {insc_id} no es válido; se deja sin tiempo_final_ms.")
+            continue
+        convertidos.append((tiempo_ms, formatear_tiempo_ms(tiempo_ms), insc_id))
+    cursor.executemany("UPDATE inscripciones SET tiempo_final_ms = ?, tiempo_final = ? WHERE id = ?", convertidos)
+    cursor.execute("DROP INDEX IF EXISTS idx_inscripciones_evento_cat_estado_tiempo")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_inscripciones_evento_cat_tiempo_ms ON inscripciones (evento_id, categoria_id, tiempo_final_ms)")
+
+PUNTUACION_POR_DEFECTO = {1: 10, 2: 8, 3: 6, 4: 5, 5: 4, 6: 3, 7: 2, 8: 1}
+
+# Tablas cuyos cambios alteran los resultados publicados de un evento y, por tanto, su version_datos.
+_TRIGGERS_VERSION_EVENTO = {
+    'inscripciones': ("NEW.evento_id", "OLD.evento_id"),
+    'evento_categorias_estado': ("NEW.evento_id", "OLD.evento_id"),
+    'sistemas_puntuacion': ("NEW.evento_id", "OLD.evento_id"),
+    'inscripcion_tripulantes': ("(SELECT evento_id FROM inscripciones WHERE id = NEW.inscripcion_id)",
+                                "(SELECT evento_id FROM inscripciones WHERE id = OLD.inscripcion_id)"),
+}
+
+def _crear_triggers_version(cursor, tabla, evento_nuevo, evento_viejo):
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_version_{tabla}_ins AFTER INSERT ON {tabla} BEGIN UPDATE eventos SET version_datos = version_datos + 1 WHERE id = {evento_nuevo}; END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_version_{tabla}_del AFTER DELETE ON {tabla} BEGIN UPDATE eventos SET version_datos = version_datos + 1 WHERE id = {evento_viejo}; END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_version_{tabla}_upd AFTER UPDATE ON {tabla} BEGIN UPDATE eventos SET version_datos = version_datos + 1 WHERE id IN ({evento_nuevo}, {evento_viejo}); END")
+
+# Renombrar un club o cambiar su logo solo afecta a los eventos donde compiten tripulantes del club
+_SQL_TRIGGER_VERSION_CLUBES = """
+    CREATE TRIGGER IF NOT EXISTS trg_version_clubes_upd AFTER UPDATE ON clubes BEGIN
+        UPDATE eventos SET version_datos = version_datos + 1 WHERE id IN (
+            SELECT i.evento_id FROM participantes p JOIN inscripcion_tripulantes t ON t.participante_id = p.id
+            JOIN inscripciones i ON i.id = t.inscripcion_id WHERE p.club_id = NEW.id);
+    END"""
+
+def _migracion_sistemas_puntuacion(cursor):
+    cursor.execute("""CREATE TABLE IF NOT EXISTS sistemas_puntuacion (evento_id INTEGER NOT NULL, lugar INTEGER NOT NULL, puntos INTEGER NOT NULL, PRIMARY KEY (evento_id, lugar), FOREIGN KEY (evento_id) REFERENCES eventos (id) ON DELETE CASCADE) WITHOUT ROWID""")
+    cursor.executemany("INSERT OR IGNORE INTO sistemas_puntuacion (evento_id, lugar, puntos) SELECT id, ?, ? FROM eventos", PUNTUACION_POR_DEFECTO.items())
+    columnas = [info[1] for info in cursor.execute("PRAGMA table_info(eventos)")]
+    if 'version_datos' not in columnas:
+        cursor.execute("ALTER TABLE eventos ADD COLUMN version_datos INTEGER NOT NULL DEFAULT 0")
+    for tabla, (evento_nuevo, evento_viejo) in _TRIGGERS_VERSION_EVENTO.items():
+        _crear_triggers_version(cursor, tabla, evento_nuevo, evento_viejo)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_version_participantes_upd AFTER UPDATE OF nombre, apellido, club_id ON participantes BEGIN
+            UPDATE eventos SET version_datos = version_datos + 1 WHERE id IN (
+                SELECT i.evento_id FROM inscripcion_tripulantes t JOIN inscripciones i ON i.id = t.inscripcion_id WHERE t.participante_id = NEW.id);
+        END""")
+    cursor.execute(_SQL_TRIGGER_VERSION_CLUBES)
+
+# Cada inscripción finalizada en una categoría válida (sin fila en evento_categorias_estado = válida) aporta una fila al club de su primer tripulante y una por
+# tripulante a cada deportista. Las clasificaciones son la suma de esos aportes y se mantienen con triggers.
+def _sql_aportes_clubes(inscripciones):
+    return f"""
+        DELETE FROM aportes_clubes WHERE inscripcion_id IN ({inscripciones});
+        INSERT INTO aportes_clubes (inscripcion_id, evento_id, club_id, puntos, oro, plata, bronce)
+        SELECT i.id, i.evento_id, p1.club_id, COALESCE(sp.puntos, 0), i.lugar_final = 1, i.lugar_final = 2, i.lugar_final = 3
+        FROM inscripciones i
+        JOIN participantes p1 ON p1.id = i.participante1_id
+        LEFT JOIN evento_categorias_estado ece ON ece.evento_id = i.evento_id AND ece.categoria_id = i.categoria_id
+        LEFT JOIN sistemas_puntuacion sp ON sp.evento_id = i.evento_id AND sp.lugar = i.lugar_final
+        WHERE i.id IN ({inscripciones}) AND i.estado = 'Finalizado' AND i.lugar_final IS NOT NULL
+          AND COALESCE(ece.es_valida, 1) = 1 AND p1.club_id IS NOT NULL;
+    """
+
+def _sql_aportes_deportistas(inscripciones):
+    return f"""
+        DELETE FROM aportes_deportistas WHERE inscripcion_id IN ({inscripciones});
+        INSERT OR IGNORE INTO aportes_deportistas (inscripcion_id, participante_id, evento_id, puntos, oro, plata, bronce)
+        SELECT i.id, t.participante_id, i.evento_id, COALESCE(sp.puntos, 0), i.lugar_final = 1, i.lugar_final = 2, i.lugar_final = 3
+        FROM inscripciones i
+        JOIN inscripcion_tripulantes t ON t.inscripcion_id = i.id
+        LEFT JOIN evento_categorias_estado ece ON ece.evento_id = i.evento_id AND ece.categoria_id = i.categoria_id
+        LEFT JOIN sistemas_puntuacion sp ON sp.evento_id = i.evento_id AND sp.lugar = i.lugar_final
+        WHERE i.id IN ({inscripciones}) AND i.estado = 'Finalizado' AND i.lugar_final IS NOT NULL AND COALESCE(ece.es_valida, 1) = 1;
+    """
+
+def _sql_triggers_clasificaciones():
+    """Sentencias CREATE TRIGGER que mantienen aportes_* y clasificacion_* al día."""
+    inscripciones_ece_nuevo = "SELECT id FROM inscripciones WHERE evento_id = NEW.evento_id AND categoria_id = NEW.categoria_id"
+    inscripciones_ece_viejo = "SELECT id FROM inscripciones WHERE evento_id = OLD.evento_id AND categoria_id = OLD.categoria_id"
+    triggers = {
+        'trg_clasif_inscripciones_ins': ("AFTER INSERT ON inscripciones", _sql_aportes_clubes("NEW.id") + _sql_aportes_deportistas("NEW.id")),
+        'trg_clasif_inscripciones_upd': ("AFTER UPDATE OF evento_id, categoria_id, participante1_id, lugar_final, estado ON inscripciones",
+                                         _sql_aportes_clubes("NEW.id") + _sql_aportes_deportistas("NEW.id")),
+        'trg_clasif_inscripciones_del': ("AFTER DELETE ON inscripciones",
+                                         "DELETE FROM aportes_clubes WHERE inscripcion_id = OLD.id; DELETE FROM aportes_deportistas WHERE inscripcion_id = OLD.id;"),
+        'trg_clasif_tripulantes_ins': ("AFTER INSERT ON inscripcion_tripulantes", _sql_aportes_deportistas("NEW.inscripcion_id")),
+        'trg_clasif_tripulantes_upd': ("AFTER UPDATE ON inscripcion_tripulantes", _sql_aportes_deportistas("OLD.inscripcion_id, NEW.inscripcion_id")),
+        'trg_clasif_tripulantes_del': ("AFTER DELETE ON inscripcion_tripulantes", _sql_aportes_deportistas("OLD.inscripcion_id")),
+        'trg_clasif_ece_ins': ("AFTER INSERT ON evento_categorias_estado",
+                               _sql_aportes_clubes(inscripciones_ece_nuevo) + _sql_aportes_deportistas(inscripciones_ece_nuevo)),
+        'trg_clasif_ece_upd': ("AFTER UPDATE ON evento_categorias_estado",
+                               _sql_aportes_clubes(f"{inscripciones_ece_viejo} UNION {inscripciones_ece_nuevo}")
+                               + _sql_aportes_deportistas(f"{inscripciones_ece_viejo} UNION {inscripciones_ece_nuevo}")),
+        'trg_clasif_ece_del': ("AFTER DELETE ON evento_categorias_estado",
+                               _sql_aportes_clubes(inscripciones_ece_viejo) + _sql_aportes_deportistas(inscripciones_ece_viejo)),
+        'trg_clasif_participantes_club': ("AFTER UPDATE OF club_id ON participantes",
+                                          _sql_aportes_clubes("SELECT id FROM inscripciones WHERE participante1_id = NEW.id")),
+    }
+    for tabla, clave in (('clubes', 'club_id'), ('deportistas', 'participante_id')):
+        triggers[f'trg_aportes_{tabla}_ins'] = (f"AFTER INSERT ON aportes_{tabla}", f"""
+            INSERT INTO clasificacion_{tabla} (evento_id, {clave}, puntos, oro, plata, bronce, aportes)
+            VALUES (NEW.evento_id, NEW.{clave}, NEW.puntos, NEW.oro, NEW.plata, NEW.bronce, 1)
+            ON CONFLICT (evento_id, {clave}) DO UPDATE SET
+                puntos = puntos + excluded.puntos, oro = oro + excluded.oro, plata = plata + excluded.plata,
+                bronce = bronce + excluded.bronce, aportes = aportes + 1;""")
+        triggers[f'trg_aportes_{tabla}_del'] = (f"AFTER DELETE ON aportes_{tabla}", f"""
+            UPDATE clasificacion_{tabla} SET puntos = puntos - OLD.puntos, oro = oro - OLD.oro, plata = plata - OLD.plata,
+                bronce = bronce - OLD.bronce, aportes = aportes - 1
+            WHERE evento_id = OLD.evento_id AND {clave} = OLD.{clave};
+            DELETE FROM clasificacion_{tabla} WHERE evento_id = OLD.evento_id AND {clave} = OLD.{clave} AND aportes <= 0;""")
+    return [f"CREATE TRIGGER IF NOT EXISTS {nombre} {evento} BEGIN {cuerpo} END" for nombre, (evento, cuerpo) in triggers.items()]
+
+def _reconstruir_clasificaciones(cursor, evento_id=None):
+    filtro = "WHERE evento_id = :evento_id" if evento_id is not None else "WHERE 1"
+    # Las clasificaciones de eventos archivados se conservan: sus inscripciones ya no están en esta base
+    if 'archivo' in [info[1] for info in cursor.execute("PRAGMA table_info(eventos)")]:
+        filtro += " AND evento_id IN (SELECT id FROM eventos WHERE archivo IS NULL)"
+    params = {'evento_id': evento_id}
+    for tabla in ('clasificacion_clubes', 'clasificacion_deportistas', 'aportes_clubes', 'aportes_deportistas'):
+        cursor.execute(f"DELETE FROM {tabla} {filtro}", params)
+    inscripciones = f"SELECT id FROM inscripciones {filtro}"
+    for sentencia in (_sql_aportes_clubes(inscripciones) + _sql_aportes_deportistas(inscripciones)).split(';'):
+        if sentencia.strip():
+            cursor.execute(sentencia, params)
+
+def _migracion_clasificaciones(cursor):
+    for tabla, clave, referencia in (('clubes', 'club_id', 'clubes'), ('deportistas', 'participante_id', 'participantes')):
+        cursor.execute(f"""CREATE TABLE IF NOT EXISTS aportes_{tabla} (inscripcion_id INTEGER NOT NULL, {clave} INTEGER NOT NULL, evento_id INTEGER NOT NULL, puntos INTEGER NOT NULL, oro INTEGER NOT NULL, plata INTEGER NOT NULL, bronce INTEGER NOT NULL, PRIMARY KEY (inscripcion_id, {clave})) WITHOUT ROWID""")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_aportes_{tabla}_evento ON aportes_{tabla} (evento_id)")
+        cursor.execute(f"""CREATE TABLE IF NOT EXISTS clasificacion_{tabla} (evento_id INTEGER NOT NULL, {clave} INTEGER NOT NULL, puntos INTEGER NOT NULL, oro INTEGER NOT NULL, plata INTEGER NOT NULL, bronce INTEGER NOT NULL, aportes INTEGER NOT NULL, PRIMARY KEY (evento_id, {clave}), FOREIGN KEY (evento_id) REFERENCES eventos (id) ON DELETE CASCADE, FOREIGN KEY ({clave}) REFERENCES {referencia} (id) ON DELETE CASCADE) WITHOUT ROWID""")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_clasificacion_{tabla}_puntos ON clasificacion_{tabla} (evento_id, puntos DESC, oro DESC, plata DESC)")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_clasificacion_{tabla}_medallas ON clasificacion_{tabla} (evento_id, oro DESC, plata DESC, bronce DESC)")
+    for sentencia in _sql_triggers_clasificaciones():
+        cursor.execute(sentencia)
+    _reconstruir_clasificaciones(cursor)
+
+_SQL_FILA_FTS_PARTICIPANTE = """
+    INSERT INTO participantes_fts (rowid, nombre, apellido, rut, club)
+    SELECT NEW.id, NEW.nombre, NEW.apellido, replace(replace(replace(NEW.rut_o_id, '.', ''), ',', ''), '-', ''), (SELECT nombre_club FROM clubes WHERE id = NEW.club_id);
+"""
+
+def _migracion_busqueda_participantes(cursor):
+    try:
+        cursor.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS participantes_fts USING fts5(nombre, apellido, rut, club, tokenize = 'unicode61 remove_diacritics 2')""")
+    except sqlite3.OperationalError as e:
+        print(f"[ADVERTENCIA] FTS5 no disponible ({e}); la búsqueda de deportistas usará LIKE.")
+        return
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_fts_participantes_ins AFTER INSERT ON participantes BEGIN {_SQL_FILA_FTS_PARTICIPANTE} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_fts_participantes_upd AFTER UPDATE ON participantes BEGIN DELETE FROM participantes_fts WHERE rowid = OLD.id; {_SQL_FILA_FTS_PARTICIPANTE} END")
+    cursor.execute("CREATE TRIGGER IF NOT EXISTS trg_fts_participantes_del AFTER DELETE ON participantes BEGIN DELETE FROM participantes_fts WHERE rowid = OLD.id; END")
+    cursor.execute("CREATE TRIGGER IF NOT EXISTS trg_fts_clubes_upd AFTER UPDATE OF nombre_club ON clubes BEGIN UPDATE participantes_fts SET club = NEW.nombre_club WHERE rowid IN (SELECT id FROM participantes WHERE club_id = NEW.id); END")
+    cursor.execute("DELETE FROM participantes_fts")
+    cursor.execute("""
+        INSERT INTO participantes_fts (rowid, nombre, apellido, rut, club)
+        SELECT p.id, p.nombre, p.apellido, replace(replace(replace(p.rut_o_id, '.', ''), ',', ''), '-', ''), c.nombre_club
+        FROM participantes p LEFT JOIN clubes c ON c.id = p.club_id
+    """)
+
+def _migracion_tiempos_vuelta(cursor):
+    # evento_id y categoria_id se copian de la inscripción para que las clasificaciones por vuelta
+    # de una categoría se lean directamente del índice; un trigger los mantiene al día.
+    cursor.execute("""CREATE TABLE IF NOT EXISTS tiempos_vuelta (inscripcion_id INTEGER NOT NULL, vuelta INTEGER NOT NULL CHECK (vuelta >= 1), tiempo_ms INTEGER NOT NULL, evento_id INTEGER NOT NULL, categoria_id INTEGER NOT NULL, PRIMARY KEY (inscripcion_id, vuelta), FOREIGN KEY (inscripcion_id) REFERENCES inscripciones (id) ON DELETE CASCADE) WITHOUT ROWID""")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tiempos_vuelta_evento_cat_vuelta ON tiempos_vuelta (evento_id, categoria_id, vuelta, tiempo_ms)")
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_tiempos_vuelta_inscripcion AFTER UPDATE OF evento_id, categoria_id ON inscripciones BEGIN
+            UPDATE tiempos_vuelta SET evento_id = NEW.evento_id, categoria_id = NEW.categoria_id WHERE inscripcion_id = NEW.id;
+        END""")
+    _crear_triggers_version(cursor, 'tiempos_vuelta', "NEW.evento_id", "OLD.evento_id")
+
+    columnas = [info[1] for info in cursor.execute("PRAGMA table_info(inscripciones)")]
+    if 'tiempo_vueltas' not in columnas: return
+    vueltas = []
+    for insc_id, evento_id, categoria_id, tiempo_vueltas in cursor.execute("SELECT id, evento_id, categoria_id, tiempo_vueltas FROM inscripciones WHERE tiempo_vueltas IS NOT NULL AND tiempo_vueltas != ''").fetchall():
+        try:
+            tiempos = json.loads(tiempo_vueltas)
+        except (json.JSONDecodeError, TypeError):
+            print(f"[ADVERTENCIA] Migración: tiempos de vuelta ilegibles en la inscripción {insc_id}; se descartan.")
+            continue
+        for vuelta, tiempo in enumerate(tiempos, start=1):
+            try:
+                vueltas.append((insc_id, vuelta, parsear_tiempo_ms(tiempo), evento_id, categoria_id))
+            except (ValueError, AttributeError):
+                print(f"[ADVERTENCIA] Migración: tiempo '{tiempo}' de la vuelta {vuelta} (inscripción {insc_id}) no es válido; se omite.")
+    cursor.executemany("INSERT OR REPLACE INTO tiempos_vuelta (inscripcion_id, vuelta, tiempo_ms, evento_id, categoria_id) VALUES (?, ?, ?, ?, ?)", vueltas)
+    cursor.execute("ALTER TABLE inscripciones DROP COLUMN tiempo_vueltas")
+
+def _migracion_temporadas(cursor):
+    # mejores_n NULL = suman todos los eventos de la temporada
+    cursor.execute("""CREATE TABLE IF NOT EXISTS temporadas (id INTEGER PRIMARY KEY AUTOINCREMENT, nombre TEXT NOT NULL UNIQUE, anio INTEGER, mejores_n INTEGER CHECK (mejores_n IS NULL OR mejores_n >= 1))""")
+    cursor.execute("""CREATE TABLE IF NOT EXISTS temporada_eventos (temporada_id INTEGER NOT NULL, evento_id INTEGER NOT NULL, PRIMARY KEY (temporada_id, evento_id), FOREIGN KEY (temporada_id) REFERENCES temporadas (id) ON DELETE CASCADE, FOREIGN KEY (evento_id) REFERENCES eventos (id) ON DELETE CASCADE) WITHOUT ROWID""")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_temporada_eventos_evento ON temporada_eventos (evento_id)")
+
+def _migracion_archivo_eventos(cursor):
+    # archivo: nombre del archivo de temporada donde están las inscripciones del evento (NULL = en la base viva)
+    columnas = [info[1] for info in cursor.execute("PRAGMA table_info(eventos)")]
+    if 'archivo' not in columnas:
+        cursor.execute("ALTER TABLE eventos ADD COLUMN archivo TEXT")
+
+# Una fila por categoría y evento (válida por defecto); los eventos archivados tienen las suyas en el archivo.
+_SQL_SEMBRAR_ESTADOS_CATEGORIAS = """
+    INSERT OR IGNORE INTO evento_categorias_estado (evento_id, categoria_id, es_valida)
+    SELECT e.id, c.id, 1 FROM eventos e CROSS JOIN categorias c
+    WHERE e.archivo IS NULL {filtro}
+"""
+
+def _sembrar_estados_categorias(cursor, evento_id):
+    cursor.execute(_SQL_SEMBRAR_ESTADOS_CATEGORIAS.format(filtro="AND e.id = ?"), (evento_id,))
+
+def _migracion_estados_categorias(cursor):
+    # Los triggers de clasificación se recrean con LEFT JOIN: ya no dependen de que alguien haya abierto la categoría
+    for (nombre,) in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_clasif_%'").fetchall():
+        cursor.execute(f"DROP TRIGGER {nombre}")
+    cursor.execute(_SQL_SEMBRAR_ESTADOS_CATEGORIAS.format(filtro=""))
+    for sentencia in _sql_triggers_clasificaciones():
+        cursor.execute(sentencia)
+    _reconstruir_clasificaciones(cursor)
+
+def _migracion_reservas_numeros(cursor):
+    # categoria_id NULL = el rango vale para todas las categorías del evento; club_id NULL = rango de la categoría
+    cursor.execute("""CREATE TABLE IF NOT EXISTS reservas_numeros (id INTEGER PRIMARY KEY AUTOINCREMENT, evento_id INTEGER NOT NULL, categoria_id INTEGER, club_id INTEGER, desde INTEGER NOT NULL CHECK (desde >= 1), hasta INTEGER NOT NULL, CHECK (hasta >= desde), FOREIGN KEY (evento_id) REFERENCES eventos (id) ON DELETE CASCADE, FOREIGN KEY (categoria_id) REFERENCES categorias (id) ON DELETE CASCADE, FOREIGN KEY (club_id) REFERENCES clubes (id) ON DELETE CASCADE)""")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reservas_numeros_evento ON reservas_numeros (evento_id, desde)")
+
+def _migracion_version_clubes(cursor):
+    # La versión original del trigger invalidaba todos los eventos ante cualquier cambio de un club
+    cursor.execute("DROP TRIGGER IF EXISTS trg_version_clubes_upd")
+    cursor.execute(_SQL_TRIGGER_VERSION_CLUBES)
+
+MIGRACIONES = [
+    (1, "Índices para consultas de resultados, rankings y deportistas", _migracion_indices_inscripciones),
+    (2, "Tabla normalizada de tripulantes por inscripción", _migracion_tabla_tripulantes),
+    (3, "Tiempos finales en milisegundos enteros", _migracion_tiempo_final_ms),
+    (4, "Sistemas de puntuación por evento y versión de datos del evento", _migracion_sistemas_puntuacion),
+    (5, "Clasificaciones de clubes y deportistas mantenidas por triggers", _migracion_clasificaciones),
+    (6, "Índice de búsqueda de texto completo para deportistas", _migracion_busqueda_participantes),
+    (7, "Tiempos por vuelta en tabla propia, en milisegundos", _migracion_tiempos_vuelta),
+    (8, "Temporadas y ranking de temporada por mejores resultados", _migracion_temporadas),
+    (9, "Archivo de eventos terminados en bases de datos por temporada", _migracion_archivo_eventos),
+    (10, "Estado de categorías sembrado por evento y sin escrituras al leer", _migracion_estados_categorias),
+    (11, "Reservas de rangos de números de competidor", _migracion_reservas_numeros),
+    (12, "Versión de datos limitada a los eventos del club modificado", _migracion_version_clubes),
+]
+
+VERSION_ESQUEMA = MIGRACIONES[-1][0]
+
+def _aplicar_migraciones(conn, version_actual):
+    """Cada migración pendiente corre una sola vez, en su propia transacción junto con su PRAGMA user_version."""
+    for version, descripcion, migracion in MIGRACIONES:
+        if version <= version_actual: continue
+        print(f"[INFO] Migración {version}: {descripcion}.")
+        try:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN")
+            migracion(cursor)
+            cursor.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+    if version_actual < MIGRACIONES[-1][0]:
+        conn.execute("PRAGMA optimize")
 
+@_lectura_cacheada
 def obtener_info_evento(evento_id):
     with conectar_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM eventos WHERE id=?", (evento_id,))
+        cursor.execute("SELECT id, nombre_evento, fecha, lugar, notas FROM eventos WHERE id=?", (evento_id,))
         return cursor.fetchone()
 
+@_lectura_cacheada
 def obtener_info_categoria(categoria_id):
     with conectar_db() as conn:
         cursor = conn.cursor()
@@ -63,16 +687,25 @@ def obtener_info_participante(participante_id):
         cursor.execute("SELECT * FROM participantes WHERE id=?", (participante_id,))
         return cursor.fetchone()
 
-def buscar_o_crear_club(nombre_club):
+def _buscar_o_crear_club(cursor, nombre_club):
     if not nombre_club or not nombre_club.strip(): return None
+    cursor.execute("SELECT id FROM clubes WHERE nombre_club = ?", (nombre_club.strip(),))
+    res = cursor.fetchone()
+    if res: return res[0]
+    cursor.execute("INSERT INTO clubes (nombre_club) VALUES (?)", (nombre_club.strip(),))
+    return cursor.lastrowid
+
+GENEROS_VALIDOS = (None, 'Masculino', 'Femenino')   # CHECK de participantes.genero
+
+def _separar_nombre_completo(nombre_completo):
+    partes = (nombre_completo or '').strip().split(' ')
+    return partes[0], ' '.join(partes[1:]) if len(partes) > 1 else ''
+
+def buscar_o_crear_club(nombre_club):
     with conectar_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT id FROM clubes WHERE nombre_club = ?", (nombre_club.strip(),))
-        res = cursor.fetchone()
-        if res: return res[0]
-        cursor.execute("INSERT INTO clubes (nombre_club) VALUES (?)", (nombre_club.strip(),))
+        club_id = _buscar_o_crear_club(conn.cursor(), nombre_club)
         conn.commit()
-        return cursor.lastrowid
+        return club_id
 
 def buscar_o_crear_participante(datos_participante):
     rut_id = datos_participante.get('rut_o_id')
@@ -82,10 +715,8 @@ def buscar_o_crear_participante(datos_participante):
         cursor.execute("SELECT id FROM participantes WHERE rut_o_id = ?", (rut_id.strip(),))
         res = cursor.fetchone()
         if res: return res[0]
-        club_id = buscar_o_crear_club(datos_participante.get('club'))
-        nombre_completo = datos_participante.get('nombre_completo', '').strip().split(' ')
-        nombre = nombre_completo[0]
-        apellido = ' '.join(nombre_completo[1:]) if len(nombre_completo) > 1 else ''
+        club_id = _buscar_o_crear_club(cursor, datos_participante.get('club'))
+        nombre, apellido = _separar_nombre_completo(datos_participante.get('nombre_completo'))
         params = (nombre, apellido, rut_id.strip(), datos_participante.get('fecha_nacimiento'), datos_participante.get('genero'), club_id)
         cursor.execute("INSERT INTO participantes (nombre, apellido, rut_o_id, fecha_nacimiento, genero, club_id) VALUES (?, ?, ?, ?, ?, ?)", params)
         conn.commit()
@@ -99,6 +730,7 @@ def obtener_categoria_por_codigo(codigo_categoria):
         res = cursor.fetchone()
         return res[0] if res else None
 
+@_lectura_cacheada
 def obtener_eventos():
     with conectar_db() as conn:
         cursor = conn.cursor()
@@ -114,7 +746,10 @@ def agregar_o_actualizar_evento(datos, evento_id=None):
             else:
                 sql, params = "INSERT INTO eventos (nombre_evento, fecha, lugar, notas) VALUES (?, ?, ?, ?)", (datos['nombre_evento'], datos['fecha'], datos['lugar'], datos['notas'])
             cursor.execute(sql, params)
-            if not evento_id: evento_id = cursor.lastrowid
+            if not evento_id:
+                evento_id = cursor.lastrowid
+                cursor.executemany("INSERT INTO sistemas_puntuacion (evento_id, lugar, puntos) VALUES (?, ?, ?)", [(evento_id, lugar, puntos) for lugar, puntos in PUNTUACION_POR_DEFECTO.items()])
+            _sembrar_estados_categorias(cursor, evento_id)
             conn.commit()
             return evento_id, "Evento guardado."
     except sqlite3.IntegrityError: return None, "Error: El nombre del evento ya existe."
@@ -122,10 +757,14 @@ def agregar_o_actualizar_evento(datos, evento_id=None):
 def eliminar_evento(evento_id):
     with conectar_db() as conn:
         cursor = conn.cursor()
+        esquema = _esquema_evento(conn, evento_id)
+        if esquema != "main":
+            _borrar_evento_de_archivo(cursor, esquema, evento_id)
         cursor.execute("DELETE FROM eventos WHERE id=?", (evento_id,))
         conn.commit()
         return True, "Evento eliminado."
 
+@_lectura_cacheada
 def obtener_clubes():
     with conectar_db() as conn:
         cursor = conn.cursor()
@@ -177,6 +816,7 @@ def eliminar_participante(participante_id):
         conn.commit()
         return True, "Participante eliminado."
 
+@_lectura_cacheada
 def obtener_categorias():
     with conectar_db() as conn:
         cursor = conn.cursor()
@@ -203,159 +843,555 @@ def eliminar_categoria(categoria_id):
         conn.commit()
         return True, "Categoría eliminada."
 
+def _tripulacion_de_datos(datos):
+    """Lista ordenada de IDs de la tripulación: usa 'participantes' o, si no existe, participante1_id..participante4_id."""
+    if datos.get('participantes'):
+        return [p_id for p_id in datos['participantes'] if p_id]
+    return [datos.get(f'participante{n}_id') for n in range(1, 5) if datos.get(f'participante{n}_id')]
+
 def inscribir_embarcacion(datos):
+    """Inscribe una embarcación. Sin 'numero_competidor' (None o 0) se asigna el primer número libre."""
+    tripulacion = _tripulacion_de_datos(datos)
+    if not tripulacion: return None, "Error: La inscripción no tiene participantes."
+    # Las columnas participante1..4 se mantienen para compatibilidad; la tripulación completa vive en inscripcion_tripulantes.
+    columnas_legado = (tripulacion + [None] * 4)[:4]
     sql = "INSERT INTO inscripciones (evento_id, categoria_id, participante1_id, participante2_id, participante3_id, participante4_id, numero_competidor) VALUES (?, ?, ?, ?, ?, ?, ?)"
-    params = (datos['evento_id'], datos['categoria_id'], datos['participante1_id'], datos.get('participante2_id'), datos.get('participante3_id'), datos.get('participante4_id'), datos['numero_competidor'])
+    evento_id, categoria_id, numero = datos['evento_id'], datos['categoria_id'], datos.get('numero_competidor')
     try:
         with conectar_db() as conn:
+            _iniciar_escritura(conn)
             cursor = conn.cursor()
-            cursor.execute(sql, params)
+            asignador = _AsignadorNumeros(cursor, evento_id)
+            if asignador.archivo:
+                conn.rollback()
+                return None, _ERROR_EVENTO_ARCHIVADO.format(asignador.archivo)
+            if not numero:
+                club_id = cursor.execute("SELECT club_id FROM participantes WHERE id = ?", (tripulacion[0],)).fetchone()
+                numero = asignador.siguiente(categoria_id, club_id[0] if club_id else None)
+                if numero is None:
+                    conn.rollback()
+                    return None, "Error: No quedan números de competidor libres en la categoría."
+            elif not asignador.ocupar(categoria_id, numero):
+                conn.rollback()
+                libre = asignador.siguiente(categoria_id, ocupar=False)
+                return None, f"Error: El número de competidor {numero} ya está en uso. El primer número libre es {libre}."
+            cursor.execute(sql, (evento_id, categoria_id, *columnas_legado, numero))
+            inscripcion_id = cursor.lastrowid
+            cursor.executemany("INSERT INTO inscripcion_tripulantes (inscripcion_id, participante_id, posicion) VALUES (?, ?, ?)",
+                               [(inscripcion_id, p_id, pos) for pos, p_id in enumerate(tripulacion, start=1)])
             conn.commit()
-            return cursor.lastrowid, "Inscripción guardada."
+            return inscripcion_id, f"Inscripción guardada con el número {numero}."
     except sqlite3.IntegrityError: return None, "Error: El número de competidor ya está en uso."
 
+def importar_inscripciones_lote(evento_id, entradas):
+    """
+    Importa muchas inscripciones en una sola transacción. Cada entrada es un dict con 'codigo_categoria',
+    'numero_competidor' (int; None o 0 para asignar el primer número libre) y 'tripulantes', una lista de dicts
+    con 'nombre_completo', 'rut_o_id', 'fecha_nacimiento', 'genero' y 'club'.
+    Devuelve, en el mismo orden que las entradas, una lista de (inscripcion_id, mensaje); el id es None si la fila falló.
+    """
+    resultados = [None] * len(entradas)
+    with conectar_db() as conn:
+        cursor = conn.cursor()
+        try:
+            _iniciar_escritura(conn)
+            categorias = dict(cursor.execute("SELECT codigo_categoria, id FROM categorias WHERE codigo_categoria IS NOT NULL").fetchall())
+            clubes = dict(cursor.execute("SELECT nombre_club, id FROM clubes").fetchall())
+            participantes = dict(cursor.execute("SELECT rut_o_id, id FROM participantes WHERE rut_o_id IS NOT NULL").fetchall())
+            asignador = _AsignadorNumeros(cursor, evento_id)
+            if asignador.archivo:
+                conn.rollback()
+                mensaje = _ERROR_EVENTO_ARCHIVADO.format(asignador.archivo)
+                print(f"[ADVERTENCIA] Importación por lote rechazada: {mensaje}")
+                return [(None, mensaje)] * len(entradas)
+
+            # 1. Validar filas y reunir clubes y deportistas que aún no existen
+            validas = []
+            clubes_nuevos, participantes_nuevos = {}, {}
+            for idx, entrada in enumerate(entradas):
+                codigo = (entrada.get('codigo_categoria') or '').strip().upper()
+                if codigo not in categorias:
+                    resultados[idx] = (None, f"Error: La categoría con código '{codigo}' no existe.")
+                    continue
+                tripulantes = [t for t in entrada.get('tripulantes', []) if t.get('nombre_completo') and t.get('rut_o_id') and t['rut_o_id'].strip()]
+                if not tripulantes:
+                    resultados[idx] = (None, "Error: La inscripción no tiene participantes.")
+                    continue
+                # Los deportistas nuevos se validan contra los CHECK de participantes antes del executemany:
+                # una fila inválida falla sola en lugar de deshacer todo el lote
+                nuevos = [t for t in tripulantes if t['rut_o_id'].strip() not in participantes and t['rut_o_id'].strip() not in participantes_nuevos]
+                invalido = next((t for t in nuevos if (t.get('genero') or None) not in GENEROS_VALIDOS), None)
+                if invalido is not None:
+                    resultados[idx] = (None, f"Error: El género '{invalido['genero']}' de {invalido['rut_o_id'].strip()} no es válido (usa 'Masculino' o 'Femenino').")
+                    continue
+                for t in nuevos:
+                    club = (t.get('club') or '').strip()
+                    if club and club not in clubes: clubes_nuevos[club] = None
+                    participantes_nuevos[t['rut_o_id'].strip()] = t
+                # 0 o vacío = asignar el primer número libre, igual que inscribir_embarcacion
+                validas.append((idx, categorias[codigo], entrada.get('numero_competidor') or None, [t['rut_o_id'].strip() for t in tripulantes]))
+
+            # 2. Crear los que faltan con executemany y recargar sus ids
+            if clubes_nuevos:
+                cursor.executemany("INSERT INTO clubes (nombre_club) VALUES (?)", [(nombre,) for nombre in clubes_nuevos])
+                clubes = dict(cursor.execute("SELECT nombre_club, id FROM clubes").fetchall())
+            if participantes_nuevos:
+                filas = []
+                for rut, t in participantes_nuevos.items():
+                    nombre, apellido = _separar_nombre_completo(t['nombre_completo'])
+                    filas.append((nombre, apellido, rut, t.get('fecha_nacimiento') or None, t.get('genero') or None, clubes.get((t.get('club') or '').strip())))
+                cursor.executemany("INSERT INTO participantes (nombre, apellido, rut_o_id, fecha_nacimiento, genero, club_id) VALUES (?, ?, ?, ?, ?, ?)", filas)
+                participantes = dict(cursor.execute("SELECT rut_o_id, id FROM participantes WHERE rut_o_id IS NOT NULL").fetchall())
+
+            # 3. Números de competidor: primero los pedidos en el archivo, después los automáticos (con sus reservas)
+            club_de = {}
+            if asignador.hay_reservas_club:
+                club_de = dict(cursor.execute("SELECT id, club_id FROM participantes").fetchall())
+            for idx, categoria_id, numero, ruts in validas:
+                if numero is not None and not asignador.ocupar(categoria_id, numero):
+                    resultados[idx] = (None, f"Error: El número de competidor {numero} ya está en uso.")
+            tripulantes_filas = []
+            for idx, categoria_id, numero, ruts in validas:
+                if resultados[idx] is not None: continue
+                if numero is None:
+                    numero = asignador.siguiente(categoria_id, club_de.get(participantes[ruts[0]]))
+                    if numero is None:
+                        resultados[idx] = (None, "Error: No quedan números de competidor libres en la categoría.")
+                        continue
+                tripulacion = list(dict.fromkeys(participantes[rut] for rut in ruts))
+                columnas_legado = (tripulacion + [None] * 4)[:4]
+                cursor.execute("INSERT INTO inscripciones (evento_id, categoria_id, participante1_id, participante2_id, participante3_id, participante4_id, numero_competidor) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               (evento_id, categoria_id, *columnas_legado, numero))
+                inscripcion_id = cursor.lastrowid
+                tripulantes_filas.extend((inscripcion_id, p_id, pos) for pos, p_id in enumerate(tripulacion, start=1))
+                resultados[idx] = (inscripcion_id, f"Inscripción guardada con el número {numero}.")
+            cursor.executemany("INSERT INTO inscripcion_tripulantes (inscripcion_id, participante_id, posicion) VALUES (?, ?, ?)", tripulantes_filas)
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+    importadas = sum(1 for inscripcion_id, _ in resultados if inscripcion_id)
+    print(f"[INFO] Importación por lote: {importadas} de {len(entradas)} inscripciones guardadas.")
+    return resultados
+
+def _obtener_tripulaciones(cursor, filtro_inscripciones, params, esquema="main"):
+    """
+    Carga en una sola consulta las tripulaciones de todas las inscripciones cuyo id
+    cumpla 'filtro_inscripciones' (una subconsulta SELECT id ...). Devuelve
+    {inscripcion_id: [(participante_id, nombre, apellido, rut, fecha_nac, genero, club, logo_path), ...]}
+    ordenado por posición. 'esquema' es el alias del archivo adjunto si el evento está archivado.
+    """
+    sql = f"""
+        SELECT t.inscripcion_id, p.id, p.nombre, p.apellido, p.rut_o_id, p.fecha_nacimiento, p.genero, c.nombre_club, c.logo_path
+        FROM {esquema}.inscripcion_tripulantes t
+        JOIN {esquema}.participantes p ON t.participante_id = p.id
+        LEFT JOIN {esquema}.clubes c ON p.club_id = c.id
+        WHERE t.inscripcion_id IN ({filtro_inscripciones})
+        ORDER BY t.inscripcion_id, t.posicion
+    """
+    tripulaciones = {}
+    for insc_id, *tripulante in cursor.execute(sql, params):
+        tripulaciones.setdefault(insc_id, []).append(tuple(tripulante))
+    return tripulaciones
+
+# --- Registros con nombre para filas de inscripciones ---
+# Son namedtuple (sin __dict__ por fila): pesan lo mismo que una tupla y cada consulta
+# declara la proyección exacta que usa quien la llama.
+
+_CAMPOS_TRIPULANTE_HISTORICO = [f"p{n}_{campo}" for n in range(1, 5) for campo in ('nombre', 'fecha_nac', 'club', 'logo')]
+FilaInscripcionCategoria = namedtuple('FilaInscripcionCategoria', ['id', 'numero', *_CAMPOS_TRIPULANTE_HISTORICO, 'lugar', 'tiempo', 'estado', 'tiempo_vueltas'])
+FilaResultado = namedtuple('FilaResultado', 'id numero nombres clubes lugar tiempo estado')
+FilaInscripcion = namedtuple('FilaInscripcion', 'id numero lugar tiempo estado tripulantes')
+TripulanteInscripcion = namedtuple('TripulanteInscripcion', 'participante_id nombre_completo fecha_nacimiento club')
+
+def _consultar_registros(conn, sql, params, fabrica):
+    """Ejecuta 'sql' con 'fabrica' como row_factory, de modo que cada fila sale ya convertida en registro."""
+    cursor = conn.cursor()
+    cursor.row_factory = fabrica
+    return cursor.execute(sql, params).fetchall()
+
+# {esquema}: 'main' o el alias del archivo del evento (ver _esquema_evento)
+_SQL_INSCRIPCIONES_CATEGORIA = """
+    SELECT {columnas}
+    FROM {esquema}.inscripciones i
+    WHERE i.evento_id = ? AND i.categoria_id = ?
+    ORDER BY 
+        CASE WHEN i.lugar_final IS NULL THEN 1 ELSE 0 END,
+        i.lugar_final ASC, i.tiempo_final_ms ASC, i.numero_competidor ASC
+"""
+
+def _obtener_tripulantes_inscripcion(conn, evento_id, categoria_id, esquema="main"):
+    """{inscripcion_id: (TripulanteInscripcion, ...)} de una categoría, sin logos."""
+    sql = f"""
+        SELECT t.inscripcion_id, p.id, p.apellido || ', ' || p.nombre, p.fecha_nacimiento, c.nombre_club
+        FROM {esquema}.inscripcion_tripulantes t
+        JOIN {esquema}.participantes p ON t.participante_id = p.id
+        LEFT JOIN {esquema}.clubes c ON p.club_id = c.id
+        WHERE t.inscripcion_id IN (SELECT id FROM {esquema}.inscripciones WHERE evento_id = ? AND categoria_id = ?)
+        ORDER BY t.inscripcion_id, t.posicion
+    """
+    tripulaciones = {}
+    for insc_id, *tripulante in conn.execute(sql, (evento_id, categoria_id)):
+        tripulaciones.setdefault(insc_id, []).append(TripulanteInscripcion._make(tripulante))
+    return {insc_id: tuple(lista) for insc_id, lista in tripulaciones.items()}
+
 def obtener_inscripciones_por_categoria(evento_id, categoria_id):
-    sql = """
-        SELECT 
-            i.id, i.numero_competidor,
-            p1.apellido || ', ' || p1.nombre, p1.fecha_nacimiento, c1.nombre_club, c1.logo_path,
-            p2.apellido || ', ' || p2.nombre, p2.fecha_nacimiento, c2.nombre_club, c2.logo_path,
-            p3.apellido || ', ' || p3.nombre, p3.fecha_nacimiento, c3.nombre_club, c3.logo_path,
-            p4.apellido || ', ' || p4.nombre, p4.fecha_nacimiento, c4.nombre_club, c4.logo_path,
-            i.lugar_final, i.tiempo_final, i.estado, i.tiempo_vueltas
-        FROM inscripciones i
-        JOIN participantes p1 ON i.participante1_id = p1.id
-        LEFT JOIN clubes c1 ON p1.club_id = c1.id
-        LEFT JOIN participantes p2 ON i.participante2_id = p2.id
-        LEFT JOIN clubes c2 ON p2.club_id = c2.id
-        LEFT JOIN participantes p3 ON i.participante3_id = p3.id
-        LEFT JOIN clubes c3 ON p3.club_id = c3.id
-        LEFT JOIN participantes p4 ON i.participante4_id = p4.id
-        LEFT JOIN clubes c4 ON p4.club_id = c4.id
-        WHERE i.evento_id = ? AND i.categoria_id = ?
-        ORDER BY 
-            CASE WHEN i.lugar_final IS NULL THEN 1 ELSE 0 END,
-            i.lugar_final ASC, i.tiempo_final ASC, i.numero_competidor ASC
-    """
-    with conectar_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute(sql, (evento_id, categoria_id))
-        return cursor.fetchall()
+    """
+    Formato histórico de 22 campos: (id, número, [nombre, fecha_nac, club, logo] x 4, lugar,
+    tiempo, estado, tiempo_vueltas), ahora como FilaInscripcionCategoria para leerlo por nombre.
+    tiempo_vueltas se arma desde tiempos_vuelta como la lista JSON de textos de antes.
+    Para pantallas nuevas conviene obtener_resultados_categoria u obtener_inscripciones_con_tripulacion.
+    """
+    with conectar_db() as conn:
+        esquema = _esquema_evento(conn, evento_id)
+        sql = _SQL_INSCRIPCIONES_CATEGORIA.format(columnas="i.id, i.numero_competidor, i.lugar_final, i.tiempo_final, i.estado", esquema=esquema)
+        tripulaciones = _obtener_tripulaciones(conn.cursor(), f"SELECT id FROM {esquema}.inscripciones WHERE evento_id = ? AND categoria_id = ?", (evento_id, categoria_id), esquema)
+        vueltas = {}
+        for insc_id, _, tiempo_ms in conn.execute(f"SELECT inscripcion_id, vuelta, tiempo_ms FROM {esquema}.tiempos_vuelta WHERE evento_id = ? AND categoria_id = ? ORDER BY inscripcion_id, vuelta", (evento_id, categoria_id)):
+            vueltas.setdefault(insc_id, []).append(formatear_tiempo_ms(tiempo_ms))
+        def fabrica(cursor, fila):
+            insc_id, numero, lugar, tiempo, estado = fila
+            tiempo_vueltas = json.dumps(vueltas[insc_id]) if insc_id in vueltas else None
+            datos_tripulantes = []
+            for _, nombre, apellido, _, fecha_nac, _, club, logo in tripulaciones.get(insc_id, [])[:4]:
+                datos_tripulantes += [f"{apellido}, {nombre}", fecha_nac, club, logo]
+            datos_tripulantes += [None] * (16 - len(datos_tripulantes))
+            return FilaInscripcionCategoria(insc_id, numero, *datos_tripulantes, lugar, tiempo, estado, tiempo_vueltas)
+        return _consultar_registros(conn, sql, (evento_id, categoria_id), fabrica)
+
+def obtener_resultados_categoria(evento_id, categoria_id):
+    """Filas de la tabla de resultados (FilaResultado): tripulantes y clubes ya unidos con ' / ', sin logos ni vueltas."""
+    with conectar_db() as conn:
+        esquema = _esquema_evento(conn, evento_id)
+        sql = _SQL_INSCRIPCIONES_CATEGORIA.format(columnas="i.id, i.numero_competidor, i.lugar_final, i.tiempo_final, i.estado", esquema=esquema)
+        tripulaciones = _obtener_tripulantes_inscripcion(conn, evento_id, categoria_id, esquema)
+        def fabrica(cursor, fila):
+            insc_id, numero, lugar, tiempo, estado = fila
+            tripulantes = tripulaciones.get(insc_id, ())
+            nombres = " / ".join(t.nombre_completo for t in tripulantes)
+            clubes = " / ".join(t.club for t in tripulantes if t.club)
+            return FilaResultado(insc_id, numero, nombres, clubes, lugar, tiempo, estado)
+        return _consultar_registros(conn, sql, (evento_id, categoria_id), fabrica)
+
+def obtener_inscripciones_con_tripulacion(evento_id, categoria_id):
+    """Inscripciones de una categoría (FilaInscripcion) con la tripulación completa, sin logos ni vueltas."""
+    with conectar_db() as conn:
+        esquema = _esquema_evento(conn, evento_id)
+        sql = _SQL_INSCRIPCIONES_CATEGORIA.format(columnas="i.id, i.numero_competidor, i.lugar_final, i.tiempo_final, i.estado", esquema=esquema)
+        tripulaciones = _obtener_tripulantes_inscripcion(conn, evento_id, categoria_id, esquema)
+        fabrica = lambda cursor, fila: FilaInscripcion(*fila, tripulaciones.get(fila[0], ()))
+        return _consultar_registros(conn, sql, (evento_id, categoria_id), fabrica)
+
+def obtener_tiempos_vuelta_inscripcion(inscripcion_id):
+    """{vuelta: tiempo_ms} guardados para una inscripción."""
+    with conectar_db() as conn:
+        return dict(conn.execute("SELECT vuelta, tiempo_ms FROM tiempos_vuelta WHERE inscripcion_id = ? ORDER BY vuelta", (inscripcion_id,)).fetchall())
+
+def _guardar_tiempos_vuelta(cursor, inscripcion_id, tiempos_vuelta):
+    """Reemplaza los tiempos de vuelta de una inscripción por {vuelta: tiempo_ms}."""
+    cursor.execute("DELETE FROM tiempos_vuelta WHERE inscripcion_id = ?", (inscripcion_id,))
+    cursor.executemany("""
+        INSERT INTO tiempos_vuelta (inscripcion_id, vuelta, tiempo_ms, evento_id, categoria_id)
+        SELECT id, ?, ?, evento_id, categoria_id FROM inscripciones WHERE id = ?
+    """, [(vuelta, tiempo_ms, inscripcion_id) for vuelta, tiempo_ms in sorted(tiempos_vuelta.items())])
 
 def eliminar_inscripcion(inscripcion_id):
     with conectar_db() as conn:
         cursor = conn.cursor()
+        error = _error_evento_archivado(cursor, inscripcion_id=inscripcion_id)
+        if error: return False, error
         cursor.execute("DELETE FROM inscripciones WHERE id=?", (inscripcion_id,))
         conn.commit()
         return True, "Inscripción eliminada."
 
-def actualizar_resultado_inscripcion(inscripcion_id, tiempo_final, estado, tiempos_vueltas_json=None):
+def _aplicar_resultado(cursor, inscripcion_id, tiempo_final, estado, tiempos_vuelta=None):
+    """Escribe tiempo, estado y (si vienen) vueltas de una inscripción sin confirmar. Devuelve (éxito, mensaje)."""
+    tiempo_final_ms = None
+    if tiempo_final and tiempo_final.strip():
+        try:
+            tiempo_final_ms = parsear_tiempo_ms(tiempo_final)
+        except ValueError:
+            return False, f"Error: El tiempo '{tiempo_final}' no es válido. Use el formato HH:MM:SS o HH:MM:SS.ms."
+    error = _error_evento_archivado(cursor, inscripcion_id=inscripcion_id)
+    if error: return False, error
+    cursor.execute("UPDATE inscripciones SET tiempo_final = ?, tiempo_final_ms = ?, estado = ? WHERE id = ?", (formatear_tiempo_ms(tiempo_final_ms), tiempo_final_ms, estado, inscripcion_id))
+    if cursor.rowcount == 0:
+        return False, f"Error: La inscripción {inscripcion_id} no existe."
+    if tiempos_vuelta is not None:
+        _guardar_tiempos_vuelta(cursor, inscripcion_id, tiempos_vuelta)
+    return True, "Resultado actualizado."
+
+def actualizar_resultado_inscripcion(inscripcion_id, tiempo_final, estado, tiempos_vuelta=None):
+    """
+    Guarda tiempo y estado. El tiempo se almacena en milisegundos y el texto mostrado se deriva de ese valor.
+    Si se pasa tiempos_vuelta ({vuelta: tiempo_ms}) reemplaza las vueltas guardadas; con None no se tocan.
+    """
     with conectar_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("UPDATE inscripciones SET tiempo_final = ?, estado = ?, tiempo_vueltas = ? WHERE id = ?", (tiempo_final, estado, tiempos_vueltas_json, inscripcion_id))
+        exito, mensaje = _aplicar_resultado(cursor, inscripcion_id, tiempo_final, estado, tiempos_vuelta)
+        if not exito:
+            conn.rollback()
+            return exito, mensaje
         conn.commit()
-        return True, "Resultado actualizado."
+        return True, mensaje
+
+# Los finalizados con tiempo comparten lugar si empatan (RANK); el resto queda sin lugar.
+# Solo se escriben las filas cuyo lugar cambia y RETURNING informa cuáles fueron.
+_SQL_RECALCULAR_POSICIONES = """
+    UPDATE inscripciones SET lugar_final = nuevos.lugar
+    FROM (
+        SELECT id,
+               CASE WHEN clasifica THEN RANK() OVER (PARTITION BY categoria_id, clasifica ORDER BY tiempo_final_ms) END AS lugar
+        FROM (
+            SELECT id, categoria_id, tiempo_final_ms,
+                   (estado = 'Finalizado' AND tiempo_final_ms IS NOT NULL) AS clasifica
+            FROM inscripciones
+            WHERE evento_id = ? {filtro_categoria}
+        )
+    ) AS nuevos
+    WHERE inscripciones.id = nuevos.id AND inscripciones.lugar_final IS NOT nuevos.lugar
+    RETURNING inscripciones.id, inscripciones.lugar_final
+"""
 
 def recalcular_posiciones_categoria(evento_id, categoria_id):
+    """Recalcula los lugares de una categoría. Devuelve [(inscripcion_id, nuevo_lugar)] de las filas que cambiaron."""
     with conectar_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT id FROM inscripciones WHERE evento_id = ? AND categoria_id = ? AND estado = 'Finalizado' AND tiempo_final IS NOT NULL AND tiempo_final != '' ORDER BY tiempo_final ASC", (evento_id, categoria_id))
-        finalizados = cursor.fetchall()
-        for i, (insc_id,) in enumerate(finalizados):
-            cursor.execute("UPDATE inscripciones SET lugar_final = ? WHERE id = ?", (i + 1, insc_id))
-        cursor.execute("UPDATE inscripciones SET lugar_final = NULL WHERE evento_id = ? AND categoria_id = ? AND estado != 'Finalizado'", (evento_id, categoria_id))
+        cursor.execute(_SQL_RECALCULAR_POSICIONES.format(filtro_categoria="AND categoria_id = ?"), (evento_id, categoria_id))
+        cambios = cursor.fetchall()
         conn.commit()
-        return True, "Posiciones recalculadas."
+        return cambios
 
-def obtener_estado_categoria(evento_id, categoria_id):
+def aplicar_resultados_lote(cambios):
+    """
+    Aplica en una sola transacción una lista de resultados {inscripcion_id, tiempo_final, estado,
+    tiempos_vuelta (opcional)} y recalcula los lugares una vez por categoría afectada.
+    Devuelve (resultados, posiciones): [(inscripcion_id, éxito, mensaje)] en el orden recibido y
+    {(evento_id, categoria_id): [(inscripcion_id, nuevo_lugar)]} con los lugares que cambiaron.
+    """
+    resultados, categorias = [], set()
     with conectar_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT es_valida FROM evento_categorias_estado WHERE evento_id = ? AND categoria_id = ?", (evento_id, categoria_id))
-        res = cursor.fetchone()
-        if res is None:
-            cursor.execute("INSERT INTO evento_categorias_estado (evento_id, categoria_id, es_valida) VALUES (?, ?, 1)", (evento_id, categoria_id))
+        try:
+            for cambio in cambios:
+                inscripcion_id = cambio['inscripcion_id']
+                exito, mensaje = _aplicar_resultado(cursor, inscripcion_id, cambio.get('tiempo_final'), cambio['estado'], cambio.get('tiempos_vuelta'))
+                resultados.append((inscripcion_id, exito, mensaje))
+                if exito:
+                    categorias.add(cursor.execute("SELECT evento_id, categoria_id FROM inscripciones WHERE id = ?", (inscripcion_id,)).fetchone())
+            sql_recalculo = _SQL_RECALCULAR_POSICIONES.format(filtro_categoria="AND categoria_id = ?")
+            posiciones = {clave: cursor.execute(sql_recalculo, clave).fetchall() for clave in sorted(categorias)}
             conn.commit()
-            return 1
-        return res[0]
+        except sqlite3.Error as e:
+            conn.rollback()
+            print(f"Error al aplicar el lote de resultados: {e}")
+            return [(cambio['inscripcion_id'], False, f"Error de base de datos: {e}") for cambio in cambios], {}
+    return resultados, posiciones
+
+def recalcular_posiciones_evento(evento_id):
+    """Recalcula los lugares de todas las categorías del evento en una sola transacción (p. ej. tras importar tiempos)."""
+    with conectar_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(_SQL_RECALCULAR_POSICIONES.format(filtro_categoria=""), (evento_id,))
+        cambios = cursor.fetchall()
+        conn.commit()
+        print(f"[INFO] Posiciones recalculadas para el evento {evento_id}: {len(cambios)} inscripciones cambiaron de lugar.")
+        return cambios
+
+# --- TIEMPOS POR VUELTA ---
+# Parcial acumulado de cada embarcación al cierre de cada vuelta y su posición en esa vuelta.
+# Solo cuentan las embarcaciones con todas las vueltas anteriores registradas; DNS y DSQ quedan fuera.
+_SQL_PARCIALES_VUELTA = """
+    WITH parciales AS (
+        SELECT tv.inscripcion_id, tv.vuelta, tv.tiempo_ms,
+               SUM(tv.tiempo_ms) OVER por_inscripcion AS acumulado_ms,
+               COUNT(*) OVER por_inscripcion AS vueltas_registradas
+        FROM {esquema}.tiempos_vuelta tv
+        WHERE tv.evento_id = :evento_id AND tv.categoria_id = :categoria_id
+          AND (:vuelta IS NULL OR tv.vuelta <= :vuelta)
+        WINDOW por_inscripcion AS (PARTITION BY tv.inscripcion_id ORDER BY tv.vuelta ROWS UNBOUNDED PRECEDING)
+    )
+    SELECT p.inscripcion_id, i.numero_competidor, p.vuelta, p.tiempo_ms, p.acumulado_ms,
+           RANK() OVER (PARTITION BY p.vuelta ORDER BY p.acumulado_ms) AS posicion
+    FROM parciales p
+    JOIN {esquema}.inscripciones i ON i.id = p.inscripcion_id
+    WHERE p.vueltas_registradas = p.vuelta
+      AND i.estado NOT IN ('DNS', 'DSQ')
+      AND (:vuelta IS NULL OR p.vuelta = :vuelta)
+    ORDER BY p.vuelta, posicion, i.numero_competidor
+"""
+
+ParcialVuelta = namedtuple('ParcialVuelta', 'inscripcion_id numero vuelta tiempo_ms acumulado_ms posicion')
+VueltaRapida = namedtuple('VueltaRapida', 'categoria_id inscripcion_id numero vuelta tiempo_ms')
+
+def obtener_parciales_categoria(evento_id, categoria_id):
+    """Todos los parciales (ParcialVuelta) de una categoría, ordenados por vuelta y posición."""
+    with conectar_db() as conn:
+        sql = _SQL_PARCIALES_VUELTA.format(esquema=_esquema_evento(conn, evento_id))
+        return _consultar_registros(conn, sql, {'evento_id': evento_id, 'categoria_id': categoria_id, 'vuelta': None},
+                                    lambda cursor, fila: ParcialVuelta._make(fila))
+
+def obtener_clasificacion_vuelta(evento_id, categoria_id, vuelta):
+    """Clasificación provisoria al cierre de 'vuelta': [ParcialVuelta] ordenado por tiempo acumulado."""
+    with conectar_db() as conn:
+        sql = _SQL_PARCIALES_VUELTA.format(esquema=_esquema_evento(conn, evento_id))
+        return _consultar_registros(conn, sql, {'evento_id': evento_id, 'categoria_id': categoria_id, 'vuelta': vuelta},
+                                    lambda cursor, fila: ParcialVuelta._make(fila))
+
+def obtener_vueltas_rapidas(evento_id, categoria_id=None):
+    """Vuelta más rápida (VueltaRapida) de cada categoría del evento, o solo de 'categoria_id'."""
+    sql = """
+        SELECT categoria_id, inscripcion_id, numero_competidor, vuelta, tiempo_ms FROM (
+            SELECT tv.categoria_id, tv.inscripcion_id, i.numero_competidor, tv.vuelta, tv.tiempo_ms,
+                   ROW_NUMBER() OVER (PARTITION BY tv.categoria_id ORDER BY tv.tiempo_ms, tv.vuelta, i.numero_competidor) AS orden
+            FROM {esquema}.tiempos_vuelta tv
+            JOIN {esquema}.inscripciones i ON i.id = tv.inscripcion_id
+            WHERE tv.evento_id = :evento_id AND (:categoria_id IS NULL OR tv.categoria_id = :categoria_id)
+              AND i.estado NOT IN ('DNS', 'DSQ')
+        ) WHERE orden = 1
+        ORDER BY categoria_id
+    """
+    with conectar_db() as conn:
+        return _consultar_registros(conn, sql.format(esquema=_esquema_evento(conn, evento_id)), {'evento_id': evento_id, 'categoria_id': categoria_id},
+                                    lambda cursor, fila: VueltaRapida._make(fila))
+
+@_lectura_cacheada
+def obtener_estados_categorias(evento_id):
+    """{categoria_id: es_valida} de todas las categorías para el evento; las que no tienen fila cuentan como válidas."""
+    with conectar_db() as conn:
+        esquema = _esquema_evento(conn, evento_id)
+        return dict(conn.execute(f"""
+            SELECT c.id, COALESCE(ece.es_valida, 1) FROM categorias c
+            LEFT JOIN {esquema}.evento_categorias_estado ece ON ece.categoria_id = c.id AND ece.evento_id = ?
+        """, (evento_id,)).fetchall())
+
+def obtener_estado_categoria(evento_id, categoria_id):
+    return obtener_estados_categorias(evento_id).get(categoria_id, 1)
 
 def actualizar_estado_categoria(evento_id, categoria_id, es_valida):
     with conectar_db() as conn:
         cursor = conn.cursor()
+        error = _error_evento_archivado(cursor, evento_id)
+        if error: return False, error
         cursor.execute("INSERT OR REPLACE INTO evento_categorias_estado (evento_id, categoria_id, es_valida) VALUES (?, ?, ?)", (evento_id, categoria_id, int(es_valida)))
         conn.commit()
+        return True, "Estado de la categoría actualizado."
 
-def calcular_puntuacion_clubes(evento_id, sistema_puntuacion):
-    sql = """
-        SELECT c.nombre_club, c.logo_path, i.lugar_final 
-        FROM inscripciones i 
-        JOIN participantes p1 ON i.participante1_id = p1.id 
-        JOIN clubes c ON p1.club_id = c.id 
-        JOIN evento_categorias_estado ece ON i.evento_id = ece.evento_id AND i.categoria_id = ece.categoria_id
-        WHERE i.evento_id = ? 
-          AND i.estado = 'Finalizado' 
-          AND i.lugar_final IS NOT NULL
-          AND ece.es_valida = 1
-    """
-    puntuacion_por_club = {}
-    with conectar_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute(sql, (evento_id,))
-        resultados = cursor.fetchall()
-        for nombre_club, logo_path, lugar in resultados:
-            puntos = sistema_puntuacion.get(lugar, 0)
-            if nombre_club not in puntuacion_por_club: 
-                puntuacion_por_club[nombre_club] = {'puntos': 0, 'logo_path': logo_path}
-            puntuacion_por_club[nombre_club]['puntos'] += puntos
-        
-        lista_ordenada = sorted(puntuacion_por_club.items(), key=lambda item: item[1]['puntos'], reverse=True)
-        return [(nombre, data['logo_path'], data['puntos']) for nombre, data in lista_ordenada]
+def guardar_sistema_puntuacion(evento_id, sistema_puntuacion):
+    """Reemplaza la tabla de puntos del evento. Solo se guardan los lugares que otorgan puntos."""
+    filas = [(evento_id, int(lugar), int(puntos)) for lugar, puntos in sistema_puntuacion.items() if puntos and int(puntos) > 0]
+    if not filas:
+        return False, "Error: Define al menos un puntaje."
+    with conectar_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM sistemas_puntuacion WHERE evento_id = ?", (evento_id,))
+        cursor.executemany("INSERT INTO sistemas_puntuacion (evento_id, lugar, puntos) VALUES (?, ?, ?)", filas)
+        _reconstruir_clasificaciones(cursor, evento_id)
+        conn.commit()
+        return True, "Sistema de puntuación guardado."
+
+@_lectura_cacheada
+def obtener_sistema_puntuacion_activo(evento_id):
+    """Devuelve {lugar: puntos} del evento, o la puntuación por defecto si el evento no tiene una guardada."""
+    with conectar_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT lugar, puntos FROM sistemas_puntuacion WHERE evento_id = ? ORDER BY lugar", (evento_id,))
+        return dict(cursor.fetchall()) or dict(PUNTUACION_POR_DEFECTO)
+
+def obtener_version_datos_evento(evento_id):
+    with conectar_db() as conn:
+        fila = conn.execute("SELECT version_datos FROM eventos WHERE id = ?", (evento_id,)).fetchone()
+        return fila[0] if fila else None
+
+def reconstruir_clasificaciones(evento_id=None):
+    """Recalcula desde cero las clasificaciones materializadas de un evento (o de todos)."""
+    with conectar_db() as conn:
+        cursor = conn.cursor()
+        _reconstruir_clasificaciones(cursor, evento_id)
+        conn.commit()
+        return True, "Clasificaciones reconstruidas."
+
+def _sistema_difiere_del_guardado(cursor, evento_id, sistema_puntuacion):
+    if sistema_puntuacion is None: return False
+    guardado = dict(cursor.execute("SELECT lugar, puntos FROM sistemas_puntuacion WHERE evento_id = ?", (evento_id,)).fetchall())
+    return {int(lugar): puntos for lugar, puntos in sistema_puntuacion.items() if puntos} != guardado
+
+# Solo para simular un sistema de puntuación distinto del guardado; lo habitual es leer clasificacion_clubes.
+_SQL_TOTALES_CLUBES_SISTEMA = """
+    WITH puntos(lugar, puntos) AS (SELECT CAST(key AS INTEGER), value FROM json_each(:sistema))
+    SELECT c.nombre_club, c.logo_path, COALESCE(SUM(pt.puntos), 0) AS total
+    FROM inscripciones i
+    JOIN participantes p1 ON i.participante1_id = p1.id
+    JOIN clubes c ON p1.club_id = c.id
+    LEFT JOIN evento_categorias_estado ece ON i.evento_id = ece.evento_id AND i.categoria_id = ece.categoria_id
+    LEFT JOIN puntos pt ON pt.lugar = i.lugar_final
+    WHERE i.evento_id = :evento_id
+      AND i.estado = 'Finalizado'
+      AND i.lugar_final IS NOT NULL
+      AND COALESCE(ece.es_valida, 1) = 1
+    GROUP BY c.id
+    ORDER BY total DESC, SUM(i.lugar_final = 1) DESC, SUM(i.lugar_final = 2) DESC, c.nombre_club
+"""
+
+_SQL_CLASIFICACION_CLUBES = """
+    SELECT c.nombre_club, c.logo_path, cc.puntos FROM clasificacion_clubes cc JOIN clubes c ON c.id = cc.club_id
+    WHERE cc.evento_id = ? ORDER BY cc.puntos DESC, cc.oro DESC, cc.plata DESC, c.nombre_club
+"""
+
+_SQL_MEDALLERO_CLUBES = """
+    SELECT c.nombre_club, c.logo_path, cc.oro, cc.plata, cc.bronce FROM clasificacion_clubes cc JOIN clubes c ON c.id = cc.club_id
+    WHERE cc.evento_id = ? AND (cc.oro + cc.plata + cc.bronce) > 0
+    ORDER BY cc.oro DESC, cc.plata DESC, cc.bronce DESC, c.nombre_club
+"""
+
+def calcular_puntuacion_clubes(evento_id, sistema_puntuacion=None):
+    """[(club, logo_path, puntos)] ordenado por puntos; los empates se resuelven por oros y luego platas."""
+    with conectar_db() as conn:
+        cursor = conn.cursor()
+        if _sistema_difiere_del_guardado(cursor, evento_id, sistema_puntuacion):
+            cursor.execute(_SQL_TOTALES_CLUBES_SISTEMA, {'evento_id': evento_id, 'sistema': json.dumps(sistema_puntuacion)})
+        else:
+            cursor.execute(_SQL_CLASIFICACION_CLUBES, (evento_id,))
+        return cursor.fetchall()
 
 def calcular_ranking_medallas(evento_id):
-    sql = """
-        SELECT c.nombre_club, c.logo_path, i.lugar_final 
-        FROM inscripciones i 
-        JOIN participantes p1 ON i.participante1_id = p1.id 
-        JOIN clubes c ON p1.club_id = c.id 
-        JOIN evento_categorias_estado ece ON i.evento_id = ece.evento_id AND i.categoria_id = ece.categoria_id
-        WHERE i.evento_id = ? 
-          AND i.estado = 'Finalizado' 
-          AND i.lugar_final IN (1, 2, 3)
-          AND ece.es_valida = 1
-    """
-    medallas_por_club = {}
-    with conectar_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute(sql, (evento_id,))
-        resultados = cursor.fetchall()
-        for nombre_club, logo_path, lugar in resultados:
-            if nombre_club not in medallas_por_club: 
-                medallas_por_club[nombre_club] = {'oro': 0, 'plata': 0, 'bronce': 0, 'logo_path': logo_path}
-            if lugar == 1: medallas_por_club[nombre_club]['oro'] += 1
-            elif lugar == 2: medallas_por_club[nombre_club]['plata'] += 1
-            elif lugar == 3: medallas_por_club[nombre_club]['bronce'] += 1
-        
-        lista_medallero = [(nombre, data['logo_path'], data['oro'], data['plata'], data['bronce']) for nombre, data in medallas_por_club.items()]
-        lista_medallero.sort(key=lambda item: (item[2], item[3], item[4]), reverse=True)
-        return lista_medallero
+    """[(club, logo_path, oro, plata, bronce)] de los clubes con al menos una medalla."""
+    with conectar_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(_SQL_MEDALLERO_CLUBES, (evento_id,))
+        return cursor.fetchall()
 
 def obtener_inscripciones_para_exportar(evento_id):
-    sql = "SELECT cat.codigo_categoria, i.numero_competidor, p1.nombre || ' ' || p1.apellido, p1.rut_o_id, p1.fecha_nacimiento, p1.genero, c1.nombre_club, p2.nombre || ' ' || p2.apellido, p2.rut_o_id, p2.fecha_nacimiento, p2.genero, c2.nombre_club, p3.nombre || ' ' || p3.apellido, p3.rut_o_id, p3.fecha_nacimiento, p3.genero, c3.nombre_club, p4.nombre || ' ' || p4.apellido, p4.rut_o_id, p4.fecha_nacimiento, p4.genero, c4.nombre_club FROM inscripciones i JOIN categorias cat ON i.categoria_id = cat.id JOIN participantes p1 ON i.participante1_id = p1.id LEFT JOIN clubes c1 ON p1.club_id = c1.id LEFT JOIN participantes p2 ON i.participante2_id = p2.id LEFT JOIN clubes c2 ON p2.club_id = c2.id LEFT JOIN participantes p3 ON i.participante3_id = p3.id LEFT JOIN clubes c3 ON p3.club_id = c3.id LEFT JOIN participantes p4 ON i.participante4_id = p4.id LEFT JOIN clubes c4 ON p4.club_id = c4.id WHERE i.evento_id = ? ORDER BY cat.id, i.numero_competidor"
+    """Filas (código categoría, número, [nombre completo, RUT, fecha_nac, género, club] por cada tripulante)."""
+    sql = "SELECT i.id, cat.codigo_categoria, i.numero_competidor FROM {esquema}.inscripciones i JOIN categorias cat ON i.categoria_id = cat.id WHERE i.evento_id = ? ORDER BY cat.id, i.numero_competidor"
     with conectar_db() as conn:
+        esquema = _esquema_evento(conn, evento_id)
         cursor = conn.cursor()
-        cursor.execute(sql, (evento_id,))
-        return cursor.fetchall()
+        inscripciones = cursor.execute(sql.format(esquema=esquema), (evento_id,)).fetchall()
+        tripulaciones = _obtener_tripulaciones(cursor, f"SELECT id FROM {esquema}.inscripciones WHERE evento_id = ?", (evento_id,), esquema)
+    filas = []
+    for insc_id, codigo, numero in inscripciones:
+        fila = [codigo, numero]
+        for _, nombre, apellido, rut, fecha_nac, genero, club, _ in tripulaciones.get(insc_id, []):
+            fila += [f"{nombre} {apellido}", rut, fecha_nac, genero, club]
+        filas.append(tuple(fila))
+    return filas
 
 def agregar_sponsor(nombre, logo_path, evento_id):
     with conectar_db() as conn:
         cursor = conn.cursor()
+        error = _error_evento_archivado(cursor, evento_id)
+        if error: return None, error
         cursor.execute("INSERT INTO sponsors (nombre_sponsor, logo_path, evento_id) VALUES (?, ?, ?)", (nombre, logo_path, evento_id))
         conn.commit()
         return cursor.lastrowid, "Patrocinador agregado."
 
+@_lectura_cacheada
 def obtener_sponsors_por_evento(evento_id):
     with conectar_db() as conn:
+        esquema = _esquema_evento(conn, evento_id)
         cursor = conn.cursor()
-        cursor.execute("SELECT id, nombre_sponsor, logo_path FROM sponsors WHERE evento_id = ? ORDER BY nombre_sponsor", (evento_id,))
+        cursor.execute(f"SELECT id, nombre_sponsor, logo_path FROM {esquema}.sponsors WHERE evento_id = ? ORDER BY nombre_sponsor", (evento_id,))
         return cursor.fetchall()
 
 def eliminar_sponsor(sponsor_id):
@@ -365,12 +1401,151 @@ def eliminar_sponsor(sponsor_id):
         conn.commit()
         return True, "Patrocinador eliminado."
 
-def obtener_siguiente_numero_competidor(evento_id, categoria_id):
+# --- NÚMEROS DE COMPETIDOR ---
+# Los números son únicos por evento y categoría. Un evento puede reservar rangos contiguos para una categoría
+# o para un club (en una categoría o en todas). Al asignar se usa primero el rango del club, luego el de la
+# categoría y por último los números sin reservar, siempre desde abajo, así que los huecos que dejan las
+# inscripciones eliminadas se vuelven a ocupar. Las escrituras abren la transacción con BEGIN IMMEDIATE:
+# dos estaciones que inscriben a la vez se turnan en lugar de leer el mismo número libre.
+NUMERO_MAXIMO_COMPETIDOR = 9999
+
+def _iniciar_escritura(conn):
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+
+class _AsignadorNumeros:
+    """Números libres de un evento dentro de una transacción: carga números usados y reservas una sola vez."""
+
+    def __init__(self, cursor, evento_id):
+        # Los números de un evento archivado están en su archivo: quien escribe debe rechazarlo (ver self.archivo)
+        fila = cursor.execute("SELECT archivo FROM eventos WHERE id = ?", (evento_id,)).fetchone()
+        self.archivo = fila[0] if fila else None
+        self.usados = {}
+        for categoria_id, numero in cursor.execute("SELECT categoria_id, numero_competidor FROM inscripciones WHERE evento_id = ? AND numero_competidor IS NOT NULL", (evento_id,)):
+            self.usados.setdefault(categoria_id, set()).add(numero)
+        self.reservas = cursor.execute("SELECT categoria_id, club_id, desde, hasta FROM reservas_numeros WHERE evento_id = ? ORDER BY desde", (evento_id,)).fetchall()
+        self.hay_reservas_club = any(club_id is not None for _, club_id, _, _ in self.reservas)
+        self._reanudar = {}
+
+    def _rangos(self, categoria_id, club_id):
+        """(rangos propios en orden de preferencia, rangos reservados para otros)."""
+        del_club, de_categoria, ajenos = [], [], []
+        for reserva_categoria, reserva_club, desde, hasta in self.reservas:
+            if reserva_categoria not in (None, categoria_id):
+                continue   # los números se repiten entre categorías: las reservas de otra categoría no estorban
+            if reserva_club is not None and reserva_club == club_id and reserva_categoria in (None, categoria_id):
+                del_club.append((desde, hasta))
+            elif reserva_club is None and reserva_categoria == categoria_id:
+                de_categoria.append((desde, hasta))
+            else:
+                ajenos.append((desde, hasta))
+        # Un rango de club anidado en el de la categoría no es ajeno para ese club
+        ajenos = [r for r in ajenos if r not in del_club]
+        return del_club + de_categoria + [(1, NUMERO_MAXIMO_COMPETIDOR)], ajenos
+
+    def ocupar(self, categoria_id, numero):
+        """Marca un número pedido explícitamente. False si ya estaba en uso."""
+        usados = self.usados.setdefault(categoria_id, set())
+        if numero in usados: return False
+        usados.add(numero)
+        return True
+
+    def siguiente(self, categoria_id, club_id=None, ocupar=True):
+        """Primer número libre para la categoría (y el club); None si no queda ninguno."""
+        usados = self.usados.setdefault(categoria_id, set())
+        rangos, ajenos = self._rangos(categoria_id, club_id)
+        # Dentro de una transacción los números solo se ocupan: se retoma donde terminó la búsqueda anterior
+        indice, numero = self._reanudar.get((categoria_id, club_id), (0, None))
+        while indice < len(rangos):
+            desde, hasta = rangos[indice]
+            numero = desde if numero is None else numero
+            while numero <= hasta:
+                ajeno = next((h for d, h in ajenos if d <= numero <= h), None)
+                if ajeno is not None:
+                    numero = ajeno + 1
+                elif numero in usados:
+                    numero += 1
+                else:
+                    if ocupar:
+                        usados.add(numero)
+                        self._reanudar[(categoria_id, club_id)] = (indice, numero + 1)
+                    return numero
+            indice, numero = indice + 1, None
+        return None
+
+def obtener_siguiente_numero_competidor(evento_id, categoria_id, club_id=None):
+    """Primer número libre de la categoría, respetando reservas y reutilizando huecos (no lo reserva)."""
     with conectar_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT MAX(numero_competidor) FROM inscripciones WHERE evento_id = ? AND categoria_id = ?", (evento_id, categoria_id))
-        res = cursor.fetchone()
-        return (res[0] or 0) + 1
+        asignador = _AsignadorNumeros(conn.cursor(), evento_id)
+        return None if asignador.archivo else asignador.siguiente(categoria_id, club_id, ocupar=False)
+
+def obtener_reservas_numeros(evento_id):
+    """[(id, categoria, club, desde, hasta, usados)] de las reservas del evento, ordenadas por número."""
+    with conectar_db() as conn:
+        return conn.execute("""
+            SELECT r.id, cat.nombre_categoria, c.nombre_club, r.desde, r.hasta,
+                   (SELECT COUNT(*) FROM inscripciones i WHERE i.evento_id = r.evento_id
+                      AND (r.categoria_id IS NULL OR i.categoria_id = r.categoria_id)
+                      AND i.numero_competidor BETWEEN r.desde AND r.hasta)
+            FROM reservas_numeros r
+            LEFT JOIN categorias cat ON cat.id = r.categoria_id
+            LEFT JOIN clubes c ON c.id = r.club_id
+            WHERE r.evento_id = ? ORDER BY r.desde
+        """, (evento_id,)).fetchall()
+
+def reservar_rango_numeros(evento_id, cantidad, categoria_id=None, club_id=None, desde=None):
+    """
+    Reserva 'cantidad' números contiguos para una categoría o un club. Sin 'desde' se elige el primer bloque
+    sin números usados ni reservados. Un rango de club puede quedar dentro del de una categoría, pero no se
+    superpone con el de otro club; los rangos de categoría tampoco se superponen entre sí.
+    Devuelve ((desde, hasta), mensaje) o (None, mensaje).
+    """
+    if categoria_id is None and club_id is None:
+        return None, "Error: Indica la categoría o el club de la reserva."
+    if cantidad < 1:
+        return None, "Error: La cantidad de números debe ser positiva."
+    with conectar_db() as conn:
+        try:
+            _iniciar_escritura(conn)
+            cursor = conn.cursor()
+            asignador = _AsignadorNumeros(cursor, evento_id)
+            if asignador.archivo:
+                conn.rollback()
+                return None, _ERROR_EVENTO_ARCHIVADO.format(asignador.archivo)
+            # Solo cuentan las reservas que comparten categoría; del mismo tipo (club o categoría) no pueden superponerse
+            reservas = [(c, cl, d, h) for c, cl, d, h in asignador.reservas if None in (c, categoria_id) or c == categoria_id]
+            mismo_tipo = [(d, h) for c, cl, d, h in reservas if (cl is None) == (club_id is None)]
+            usados = set().union(*asignador.usados.values()) if categoria_id is None else asignador.usados.get(categoria_id, set())
+            if desde is None:
+                desde = 1
+                while desde + cantidad - 1 <= NUMERO_MAXIMO_COMPETIDOR:
+                    bloque = range(desde, desde + cantidad)
+                    choque = max([h for c, cl, d, h in reservas if d <= bloque[-1] and h >= desde] +
+                                 [n for n in usados if desde <= n <= bloque[-1]], default=None)
+                    if choque is None: break
+                    desde = choque + 1
+            hasta = desde + cantidad - 1
+            if hasta > NUMERO_MAXIMO_COMPETIDOR:
+                conn.rollback()
+                return None, f"Error: No hay {cantidad} números contiguos libres."
+            if any(d <= hasta and h >= desde for d, h in mismo_tipo):
+                conn.rollback()
+                return None, f"Error: El rango {desde}-{hasta} se superpone con otra reserva."
+            cursor.execute("INSERT INTO reservas_numeros (evento_id, categoria_id, club_id, desde, hasta) VALUES (?, ?, ?, ?, ?)",
+                           (evento_id, categoria_id, club_id, desde, hasta))
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            return None, f"Error al reservar números: {e}"
+    ocupados = sum(1 for n in usados if desde <= n <= hasta)
+    aviso = f" ({ocupados} ya estaban asignados)" if ocupados else ""
+    return (desde, hasta), f"Números {desde} a {hasta} reservados{aviso}."
+
+def eliminar_reserva_numeros(reserva_id):
+    with conectar_db() as conn:
+        conn.execute("DELETE FROM reservas_numeros WHERE id = ?", (reserva_id,))
+        conn.commit()
+        return True, "Reserva eliminada."
 
 def verificar_numero_competidor(evento_id, categoria_id, numero_competidor, excluir_inscripcion_id=None):
     with conectar_db() as conn:
@@ -384,68 +1559,76 @@ def verificar_numero_competidor(evento_id, categoria_id, numero_competidor, excl
 def actualizar_numero_competidor(inscripcion_id, nuevo_numero):
     with conectar_db() as conn:
         cursor = conn.cursor()
+        if _error_evento_archivado(cursor, inscripcion_id=inscripcion_id): return False
         cursor.execute("UPDATE inscripciones SET numero_competidor=? WHERE id=?", (nuevo_numero, inscripcion_id))
         conn.commit()
         return True
 
+def _terminos_busqueda(texto):
+    """Separa el texto en términos; los RUT se normalizan sin separadores ni guion, igual que en el índice."""
+    terminos = []
+    for palabra in texto.split():
+        if re.fullmatch(r"[\d.,\-]+[kK]?", palabra):
+            palabra = re.sub(r"[.,\-]", "", palabra)
+            if palabra: terminos.append(palabra)
+        else:
+            terminos.extend(t for t in re.split(r"[\W_]+", palabra) if t)
+    return terminos
+
+def _hay_indice_fts(cursor):
+    return cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'participantes_fts'").fetchone() is not None
+
+def buscar_participantes(texto_busqueda, limite=200):
+    """Busca deportistas por prefijo de nombre, apellido, RUT o club (sin distinguir tildes).
+    Devuelve filas como obtener_participantes_con_club; sin texto, los primeros `limite` por apellido."""
+    terminos = _terminos_busqueda(texto_busqueda or "")
+    columnas = "p.id, p.nombre, p.apellido, p.rut_o_id, p.fecha_nacimiento, p.genero, c.nombre_club"
+    with conectar_db() as conn:
+        cursor = conn.cursor()
+        if not terminos:
+            cursor.execute(f"SELECT {columnas} FROM participantes p LEFT JOIN clubes c ON p.club_id = c.id ORDER BY p.apellido, p.nombre LIMIT ?", (limite,))
+        elif _hay_indice_fts(cursor):
+            consulta = " ".join('"' + termino.replace('"', '""') + '"*' for termino in terminos)
+            cursor.execute(f"""
+                SELECT {columnas} FROM participantes_fts f
+                JOIN participantes p ON p.id = f.rowid
+                LEFT JOIN clubes c ON p.club_id = c.id
+                WHERE participantes_fts MATCH ?
+                ORDER BY p.apellido, p.nombre LIMIT ?
+            """, (consulta, limite))
+        else:
+            condicion = "(p.nombre LIKE ? OR p.apellido LIKE ? OR replace(replace(replace(p.rut_o_id, '.', ''), ',', ''), '-', '') LIKE ? OR c.nombre_club LIKE ?)"
+            params = [f"%{termino}%" for termino in terminos for _ in range(4)]
+            cursor.execute(f"SELECT {columnas} FROM participantes p LEFT JOIN clubes c ON p.club_id = c.id WHERE {' AND '.join([condicion] * len(terminos))} ORDER BY p.apellido, p.nombre LIMIT ?", params + [limite])
+        return cursor.fetchall()
+
 def buscar_deportistas_por_nombre(texto_busqueda):
-    sql = """
-        SELECT p.id, p.nombre || ' ' || p.apellido, c.nombre_club
-        FROM participantes p
-        LEFT JOIN clubes c ON p.club_id = c.id
-        WHERE p.nombre LIKE ? OR p.apellido LIKE ?
-        ORDER BY p.apellido, p.nombre
-        LIMIT 50
-    """
-    param = f"%{texto_busqueda}%"
     try:
-        with conectar_db() as conn:
-            cursor = conn.cursor()
-            cursor.execute(sql, (param, param))
-            return cursor.fetchall()
+        return [(p_id, f"{nombre} {apellido}", club) for p_id, nombre, apellido, _, _, _, club in buscar_participantes(texto_busqueda, limite=50)]
     except sqlite3.Error as e:
         print(f"Error al buscar deportistas: {e}")
         return []
 
 def obtener_inscripciones_de_deportista(evento_id, participante_id):
-    sql = """
-        SELECT 
-            i.id,
-            cat.nombre_categoria,
-            i.numero_competidor,
-            p1.id, p1.nombre || ' ' || p1.apellido,
-            p2.id, p2.nombre || ' ' || p2.apellido,
-            p3.id, p3.nombre || ' ' || p3.apellido,
-            p4.id, p4.nombre || ' ' || p4.apellido
-        FROM inscripciones i
-        JOIN categorias cat ON i.categoria_id = cat.id
-        LEFT JOIN participantes p1 ON i.participante1_id = p1.id
-        LEFT JOIN participantes p2 ON i.participante2_id = p2.id
-        LEFT JOIN participantes p3 ON i.participante3_id = p3.id
-        LEFT JOIN participantes p4 ON i.participante4_id = p4.id
-        WHERE i.evento_id = ? AND (
-            i.participante1_id = ? OR
-            i.participante2_id = ? OR
-            i.participante3_id = ? OR
-            i.participante4_id = ?
-        )
-    """
-    params = (evento_id, participante_id, participante_id, participante_id, participante_id)
     inscripciones_formateadas = []
     try:
         with conectar_db() as conn:
+            esquema = _esquema_evento(conn, evento_id)
+            sql = f"""
+                SELECT i.id, cat.nombre_categoria, i.numero_competidor
+                FROM {esquema}.inscripcion_tripulantes t
+                JOIN {esquema}.inscripciones i ON t.inscripcion_id = i.id
+                JOIN categorias cat ON i.categoria_id = cat.id
+                WHERE t.participante_id = ? AND i.evento_id = ?
+                ORDER BY i.id
+            """
+            filtro = f"SELECT t.inscripcion_id FROM {esquema}.inscripcion_tripulantes t JOIN {esquema}.inscripciones i ON t.inscripcion_id = i.id WHERE t.participante_id = ? AND i.evento_id = ?"
             cursor = conn.cursor()
-            cursor.execute(sql, params)
-            resultados = cursor.fetchall()
+            resultados = cursor.execute(sql, (participante_id, evento_id)).fetchall()
+            tripulaciones = _obtener_tripulaciones(cursor, filtro, (participante_id, evento_id), esquema)
             
-            for row in resultados:
-                insc_id, categoria, num_bote, p1_id, p1_n, p2_id, p2_n, p3_id, p3_n, p4_id, p4_n = row
-                companeros = []
-                if p1_id != participante_id and p1_n: companeros.append(p1_n)
-                if p2_id != participante_id and p2_n: companeros.append(p2_n)
-                if p3_id != participante_id and p3_n: companeros.append(p3_n)
-                if p4_id != participante_id and p4_n: companeros.append(p4_n)
-                
+            for insc_id, categoria, num_bote in resultados:
+                companeros = [f"{nombre} {apellido}" for p_id, nombre, apellido, *_ in tripulaciones.get(insc_id, []) if p_id != participante_id]
                 inscripciones_formateadas.append({'inscripcion_id': insc_id, 'categoria': categoria, 'numero_bote': num_bote, 'companeros': " / ".join(companeros) if companeros else "Bote individual"})
         return inscripciones_formateadas
     except sqlite3.Error as e:
@@ -455,16 +1638,19 @@ def obtener_inscripciones_de_deportista(evento_id, participante_id):
 def guardar_programa_pruebas(evento_id, programa):
     with conectar_db() as conn:
         cursor = conn.cursor()
+        error = _error_evento_archivado(cursor, evento_id)
+        if error: return False, error
         cursor.execute("DELETE FROM programa_pruebas WHERE evento_id = ?", (evento_id,))
         sql = "INSERT INTO programa_pruebas (evento_id, categoria_id, orden, hora_inicio) VALUES (?, ?, ?, ?)"
         cursor.executemany(sql, programa)
+        _sembrar_estados_categorias(cursor, evento_id)
         conn.commit()
     return True, "Programa guardado correctamente."
 
 def obtener_programa_pruebas(evento_id):
     sql = """
         SELECT p.categoria_id, c.nombre_categoria, c.codigo_categoria, p.hora_inicio
-        FROM programa_pruebas p
+        FROM {esquema}.programa_pruebas p
         JOIN categorias c ON p.categoria_id = c.id
         WHERE p.evento_id = ?
         ORDER BY p.orden ASC
@@ -472,52 +1658,405 @@ def obtener_programa_pruebas(evento_id):
     try:
         with conectar_db() as conn:
             cursor = conn.cursor()
-            cursor.execute(sql, (evento_id,))
+            cursor.execute(sql.format(esquema=_esquema_evento(conn, evento_id)), (evento_id,))
             return cursor.fetchall()
     except sqlite3.Error as e:
         print(f"Error al obtener el programa de pruebas: {e}")
         return []
 
-def calcular_puntuacion_deportistas(evento_id, sistema_puntuacion):
-    sql = """
-        SELECT i.lugar_final, i.participante1_id, i.participante2_id, i.participante3_id, i.participante4_id
+_SQL_CLASIFICACION_DEPORTISTAS = """
+    SELECT p.apellido || ', ' || p.nombre, c.nombre_club, c.logo_path, cd.puntos
+    FROM clasificacion_deportistas cd
+    JOIN participantes p ON p.id = cd.participante_id
+    LEFT JOIN clubes c ON p.club_id = c.id
+    WHERE cd.evento_id = ? AND cd.puntos > 0
+    ORDER BY cd.puntos DESC, p.apellido, p.nombre
+"""
+
+_SQL_MEDALLERO_DEPORTISTAS = """
+    SELECT p.apellido || ', ' || p.nombre, c.nombre_club, c.logo_path, cd.oro, cd.plata, cd.bronce
+    FROM clasificacion_deportistas cd
+    JOIN participantes p ON p.id = cd.participante_id
+    LEFT JOIN clubes c ON p.club_id = c.id
+    WHERE cd.evento_id = ? AND (cd.oro + cd.plata + cd.bronce) > 0
+    ORDER BY cd.oro DESC, cd.plata DESC, cd.bronce DESC, p.apellido, p.nombre
+"""
+
+def _filas_puntos_deportistas(filas):
+    return [{'nombre': nombre, 'club': club, 'logo_path': logo, 'puntos': total} for nombre, club, logo, total in filas]
+
+def _filas_medallas_deportistas(filas):
+    return [{'nombre': nombre, 'club': club, 'logo_path': logo, 'oro': oro, 'plata': plata, 'bronce': bronce}
+            for nombre, club, logo, oro, plata, bronce in filas]
+
+def calcular_puntuacion_deportistas(evento_id, sistema_puntuacion=None):
+    """Ranking individual por puntos leído de clasificacion_deportistas (o simulado si se pasa otro sistema)."""
+    sql_sistema = """
+        WITH puntos(lugar, puntos) AS (SELECT CAST(key AS INTEGER), value FROM json_each(?))
+        SELECT p.apellido || ', ' || p.nombre, c.nombre_club, c.logo_path, SUM(pt.puntos) AS total
         FROM inscripciones i
-        JOIN evento_categorias_estado ece ON i.evento_id = ece.evento_id AND i.categoria_id = ece.categoria_id
-        WHERE i.evento_id = ? AND i.estado = 'Finalizado' AND i.lugar_final IS NOT NULL AND ece.es_valida = 1
+        LEFT JOIN evento_categorias_estado ece ON i.evento_id = ece.evento_id AND i.categoria_id = ece.categoria_id
+        JOIN puntos pt ON pt.lugar = i.lugar_final
+        JOIN inscripcion_tripulantes t ON t.inscripcion_id = i.id
+        JOIN participantes p ON p.id = t.participante_id
+        LEFT JOIN clubes c ON p.club_id = c.id
+        WHERE i.evento_id = ? AND i.estado = 'Finalizado' AND COALESCE(ece.es_valida, 1) = 1 AND pt.puntos > 0
+        GROUP BY p.id
+        ORDER BY total DESC, p.apellido, p.nombre
     """
-    puntuacion_por_deportista = {}
     with conectar_db() as conn:
         cursor = conn.cursor()
-        cursor.execute(sql, (evento_id,))
-        for lugar, p1_id, p2_id, p3_id, p4_id in cursor.fetchall():
-            puntos = sistema_puntuacion.get(lugar, 0)
-            if puntos == 0: continue
-            for p_id in filter(None, [p1_id, p2_id, p3_id, p4_id]):
-                if p_id not in puntuacion_por_deportista:
-                    info = cursor.execute("SELECT p.apellido || ', ' || p.nombre, c.nombre_club, c.logo_path FROM participantes p LEFT JOIN clubes c ON p.club_id = c.id WHERE p.id = ?", (p_id,)).fetchone()
-                    if info: puntuacion_por_deportista[p_id] = {'nombre': info[0], 'club': info[1], 'logo_path': info[2], 'puntos': 0}
-                if p_id in puntuacion_por_deportista:
-                    puntuacion_por_deportista[p_id]['puntos'] += puntos
-        return sorted(puntuacion_por_deportista.values(), key=lambda item: item['puntos'], reverse=True)
+        if _sistema_difiere_del_guardado(cursor, evento_id, sistema_puntuacion):
+            cursor.execute(sql_sistema, (json.dumps(sistema_puntuacion), evento_id))
+        else:
+            cursor.execute(_SQL_CLASIFICACION_DEPORTISTAS, (evento_id,))
+        return _filas_puntos_deportistas(cursor.fetchall())
 
 def calcular_ranking_medallas_deportistas(evento_id):
-    sql = """
-        SELECT i.lugar_final, i.participante1_id, i.participante2_id, i.participante3_id, i.participante4_id
-        FROM inscripciones i
-        JOIN evento_categorias_estado ece ON i.evento_id = ece.evento_id AND i.categoria_id = ece.categoria_id
-        WHERE i.evento_id = ? AND i.estado = 'Finalizado' AND i.lugar_final IN (1, 2, 3) AND ece.es_valida = 1
-    """
-    medallas_por_deportista = {}
-    with conectar_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute(sql, (evento_id,))
-        for lugar, p1_id, p2_id, p3_id, p4_id in cursor.fetchall():
-            for p_id in filter(None, [p1_id, p2_id, p3_id, p4_id]):
-                if p_id not in medallas_por_deportista:
-                    info = cursor.execute("SELECT p.apellido || ', ' || p.nombre, c.nombre_club, c.logo_path FROM participantes p LEFT JOIN clubes c ON p.club_id = c.id WHERE p.id = ?", (p_id,)).fetchone()
-                    if info: medallas_por_deportista[p_id] = {'nombre': info[0], 'club': info[1], 'logo_path': info[2], 'oro': 0, 'plata': 0, 'bronce': 0}
-                if p_id in medallas_por_deportista:
-                    if lugar == 1: medallas_por_deportista[p_id]['oro'] += 1
-                    elif lugar == 2: medallas_por_deportista[p_id]['plata'] += 1
-                    elif lugar == 3: medallas_por_deportista[p_id]['bronce'] += 1
-        return sorted(medallas_por_deportista.values(), key=lambda item: (item['oro'], item['plata'], item['bronce']), reverse=True)
\ No newline at end of file
+    """Medallero individual leído de clasificacion_deportistas."""
+    with conectar_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(_SQL_MEDALLERO_DEPORTISTAS, (evento_id,))
+        return _filas_medallas_deportistas(cursor.fetchall())
+
+def obtener_datos_evento_completo(evento_id):
+    """
+    Lee de una vez todo lo que necesitan los reportes de un evento: datos del evento,
+    categorías, inscripciones con sus tripulaciones, programa, patrocinadores, sistema
+    de puntuación y clasificaciones. Todas las consultas corren dentro de una misma
+    transacción de lectura, así que el resultado es coherente aunque otro hilo esté
+    cargando tiempos. Devuelve un dict (ver evento_snapshot.EventoSnapshot) o None si
+    el evento no existe.
+    """
+    with conectar_db() as conn:
+        cursor = conn.cursor()
+        esquema = _esquema_evento(conn, evento_id)  # ATTACH no se permite dentro de la transacción
+        transaccion_propia = not conn.in_transaction
+        if transaccion_propia:
+            cursor.execute("BEGIN")
+        try:
+            evento = cursor.execute("SELECT id, nombre_evento, fecha, lugar, notas, version_datos FROM eventos WHERE id = ?", (evento_id,)).fetchone()
+            if evento is None:
+                return None
+            datos = {'evento': evento[:5], 'version_datos': evento[5]}
+            datos['categorias'] = cursor.execute("SELECT id, nombre_categoria, codigo_categoria, edad_min, edad_max, genero, tipo_embarcacion, distancia_km, numero_vueltas FROM categorias ORDER BY nombre_categoria").fetchall()
+            datos['inscripciones'] = cursor.execute(f"""
+                SELECT i.id, i.categoria_id, i.numero_competidor, i.lugar_final, i.tiempo_final, i.tiempo_final_ms, i.estado
+                FROM {esquema}.inscripciones i
+                WHERE i.evento_id = ?
+                ORDER BY i.categoria_id,
+                    CASE WHEN i.lugar_final IS NULL THEN 1 ELSE 0 END,
+                    i.lugar_final ASC, i.tiempo_final_ms ASC, i.numero_competidor ASC
+            """, (evento_id,)).fetchall()
+            datos['tripulaciones'] = _obtener_tripulaciones(cursor, f"SELECT id FROM {esquema}.inscripciones WHERE evento_id = ?", (evento_id,), esquema)
+            datos['tiempos_vuelta'] = {}
+            for insc_id, vuelta, tiempo_ms in cursor.execute(f"SELECT inscripcion_id, vuelta, tiempo_ms FROM {esquema}.tiempos_vuelta WHERE evento_id = ? ORDER BY inscripcion_id, vuelta", (evento_id,)):
+                datos['tiempos_vuelta'].setdefault(insc_id, []).append((vuelta, tiempo_ms))
+            datos['programa'] = cursor.execute(f"""
+                SELECT p.categoria_id, c.nombre_categoria, c.codigo_categoria, p.hora_inicio
+                FROM {esquema}.programa_pruebas p JOIN categorias c ON p.categoria_id = c.id
+                WHERE p.evento_id = ? ORDER BY p.orden ASC
+            """, (evento_id,)).fetchall()
+            datos['sponsors'] = cursor.execute(f"SELECT id, nombre_sponsor, logo_path FROM {esquema}.sponsors WHERE evento_id = ? ORDER BY nombre_sponsor", (evento_id,)).fetchall()
+            datos['sistema_puntuacion'] = dict(cursor.execute("SELECT lugar, puntos FROM sistemas_puntuacion WHERE evento_id = ? ORDER BY lugar", (evento_id,)).fetchall()) or dict(PUNTUACION_POR_DEFECTO)
+            datos['puntuacion_clubes'] = cursor.execute(_SQL_CLASIFICACION_CLUBES, (evento_id,)).fetchall()
+            datos['medallero_clubes'] = cursor.execute(_SQL_MEDALLERO_CLUBES, (evento_id,)).fetchall()
+            datos['puntuacion_deportistas'] = _filas_puntos_deportistas(cursor.execute(_SQL_CLASIFICACION_DEPORTISTAS, (evento_id,)).fetchall())
+            datos['medallero_deportistas'] = _filas_medallas_deportistas(cursor.execute(_SQL_MEDALLERO_DEPORTISTAS, (evento_id,)).fetchall())
+            return datos
+        finally:
+            if transaccion_propia:
+                conn.rollback()
+
+# --- TEMPORADAS ---
+# Una temporada agrupa eventos; su ranking suma los mejores N puntajes de cada club o deportista.
+# Lee solo clasificacion_clubes / clasificacion_deportistas (totales por evento que ya mantienen los
+# triggers), así que cargar resultados en un evento actualiza la temporada sin recorrer inscripciones.
+
+@_lectura_cacheada
+def obtener_temporadas():
+    with conectar_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, nombre, anio, mejores_n FROM temporadas ORDER BY anio DESC, nombre")
+        return cursor.fetchall()
+
+@_lectura_cacheada
+def obtener_info_temporada(temporada_id):
+    with conectar_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, nombre, anio, mejores_n FROM temporadas WHERE id = ?", (temporada_id,))
+        return cursor.fetchone()
+
+def agregar_o_actualizar_temporada(datos, temporada_id=None):
+    """datos: {'nombre', 'anio', 'mejores_n'} (mejores_n None = todos los eventos). Devuelve (id, mensaje)."""
+    mejores_n = datos.get('mejores_n') or None
+    try:
+        with conectar_db() as conn:
+            cursor = conn.cursor()
+            if temporada_id:
+                cursor.execute("UPDATE temporadas SET nombre=?, anio=?, mejores_n=? WHERE id=?", (datos['nombre'], datos['anio'], mejores_n, temporada_id))
+            else:
+                cursor.execute("INSERT INTO temporadas (nombre, anio, mejores_n) VALUES (?, ?, ?)", (datos['nombre'], datos['anio'], mejores_n))
+                temporada_id = cursor.lastrowid
+            conn.commit()
+            return temporada_id, "Temporada guardada."
+    except sqlite3.IntegrityError: return None, "Error: El nombre de la temporada ya existe."
+
+def eliminar_temporada(temporada_id):
+    with conectar_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM temporadas WHERE id=?", (temporada_id,))
+        conn.commit()
+        return True, "Temporada eliminada."
+
+@_lectura_cacheada
+def obtener_eventos_temporada(temporada_id):
+    """[(evento_id, nombre_evento, fecha)] de la temporada, en orden cronológico."""
+    with conectar_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT e.id, e.nombre_evento, e.fecha FROM temporada_eventos te JOIN eventos e ON e.id = te.evento_id
+            WHERE te.temporada_id = ? ORDER BY e.fecha, e.nombre_evento
+        """, (temporada_id,))
+        return cursor.fetchall()
+
+def guardar_eventos_temporada(temporada_id, evento_ids):
+    """Reemplaza la lista de eventos que componen la temporada."""
+    with conectar_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM temporada_eventos WHERE temporada_id = ?", (temporada_id,))
+        cursor.executemany("INSERT INTO temporada_eventos (temporada_id, evento_id) VALUES (?, ?)", [(temporada_id, evento_id) for evento_id in evento_ids])
+        conn.commit()
+    return True, "Eventos de la temporada guardados."
+
+# Numera los resultados por evento de cada club/deportista de mayor a menor puntaje y suma solo los primeros
+# mejores_n; las medallas y el número de eventos se cuentan en toda la temporada.
+_SQL_TOTALES_TEMPORADA = """
+    WITH por_evento AS (
+        SELECT cl.{clave} AS entidad_id, cl.puntos, cl.oro, cl.plata, cl.bronce, t.mejores_n,
+               ROW_NUMBER() OVER (PARTITION BY cl.{clave} ORDER BY cl.puntos DESC, cl.oro DESC, cl.evento_id) AS orden
+        FROM temporadas t
+        JOIN temporada_eventos te ON te.temporada_id = t.id
+        JOIN clasificacion_{tabla} cl ON cl.evento_id = te.evento_id
+        WHERE t.id = ?
+    )
+    SELECT entidad_id, SUM(CASE WHEN orden <= COALESCE(mejores_n, orden) THEN puntos ELSE 0 END) AS puntos,
+           SUM(oro) AS oro, SUM(plata) AS plata, SUM(bronce) AS bronce, COUNT(*) AS eventos
+    FROM por_evento GROUP BY entidad_id
+"""
+
+def calcular_ranking_temporada_clubes(temporada_id):
+    """[(club, logo_path, puntos, eventos)] de la temporada; empates por oros y luego platas de toda la temporada."""
+    sql = f"""
+        WITH totales AS ({_SQL_TOTALES_TEMPORADA.format(tabla='clubes', clave='club_id')})
+        SELECT c.nombre_club, c.logo_path, tt.puntos, tt.eventos FROM totales tt JOIN clubes c ON c.id = tt.entidad_id
+        ORDER BY tt.puntos DESC, tt.oro DESC, tt.plata DESC, c.nombre_club
+    """
+    with conectar_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(sql, (temporada_id,))
+        return cursor.fetchall()
+
+def calcular_ranking_temporada_deportistas(temporada_id):
+    """Ranking individual de la temporada: dicts con nombre, club, logo_path, puntos y eventos."""
+    sql = f"""
+        WITH totales AS ({_SQL_TOTALES_TEMPORADA.format(tabla='deportistas', clave='participante_id')})
+        SELECT p.apellido || ', ' || p.nombre, c.nombre_club, c.logo_path, tt.puntos, tt.eventos
+        FROM totales tt
+        JOIN participantes p ON p.id = tt.entidad_id
+        LEFT JOIN clubes c ON p.club_id = c.id
+        WHERE tt.puntos > 0
+        ORDER BY tt.puntos DESC, p.apellido, p.nombre
+    """
+    with conectar_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(sql, (temporada_id,))
+        return [{'nombre': nombre, 'club': club, 'logo_path': logo, 'puntos': puntos, 'eventos': eventos}
+                for nombre, club, logo, puntos, eventos in cursor.fetchall()]
+
+# --- ARCHIVO DE EVENTOS ---
+# Un evento terminado se puede mover a un archivo por temporada (archivo/regatas_archivo_AAAA.db) para que la
+# base de datos del día de regata siga chica. En la base viva quedan la fila del evento (con la columna archivo),
+# su sistema de puntuación y sus clasificaciones, así que los rankings de evento y de temporada no abren los
+# archivos. Las lecturas de detalle (inscripciones, resultados, vueltas, reportes, programa, sponsors, historial
+# del deportista) adjuntan el archivo con ATTACH y consultan sus tablas con el alias como esquema.
+CARPETA_ARCHIVOS = "archivo"
+# SQLite admite 10 bases adjuntas por conexión; cada conexión de hilo conserva solo las más usadas
+MAXIMO_ARCHIVOS_ADJUNTOS = 4
+
+# (tabla, clave única en el archivo, filtro de filas del evento). Las tres últimas son copias de referencia para
+# que el archivo conserve nombres y clubes como estaban al archivar; no se borran de la base viva.
+_TABLAS_ARCHIVO = [
+    ('inscripciones', 'id', "evento_id = :evento_id"),
+    ('inscripcion_tripulantes', 'inscripcion_id, posicion', "inscripcion_id IN (SELECT id FROM {esquema}.inscripciones WHERE evento_id = :evento_id)"),
+    ('tiempos_vuelta', 'inscripcion_id, vuelta', "evento_id = :evento_id"),
+    ('programa_pruebas', 'id', "evento_id = :evento_id"),
+    ('sponsors', 'id', "evento_id = :evento_id"),
+    ('evento_categorias_estado', 'evento_id, categoria_id', "evento_id = :evento_id"),
+]
+_TABLAS_REFERENCIA_ARCHIVO = [
+    ('eventos', 'id', "id = :evento_id"),
+    ('participantes', 'id', "id IN (SELECT t.participante_id FROM {esquema}.inscripcion_tripulantes t JOIN {esquema}.inscripciones i ON i.id = t.inscripcion_id WHERE i.evento_id = :evento_id)"),
+    ('clubes', 'id', "id IN (SELECT p.club_id FROM {esquema}.participantes p JOIN {esquema}.inscripcion_tripulantes t ON t.participante_id = p.id JOIN {esquema}.inscripciones i ON i.id = t.inscripcion_id WHERE i.evento_id = :evento_id)"),
+]
+
+def _ruta_archivo(nombre_archivo):
+    return os.path.join(os.path.dirname(DB_PATH), CARPETA_ARCHIVOS, nombre_archivo)
+
+def _adjuntar_archivo(conn, nombre_archivo, crear=False):
+    """
+    Adjunta (una sola vez por conexión) el archivo de temporada y devuelve su alias de esquema. Con
+    MAXIMO_ARCHIVOS_ADJUNTOS ya adjuntos, antes se separan los usados hace más tiempo.
+    """
+    alias = "arch_" + re.sub(r"\W", "_", os.path.splitext(nombre_archivo)[0])
+    uso = getattr(_hilo_local, 'archivos_adjuntos', None)
+    if uso is None:
+        uso = _hilo_local.archivos_adjuntos = OrderedDict()
+    adjuntos = [fila[1] for fila in conn.execute("PRAGMA database_list") if fila[1].startswith("arch_")]
+    if alias in adjuntos:
+        uso[alias] = None
+        uso.move_to_end(alias)
+        return alias
+    ruta = _ruta_archivo(nombre_archivo)
+    if not crear and not os.path.exists(ruta):
+        raise sqlite3.OperationalError(f"No se encuentra el archivo de eventos {ruta}")
+    # Los adjuntos que este hilo no registró (otra conexión) cuentan como los más antiguos
+    orden = list(uso)
+    adjuntos.sort(key=lambda a: orden.index(a) if a in orden else -1)
+    for viejo in adjuntos[:max(0, len(adjuntos) - MAXIMO_ARCHIVOS_ADJUNTOS + 1)]:
+        try:
+            conn.execute(f"DETACH DATABASE {viejo}")
+            uso.pop(viejo, None)
+        except sqlite3.OperationalError as e:
+            # Con un cursor sin terminar la conexión no puede separar ninguna base; se reintenta en el próximo ATTACH
+            print(f"[ADVERTENCIA] No se pudo separar el archivo {viejo}: {e}")
+            break
+    conn.execute(f"ATTACH DATABASE ? AS {alias}", (ruta,))
+    uso[alias] = None
+    return alias
+
+def _esquema_evento(conn, evento_id):
+    """'main' si el evento está en la base viva; si está archivado, adjunta su archivo y devuelve el alias."""
+    fila = conn.execute("SELECT archivo FROM eventos WHERE id = ?", (evento_id,)).fetchone()
+    if not fila or not fila[0]:
+        return "main"
+    return _adjuntar_archivo(conn, fila[0])
+
+# Las inscripciones, resultados, estados de categoría, programa y sponsors de un evento archivado son de solo
+# lectura: una fila escrita en la base viva chocaría con las del archivo al restaurar el evento.
+_ERROR_EVENTO_ARCHIVADO = "Error: El evento está archivado en {}; restáuralo para modificar sus inscripciones o resultados."
+
+def _error_evento_archivado(cursor, evento_id=None, inscripcion_id=None):
+    """Mensaje de error si el evento (o el de la inscripción) está archivado; None si se puede escribir."""
+    if inscripcion_id is not None:
+        fila = cursor.execute("SELECT e.archivo FROM inscripciones i JOIN eventos e ON e.id = i.evento_id WHERE i.id = ?", (inscripcion_id,)).fetchone()
+    else:
+        fila = cursor.execute("SELECT archivo FROM eventos WHERE id = ?", (evento_id,)).fetchone()
+    return _ERROR_EVENTO_ARCHIVADO.format(fila[0]) if fila and fila[0] else None
+
+def _columnas_tabla(cursor, esquema, tabla):
+    return [info[1] for info in cursor.execute(f"PRAGMA {esquema}.table_info({tabla})")]
+
+def _copiar_filas(cursor, origen, destino, tabla, filtro, params, conflicto="REPLACE"):
+    """Copia las filas que cumplen 'filtro' usando solo las columnas presentes en ambos esquemas."""
+    columnas_destino = set(_columnas_tabla(cursor, destino, tabla))
+    columnas = ", ".join(c for c in _columnas_tabla(cursor, origen, tabla) if c in columnas_destino)
+    cursor.execute(f"INSERT OR {conflicto} INTO {destino}.{tabla} ({columnas}) SELECT {columnas} FROM {origen}.{tabla} WHERE {filtro.format(esquema=origen)}", params)
+    return cursor.rowcount
+
+def _preparar_tablas_archivo(cursor, alias):
+    """Crea en el archivo las tablas que falten (mismas columnas que en la base viva) y agrega columnas nuevas."""
+    for tabla, clave, _ in _TABLAS_ARCHIVO + _TABLAS_REFERENCIA_ARCHIVO:
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {alias}.{tabla} AS SELECT * FROM main.{tabla} WHERE 0")
+        existentes = set(_columnas_tabla(cursor, alias, tabla))
+        for columna in _columnas_tabla(cursor, "main", tabla):
+            if columna not in existentes:
+                cursor.execute(f"ALTER TABLE {alias}.{tabla} ADD COLUMN {columna}")
+        cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {alias}.ux_{tabla} ON {tabla} ({clave})")
+        if tabla in ('inscripciones', 'tiempos_vuelta', 'programa_pruebas', 'sponsors'):
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {alias}.idx_{tabla}_evento ON {tabla} (evento_id)")
+
+def _borrar_evento_de_archivo(cursor, alias, evento_id):
+    # Primero las tablas hijas: su filtro se apoya en las inscripciones del archivo
+    for tabla, _, filtro in reversed(_TABLAS_ARCHIVO):
+        cursor.execute(f"DELETE FROM {alias}.{tabla} WHERE {filtro.format(esquema=alias)}", {'evento_id': evento_id})
+    cursor.execute(f"DELETE FROM {alias}.eventos WHERE id = ?", (evento_id,))
+
+def obtener_archivos_eventos():
+    """{evento_id: nombre_archivo} de los eventos archivados."""
+    with conectar_db() as conn:
+        return dict(conn.execute("SELECT id, archivo FROM eventos WHERE archivo IS NOT NULL").fetchall())
+
+def archivar_evento(evento_id):
+    """
+    Mueve las inscripciones (con tripulaciones y vueltas), el programa, los sponsors y el estado de las categorías
+    de un evento terminado a su archivo de temporada. El año sale de la temporada del evento o, si no tiene, de su fecha.
+    Las clasificaciones del evento se conservan en la base viva.
+    """
+    with conectar_db() as conn:
+        evento = conn.execute("""
+            SELECT e.fecha, e.archivo, (SELECT MAX(t.anio) FROM temporada_eventos te JOIN temporadas t ON t.id = te.temporada_id WHERE te.evento_id = e.id)
+            FROM eventos e WHERE e.id = ?
+        """, (evento_id,)).fetchone()
+        if evento is None:
+            return False, "El evento no existe."
+        fecha, archivo_actual, anio_temporada = evento
+        if archivo_actual:
+            return False, f"El evento ya está archivado en {archivo_actual}."
+        pendientes = conn.execute("SELECT COUNT(*) FROM inscripciones WHERE evento_id = ? AND estado = 'Inscrito'", (evento_id,)).fetchone()[0]
+        if pendientes:
+            return False, f"El evento tiene {pendientes} inscripciones sin resultado; solo se archivan eventos terminados."
+
+        nombre_archivo = f"regatas_archivo_{anio_temporada or (fecha or '')[:4] or 'sin_fecha'}.db"
+        os.makedirs(os.path.dirname(_ruta_archivo(nombre_archivo)), exist_ok=True)
+        cursor = conn.cursor()
+        try:
+            alias = _adjuntar_archivo(conn, nombre_archivo, crear=True)
+            cursor.execute("BEGIN")
+            _preparar_tablas_archivo(cursor, alias)
+            params = {'evento_id': evento_id}
+            for tabla, _, filtro in _TABLAS_REFERENCIA_ARCHIVO + _TABLAS_ARCHIVO:
+                _copiar_filas(cursor, "main", alias, tabla, filtro, params)
+            movidas = cursor.execute(f"SELECT COUNT(*) FROM {alias}.inscripciones WHERE evento_id = ?", (evento_id,)).fetchone()[0]
+
+            # Los triggers vacían las clasificaciones al borrar las inscripciones; se guardan y se reponen tal cual
+            clasificaciones = {tabla: cursor.execute(f"SELECT * FROM clasificacion_{tabla} WHERE evento_id = ?", (evento_id,)).fetchall()
+                               for tabla in ('clubes', 'deportistas')}
+            for tabla in ('inscripciones', 'programa_pruebas', 'sponsors', 'evento_categorias_estado'):
+                cursor.execute(f"DELETE FROM main.{tabla} WHERE evento_id = ?", (evento_id,))  # tripulantes y vueltas caen en cascada
+            for tabla, filas in clasificaciones.items():
+                cursor.execute(f"DELETE FROM clasificacion_{tabla} WHERE evento_id = ?", (evento_id,))
+                cursor.executemany(f"INSERT INTO clasificacion_{tabla} VALUES (?, ?, ?, ?, ?, ?, ?)", filas)
+            cursor.execute("UPDATE eventos SET archivo = ? WHERE id = ?", (nombre_archivo, evento_id))
+            # Con WAL el commit es atómico por archivo: si fallara entre ambos, el evento queda copiado en los dos
+            # y archivar de nuevo reemplaza las mismas filas.
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            return False, f"Error al archivar el evento: {e}"
+    print(f"[INFO] Evento {evento_id} archivado en {nombre_archivo}: {movidas} inscripciones.")
+    return True, f"Evento archivado en {nombre_archivo} ({movidas} inscripciones)."
+
+def restaurar_evento_archivado(evento_id):
+    """Devuelve a la base viva un evento archivado (p. ej. para corregir resultados) y recalcula sus clasificaciones."""
+    with conectar_db() as conn:
+        cursor = conn.cursor()
+        try:
+            alias = _esquema_evento(conn, evento_id)
+            if alias == "main":
+                return False, "El evento no está archivado."
+            cursor.execute("BEGIN")
+            params = {'evento_id': evento_id}
+            # Participantes o clubes borrados desde el archivado vuelven desde la copia; los existentes no se tocan
+            for tabla, _, filtro in reversed(_TABLAS_REFERENCIA_ARCHIVO[1:]):
+                _copiar_filas(cursor, alias, "main", tabla, filtro, params, conflicto="IGNORE")
+            for tabla, _, filtro in [_TABLAS_ARCHIVO[-1]] + _TABLAS_ARCHIVO[:-1]:
+                _copiar_filas(cursor, alias, "main", tabla, filtro, params, conflicto="ABORT")
+            cursor.execute("UPDATE eventos SET archivo = NULL WHERE id = ?", (evento_id,))
+            _reconstruir_clasificaciones(cursor, evento_id)
+            _borrar_evento_de_archivo(cursor, alias, evento_id)
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            return False, f"Error al restaurar el evento: {e}"
+    return True, "Evento restaurado a la base de datos principal."
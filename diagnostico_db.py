@@ -0,0 +1,206 @@
+# diagnostico_db.py
+# Instrumentación opcional de la capa de datos: cuántas veces se llama cada función pública de
+# database_maraton, cuánto tarda (total y percentiles), cuántas filas devuelve y qué sentencias SQL
+# fueron lentas. Desactivada no cuesta nada: las funciones originales quedan intactas y las
+# conexiones no tienen trace callback.
+# Se activa con la variable de entorno REGATAS_DIAGNOSTICO=1 o desde Archivo > Diagnóstico de base de datos...
+
+import os
+import time
+import json
+import heapq
+import random
+import datetime
+import functools
+import inspect
+import itertools
+import threading
+import database_maraton as db
+
+VARIABLE_ENTORNO = "REGATAS_DIAGNOSTICO"
+CARPETA_INFORMES = "diagnostico"
+UMBRAL_LENTO_MS = 50
+MAXIMO_SENTENCIAS_LENTAS = 50
+MUESTRAS_POR_FUNCION = 2000     # muestreo de reservorio para los percentiles
+LARGO_MAXIMO_SQL = 400
+
+# Infraestructura de conexión y caché: se llaman en todas partes y no aportan al perfil
+_EXCLUIDAS = {'conectar_db', 'cerrar_conexion_hilo', 'cerrar_todas_las_conexiones', 'configurar_traza_sql',
+              'limpiar_cache', 'obtener_estadisticas_conexion', 'obtener_estadisticas_cache',
+              'configurar_base_datos', 'configurar_desde_entorno', 'cerrar_base_datos', 'obtener_estado_base_datos'}
+
+_lock = threading.Lock()
+_hilo = threading.local()
+_originales = {}
+_funciones = {}
+_lentas = []                    # heap (ms, orden, registro) con las MAXIMO_SENTENCIAS_LENTAS más lentas
+_orden = itertools.count()
+_estado = {'desde': None, 'sentencias': 0, 'sentencias_lentas': 0}
+
+def activo():
+    return bool(_originales)
+
+def _pila_hilo():
+    pila = getattr(_hilo, 'pila', None)
+    if pila is None:
+        pila = _hilo.pila = []
+        _hilo.sentencia = None
+    return pila
+
+def _cerrar_sentencia(ahora):
+    # El trace callback solo avisa cuando una sentencia empieza: su duración se cuenta hasta que empieza
+    # la siguiente o termina la función medida, así que incluye el tiempo de leer las filas en Python.
+    sentencia = getattr(_hilo, 'sentencia', None)
+    if sentencia is None: return
+    _hilo.sentencia = None
+    sql, funcion, inicio = sentencia
+    ms = (ahora - inicio) * 1000
+    if ms < UMBRAL_LENTO_MS: return
+    registro = {'ms': round(ms, 2), 'funcion': funcion, 'sql': " ".join(sql.split())[:LARGO_MAXIMO_SQL],
+                'hilo': threading.current_thread().name, 'momento': datetime.datetime.now().isoformat(timespec='seconds')}
+    with _lock:
+        _estado['sentencias_lentas'] += 1
+        elemento = (ms, next(_orden), registro)
+        if len(_lentas) < MAXIMO_SENTENCIAS_LENTAS:
+            heapq.heappush(_lentas, elemento)
+        elif ms > _lentas[0][0]:
+            heapq.heapreplace(_lentas, elemento)
+
+def _al_ejecutar_sentencia(sql):
+    if sql.startswith("--"): return   # sentencias internas de triggers
+    pila = _pila_hilo()
+    with _lock:
+        _estado['sentencias'] += 1
+    if not pila: return   # consultas directas desde la interfaz: se cuentan pero no se cronometran
+    ahora = time.perf_counter()
+    _cerrar_sentencia(ahora)
+    pila[-1][1] += 1
+    _hilo.sentencia = (sql, pila[-1][0], ahora)
+
+def _registrar(nombre, segundos, filas, sentencias, error):
+    with _lock:
+        datos = _funciones.get(nombre)
+        if datos is None:
+            datos = _funciones[nombre] = {'llamadas': 0, 'total_s': 0.0, 'maximo_s': 0.0, 'filas': 0,
+                                          'sentencias': 0, 'errores': 0, 'muestras': []}
+        datos['llamadas'] += 1
+        datos['total_s'] += segundos
+        datos['maximo_s'] = max(datos['maximo_s'], segundos)
+        datos['filas'] += filas
+        datos['sentencias'] += sentencias
+        datos['errores'] += error
+        muestras = datos['muestras']
+        if len(muestras) < MUESTRAS_POR_FUNCION:
+            muestras.append(segundos)
+        else:
+            indice = random.randrange(datos['llamadas'])
+            if indice < MUESTRAS_POR_FUNCION: muestras[indice] = segundos
+
+def _medir(nombre, funcion):
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        pila = _pila_hilo()
+        pila.append([nombre, 0])   # [función, sentencias ejecutadas]
+        resultado, error = None, False
+        inicio = time.perf_counter()
+        try:
+            resultado = funcion(*args, **kwargs)
+            return resultado
+        except Exception:
+            error = True
+            raise
+        finally:
+            fin = time.perf_counter()
+            _cerrar_sentencia(fin)
+            _, sentencias = pila.pop()
+            filas = len(resultado) if isinstance(resultado, (list, dict)) else 0
+            _registrar(nombre, fin - inicio, filas, sentencias, error)
+    return envoltura
+
+def activar():
+    """Envuelve las funciones públicas de database_maraton e instala el trace callback en las conexiones."""
+    if activo(): return
+    for nombre, funcion in inspect.getmembers(db, inspect.isfunction):
+        if nombre.startswith('_') or nombre in _EXCLUIDAS or funcion.__module__ != db.__name__:
+            continue
+        _originales[nombre] = funcion
+        setattr(db, nombre, _medir(nombre, funcion))
+    db.configurar_traza_sql(_al_ejecutar_sentencia)
+    if _estado['desde'] is None:
+        _estado['desde'] = datetime.datetime.now().isoformat(timespec='seconds')
+    print(f"[INFO] Diagnóstico de base de datos activado ({len(_originales)} funciones instrumentadas).")
+
+def desactivar():
+    """Devuelve las funciones originales y quita el trace callback. Lo medido se conserva hasta reiniciar()."""
+    if not activo(): return
+    db.configurar_traza_sql(None)
+    for nombre, funcion in _originales.items():
+        setattr(db, nombre, funcion)
+    _originales.clear()
+
+def activar_desde_entorno():
+    if os.environ.get(VARIABLE_ENTORNO, "").strip() not in ("", "0"):
+        activar()
+
+def reiniciar():
+    with _lock:
+        _funciones.clear()
+        _lentas.clear()
+        _estado.update(sentencias=0, sentencias_lentas=0,
+                       desde=datetime.datetime.now().isoformat(timespec='seconds') if activo() else None)
+
+def _percentil(ordenadas, fraccion):
+    if not ordenadas: return 0.0
+    return ordenadas[min(len(ordenadas) - 1, int(fraccion * len(ordenadas)))]
+
+def informe():
+    """Resumen serializable a JSON: funciones ordenadas por tiempo total y sentencias más lentas primero."""
+    with _lock:
+        funciones = []
+        for nombre, datos in _funciones.items():
+            ordenadas = sorted(datos['muestras'])
+            funciones.append({
+                'funcion': nombre,
+                'llamadas': datos['llamadas'],
+                'total_ms': round(datos['total_s'] * 1000, 2),
+                'promedio_ms': round(datos['total_s'] * 1000 / datos['llamadas'], 3),
+                'p50_ms': round(_percentil(ordenadas, 0.50) * 1000, 3),
+                'p95_ms': round(_percentil(ordenadas, 0.95) * 1000, 3),
+                'p99_ms': round(_percentil(ordenadas, 0.99) * 1000, 3),
+                'maximo_ms': round(datos['maximo_s'] * 1000, 3),
+                'filas': datos['filas'],
+                'sentencias': datos['sentencias'],
+                'errores': datos['errores'],
+            })
+        lentas = [registro for _, _, registro in sorted(_lentas, reverse=True)]
+        estado = dict(_estado)
+    funciones.sort(key=lambda f: f['total_ms'], reverse=True)
+    return {
+        'generado': datetime.datetime.now().isoformat(timespec='seconds'),
+        'desde': estado['desde'],
+        'activo': activo(),
+        'base_de_datos': db.DB_PATH,
+        'almacenamiento': db.obtener_estado_base_datos(),   # modo, ventana de durabilidad y tiempos de volcado
+        'umbral_lento_ms': UMBRAL_LENTO_MS,
+        'sentencias_ejecutadas': estado['sentencias'],
+        'sentencias_lentas': estado['sentencias_lentas'],
+        'funciones': funciones,
+        'sentencias_mas_lentas': lentas,
+        'conexiones': db.obtener_estadisticas_conexion(),
+        'cache': db.obtener_estadisticas_cache(),
+    }
+
+def ruta_informe_por_defecto():
+    """diagnostico/diagnostico_AAAAMMDD_HHMMSS.json junto a la base de datos."""
+    carpeta = os.path.join(os.path.dirname(db.DB_PATH), CARPETA_INFORMES)
+    return os.path.join(carpeta, f"diagnostico_{datetime.datetime.now():%Y%m%d_%H%M%S}.json")
+
+def guardar_informe(ruta=None):
+    ruta = ruta or ruta_informe_por_defecto()
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(informe(), f, ensure_ascii=False, indent=2)
+    except OSError as e:
+        return False, f"No se pudo guardar el informe de diagnóstico: {e}"
+    return True, f"Informe de diagnóstico guardado en {ruta}"
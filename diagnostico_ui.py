@@ -0,0 +1,112 @@
+# diagnostico_ui.py
+# Diálogo de diagnóstico de la base de datos (Archivo > Diagnóstico de base de datos...).
+
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QCheckBox, QMessageBox,
+    QFileDialog, QGroupBox, QTableWidget, QTableWidgetItem, QHeaderView, QPlainTextEdit, QAbstractItemView
+)
+from PySide6.QtCore import Qt
+import diagnostico_db as diag
+
+_COLUMNAS = [("Función", 'funcion'), ("Llamadas", 'llamadas'), ("Total ms", 'total_ms'), ("p50 ms", 'p50_ms'),
+             ("p95 ms", 'p95_ms'), ("p99 ms", 'p99_ms'), ("Máx. ms", 'maximo_ms'), ("Filas", 'filas'),
+             ("Sentencias", 'sentencias'), ("Errores", 'errores')]
+
+class DiagnosticoDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Diagnóstico de la Base de Datos")
+        self.resize(900, 600)
+        self.init_ui()
+        self.actualizar()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.chk_activo = QCheckBox("Instrumentación activa (mide cada función de la base de datos y registra sentencias lentas)")
+        self.chk_activo.setChecked(diag.activo())
+        layout.addWidget(self.chk_activo)
+        self.label_resumen = QLabel()
+        self.label_resumen.setWordWrap(True)
+        layout.addWidget(self.label_resumen)
+
+        group_funciones = QGroupBox("Funciones (ordenadas por tiempo total)")
+        layout_funciones = QVBoxLayout(group_funciones)
+        self.tabla_funciones = QTableWidget(0, len(_COLUMNAS))
+        self.tabla_funciones.setHorizontalHeaderLabels([titulo for titulo, _ in _COLUMNAS])
+        self.tabla_funciones.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.tabla_funciones.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.tabla_funciones.verticalHeader().setVisible(False)
+        layout_funciones.addWidget(self.tabla_funciones)
+        layout.addWidget(group_funciones, 3)
+
+        group_lentas = QGroupBox(f"Sentencias lentas (≥ {diag.UMBRAL_LENTO_MS} ms)")
+        layout_lentas = QVBoxLayout(group_lentas)
+        self.texto_lentas = QPlainTextEdit()
+        self.texto_lentas.setReadOnly(True)
+        layout_lentas.addWidget(self.texto_lentas)
+        layout.addWidget(group_lentas, 2)
+
+        btn_layout = QHBoxLayout()
+        self.btn_actualizar = QPushButton("Actualizar")
+        self.btn_reiniciar = QPushButton("Reiniciar Mediciones")
+        self.btn_guardar = QPushButton("Guardar Informe JSON...")
+        self.btn_cerrar = QPushButton("Cerrar")
+        for boton in (self.btn_actualizar, self.btn_reiniciar, self.btn_guardar, self.btn_cerrar):
+            btn_layout.addWidget(boton)
+        layout.addLayout(btn_layout)
+
+        self.chk_activo.toggled.connect(self.cambiar_activo)
+        self.btn_actualizar.clicked.connect(self.actualizar)
+        self.btn_reiniciar.clicked.connect(self.reiniciar)
+        self.btn_guardar.clicked.connect(self.guardar_informe)
+        self.btn_cerrar.clicked.connect(self.close)
+
+    def cambiar_activo(self, activo):
+        if activo:
+            diag.activar()
+        else:
+            diag.desactivar()
+        self.actualizar()
+
+    def actualizar(self):
+        informe = diag.informe()
+        estado = "activa" if informe['activo'] else "inactiva"
+        desde = f" desde {informe['desde']}" if informe['desde'] else ""
+        self.label_resumen.setText(f"Instrumentación {estado}{desde}. Sentencias ejecutadas: {informe['sentencias_ejecutadas']}, "
+                                   f"lentas: {informe['sentencias_lentas']}. Caché: {informe['cache']['aciertos']} aciertos, "
+                                   f"{informe['cache']['fallos']} fallos.\n{self._texto_almacenamiento(informe['almacenamiento'])}")
+        self.tabla_funciones.setRowCount(0)
+        for fila, datos in enumerate(informe['funciones']):
+            self.tabla_funciones.insertRow(fila)
+            for columna, (_, clave) in enumerate(_COLUMNAS):
+                item = QTableWidgetItem(str(datos[clave]))
+                if columna > 0:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.tabla_funciones.setItem(fila, columna, item)
+        lineas = [f"{s['ms']:.1f} ms  {s['funcion']}  [{s['hilo']} {s['momento']}]\n    {s['sql']}" for s in informe['sentencias_mas_lentas']]
+        self.texto_lentas.setPlainText("\n".join(lineas) if lineas else "Sin sentencias lentas registradas.")
+
+    @staticmethod
+    def _texto_almacenamiento(estado):
+        texto = f"Base de datos en modo '{estado['modo']}'. Ventana de durabilidad: {estado['ventana_durabilidad']}."
+        volcado = estado['volcado']
+        if estado['modo'] == 'memoria':
+            ultimo = f"último {volcado['ultimo_ms']} ms a las {volcado['ultimo']}" if volcado['ultimo'] else "aún sin volcados"
+            texto += (f" Volcados a disco: {volcado['volcados']} ({ultimo}, máx. {volcado['maximo_ms']} ms, "
+                      f"errores: {volcado['errores']}); carga inicial {volcado['carga_ms']} ms.")
+        return texto
+
+    def reiniciar(self):
+        diag.reiniciar()
+        self.actualizar()
+
+    def guardar_informe(self):
+        ruta, _ = QFileDialog.getSaveFileName(self, "Guardar Informe de Diagnóstico", diag.ruta_informe_por_defecto(), "JSON (*.json)")
+        if not ruta:
+            return
+        exito, mensaje = diag.guardar_informe(ruta)
+        if exito:
+            QMessageBox.information(self, "Informe Guardado", mensaje)
+        else:
+            QMessageBox.critical(self, "Error", mensaje)
@@ -0,0 +1,89 @@
+# evento_snapshot.py
+# Foto en memoria de un evento completo para generar reportes sin volver a la base de datos.
+# Se carga con unas pocas consultas masivas (database_maraton.obtener_datos_evento_completo)
+# y ofrece búsquedas por categoría sobre registros compactos con __slots__.
+
+from collections import namedtuple
+import database_maraton as db
+
+
+class Tripulante(namedtuple('Tripulante', 'participante_id nombre apellido rut fecha_nacimiento genero club logo_path')):
+    __slots__ = ()
+
+    @property
+    def nombre_completo(self):
+        """Nombre en el formato de los reportes: 'apellido, nombre'."""
+        return f"{self.apellido}, {self.nombre}"
+
+
+class Inscripcion(namedtuple('Inscripcion', 'id categoria_id numero lugar tiempo tiempo_ms estado tiempos_vuelta tripulantes')):
+    __slots__ = ()
+
+    @property
+    def club(self):
+        """Club de la embarcación (el del primer tripulante), o None."""
+        return self.tripulantes[0].club if self.tripulantes else None
+
+    @property
+    def logo_club(self):
+        return self.tripulantes[0].logo_path if self.tripulantes else None
+
+
+Categoria = namedtuple('Categoria', 'id nombre codigo edad_min edad_max genero tipo_embarcacion distancia_km numero_vueltas')
+ItemPrograma = namedtuple('ItemPrograma', 'categoria_id nombre_categoria codigo_categoria hora_inicio')
+Sponsor = namedtuple('Sponsor', 'id nombre logo_path')
+
+
+class EventoSnapshot:
+    """
+    Datos de un evento leídos en una sola transacción. Las inscripciones quedan agrupadas
+    por categoría en el mismo orden que obtener_inscripciones_por_categoria (lugar, tiempo, número).
+    """
+    __slots__ = ('evento_id', 'nombre_evento', 'fecha', 'lugar', 'notas', 'version_datos',
+                 'categorias', 'programa', 'sponsors', 'sistema_puntuacion',
+                 'puntuacion_clubes', 'medallero_clubes', 'puntuacion_deportistas', 'medallero_deportistas',
+                 '_categorias_por_id', '_inscripciones_por_categoria')
+
+    def __init__(self, datos):
+        self.evento_id, self.nombre_evento, self.fecha, self.lugar, self.notas = datos['evento']
+        self.version_datos = datos['version_datos']
+        self.categorias = [Categoria(*fila) for fila in datos['categorias']]
+        self.programa = [ItemPrograma(*fila) for fila in datos['programa']]
+        self.sponsors = [Sponsor(*fila) for fila in datos['sponsors']]
+        self.sistema_puntuacion = datos['sistema_puntuacion']
+        self.puntuacion_clubes = datos['puntuacion_clubes']
+        self.medallero_clubes = datos['medallero_clubes']
+        self.puntuacion_deportistas = datos['puntuacion_deportistas']
+        self.medallero_deportistas = datos['medallero_deportistas']
+        self._categorias_por_id = {cat.id: cat for cat in self.categorias}
+
+        tripulaciones, tiempos_vuelta = datos['tripulaciones'], datos['tiempos_vuelta']
+        self._inscripciones_por_categoria = {}
+        for insc_id, categoria_id, numero, lugar, tiempo, tiempo_ms, estado in datos['inscripciones']:
+            tripulantes = tuple(Tripulante(*t) for t in tripulaciones.get(insc_id, ()))
+            vueltas = tuple(tiempos_vuelta.get(insc_id, ()))  # ((vuelta, tiempo_ms), ...)
+            inscripcion = Inscripcion(insc_id, categoria_id, numero, lugar, tiempo, tiempo_ms, estado, vueltas, tripulantes)
+            self._inscripciones_por_categoria.setdefault(categoria_id, []).append(inscripcion)
+
+    @classmethod
+    def cargar(cls, evento_id):
+        """Carga el evento completo; devuelve None si el evento no existe."""
+        datos = db.obtener_datos_evento_completo(evento_id)
+        return cls(datos) if datos else None
+
+    def categoria(self, categoria_id):
+        return self._categorias_por_id.get(categoria_id)
+
+    def inscripciones_de(self, categoria_id):
+        return self._inscripciones_por_categoria.get(categoria_id, [])
+
+    def categorias_con_inscripciones(self):
+        """Categorías (por nombre) que tienen al menos una inscripción en el evento."""
+        return [cat for cat in self.categorias if cat.id in self._inscripciones_por_categoria]
+
+    def total_inscripciones(self):
+        return sum(len(lista) for lista in self._inscripciones_por_categoria.values())
+
+    @property
+    def sponsor_logo_paths(self):
+        return [sp.logo_path for sp in self.sponsors if sp.logo_path]
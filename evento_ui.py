@@ -18,6 +18,7 @@ class EventoTabWidget(QWidget):
     def __init__(self):
         super().__init__()
         self.id_evento_seleccionado = None
+        self.archivos_eventos = {}
         self.id_evento_activo = None
         self.nombre_evento_activo = "Ninguno"
         self.init_ui()
@@ -77,11 +78,14 @@ class EventoTabWidget(QWidget):
         
         self.btn_seleccionar_activo = QPushButton("Seleccionar como Evento Activo")
         self.btn_seleccionar_activo.setEnabled(False)
+        self.btn_archivar = QPushButton("Archivar Evento Terminado")
+        self.btn_archivar.setEnabled(False)
 
         layout_activo.addWidget(self.label_evento_activo_titulo, 0, Qt.AlignCenter)
         layout_activo.addWidget(self.label_evento_activo_nombre, 0, Qt.AlignCenter)
         layout_activo.addStretch()
         layout_activo.addWidget(self.btn_seleccionar_activo)
+        layout_activo.addWidget(self.btn_archivar)
         
         group_sponsors = QGroupBox("Patrocinadores del Evento Seleccionado")
         layout_sponsors = QVBoxLayout(group_sponsors)
@@ -105,6 +109,7 @@ class EventoTabWidget(QWidget):
         self.btn_eliminar.clicked.connect(self.eliminar_evento)
         self.lista_eventos_widget.itemClicked.connect(self.cargar_evento_seleccionado)
         self.btn_seleccionar_activo.clicked.connect(self.seleccionar_evento_activo)
+        self.btn_archivar.clicked.connect(self.archivar_o_restaurar_evento)
         self.btn_anadir_sponsor.clicked.connect(self.anadir_sponsor)
         self.btn_quitar_sponsor.clicked.connect(self.quitar_sponsor)
         
@@ -119,12 +124,16 @@ class EventoTabWidget(QWidget):
         self.lista_eventos_widget.clearSelection()
         self.lista_sponsors_widget.clear()
         self.btn_seleccionar_activo.setEnabled(False)
+        self.actualizar_estado_archivo()
 
     def cargar_lista_eventos(self):
         self.lista_eventos_widget.clear()
         eventos = db.obtener_eventos()
+        self.archivos_eventos = db.obtener_archivos_eventos()
         for evento_id, nombre, fecha, lugar in eventos:
             item_text = f"{nombre} ({fecha})"
+            if evento_id in self.archivos_eventos:
+                item_text += " [Archivado]"
             item = QListWidgetItem(item_text)
             item.setData(Qt.UserRole, evento_id)
             self.lista_eventos_widget.addItem(item)
@@ -176,6 +185,7 @@ class EventoTabWidget(QWidget):
                     self.lugar_evento_input.setText(data[2])
                     self.notas_evento_input.setPlainText(data[3])
                     self.btn_seleccionar_activo.setEnabled(True)
+                    self.actualizar_estado_archivo()
                     self.cargar_sponsors_del_evento()
         except sqlite3.Error as e:
             QMessageBox.critical(self, "Error", f"No se pudo cargar el evento: {e}")
@@ -184,12 +194,48 @@ class EventoTabWidget(QWidget):
         if not self.id_evento_seleccionado:
             QMessageBox.warning(self, "Sin Selección", "Selecciona un evento de la lista primero.")
             return
+        if self.id_evento_seleccionado in self.archivos_eventos:
+            QMessageBox.information(self, "Evento Archivado", "Este evento está archivado: sus inscripciones y resultados se pueden consultar, pero no modificar.\nRestáuralo si necesitas corregir algo.")
         self.id_evento_activo = self.id_evento_seleccionado
         self.nombre_evento_activo = self.nombre_evento_input.text()
         self.label_evento_activo_nombre.setText(f"<b>{self.nombre_evento_activo}</b>")
         self.evento_activo_cambiado.emit(self.id_evento_activo, self.nombre_evento_activo)
         QMessageBox.information(self, "Evento Activo", f"'{self.nombre_evento_activo}' ha sido seleccionado como el evento activo.")
 
+    def actualizar_estado_archivo(self):
+        archivado = self.id_evento_seleccionado in self.archivos_eventos
+        self.btn_archivar.setEnabled(bool(self.id_evento_seleccionado))
+        self.btn_archivar.setText("Restaurar Evento Archivado" if archivado else "Archivar Evento Terminado")
+        # Los patrocinadores de un evento archivado viven en su archivo de temporada
+        self.btn_anadir_sponsor.setEnabled(not archivado)
+        self.btn_quitar_sponsor.setEnabled(not archivado)
+
+    def archivar_o_restaurar_evento(self):
+        if not self.id_evento_seleccionado:
+            return
+        nombre = self.nombre_evento_input.text()
+        if self.id_evento_seleccionado in self.archivos_eventos:
+            pregunta = f"¿Restaurar el evento '{nombre}' desde {self.archivos_eventos[self.id_evento_seleccionado]} a la base de datos principal?"
+            accion = db.restaurar_evento_archivado
+        else:
+            pregunta = (f"¿Archivar el evento '{nombre}'?\nSus inscripciones, resultados, programa y patrocinadores pasarán al archivo "
+                        "de su temporada y quedarán de solo lectura. Las clasificaciones y rankings no cambian.")
+            accion = db.archivar_evento
+        confirmacion = QMessageBox.question(self, "Confirmar", pregunta, QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, QMessageBox.StandardButton.No)
+        if confirmacion != QMessageBox.StandardButton.Yes:
+            return
+        evento_id = self.id_evento_seleccionado
+        exito, mensaje = accion(evento_id)
+        if exito:
+            QMessageBox.information(self, "Éxito", mensaje)
+            if evento_id == self.id_evento_activo:
+                # Las pestañas vuelven a leer el evento activo desde su nueva ubicación (y a habilitar o no la edición)
+                self.evento_activo_cambiado.emit(self.id_evento_activo, self.nombre_evento_activo)
+            self.cargar_lista_eventos()
+            self.limpiar_formulario()
+        else:
+            QMessageBox.critical(self, "Error", mensaje)
+
     def cargar_sponsors_del_evento(self):
         self.lista_sponsors_widget.clear()
         if self.id_evento_seleccionado:
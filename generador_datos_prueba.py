@@ -0,0 +1,195 @@
+# generador_datos_prueba.py
+# Llena una base de datos nueva con datos sintéticos de tamaño configurable: clubes, deportistas con una
+# distribución de edades realista, categorías por edad/género/embarcación, eventos e inscripciones con
+# tripulaciones, tiempos por vuelta y estados DNS/DNF/DSQ. Sirve para probar la aplicación con un evento
+# grande y como base de benchmark_db.py. Uso:
+#     python generador_datos_prueba.py prueba_grande.db --deportistas 5000 --inscripciones 2000
+
+import os
+import sys
+import random
+import datetime
+import argparse
+import database_maraton as db
+from utils_maraton import formatear_tiempo_ms
+
+NOMBRES = {
+    'Masculino': ["Juan", "Diego", "Matías", "Benjamín", "Vicente", "Tomás", "Martín", "Joaquín", "Sebastián", "Felipe",
+                  "Nicolás", "Cristóbal", "Agustín", "Lucas", "Maximiliano", "Ignacio", "Pablo", "Rodrigo", "Carlos", "José"],
+    'Femenino': ["Sofía", "Isidora", "Florencia", "Agustina", "Catalina", "Josefa", "Valentina", "Antonella", "Emilia", "Martina",
+                 "Fernanda", "Constanza", "Javiera", "Camila", "Francisca", "María", "Daniela", "Paula", "Carolina", "Antonia"],
+}
+APELLIDOS = ["González", "Muñoz", "Rojas", "Díaz", "Pérez", "Soto", "Contreras", "Silva", "Martínez", "Sepúlveda",
+             "Morales", "Rodríguez", "López", "Fuentes", "Hernández", "Torres", "Araya", "Flores", "Espinoza", "Valenzuela",
+             "Castillo", "Tapia", "Reyes", "Gutiérrez", "Castro", "Pizarro", "Álvarez", "Vásquez", "Sánchez", "Fernández"]
+CIUDADES = ["Valdivia", "Concepción", "Valparaíso", "Santiago", "Puerto Montt", "Temuco", "Talca", "Colbún",
+            "Los Ángeles", "Osorno", "La Serena", "Antofagasta", "Pucón", "Chillán", "Rancagua", "Iquique"]
+
+# (edad mínima, edad máxima, peso): infantiles y juveniles son la mayoría en una regata de maratón típica
+DISTRIBUCION_EDADES = [(9, 12, 0.12), (13, 14, 0.14), (15, 16, 0.16), (17, 18, 0.14), (19, 34, 0.22), (35, 49, 0.14), (50, 70, 0.08)]
+# Bandas de categoría: (nombre, edad mínima, edad máxima)
+BANDAS_CATEGORIA = [("INFANTIL", 9, 12), ("CADETE", 13, 14), ("JUVENIL", 15, 16), ("JUNIOR", 17, 18),
+                    ("SENIOR", 19, 99), ("MASTER A", 35, 44), ("MASTER B", 45, 54), ("MASTER C", 55, 99)]
+# (tipo de embarcación, tripulantes, km por vuelta, minutos por km de referencia)
+EMBARCACIONES = [("K1", 1, 3.6, 5.0), ("K2", 2, 3.6, 4.6), ("C1", 1, 3.6, 5.6), ("SUP", 1, 3.6, 7.5),
+                 ("TRAVESIA DOBLE", 2, 3.6, 5.2), ("K4", 4, 3.6, 4.2)]
+PROBABILIDAD_ESTADOS = [('Finalizado', 0.88), ('DNF', 0.05), ('DNS', 0.05), ('DSQ', 0.02)]
+
+def _digito_verificador(numero):
+    suma, factor = 0, 2
+    for digito in reversed(str(numero)):
+        suma += int(digito) * factor
+        factor = 2 if factor == 7 else factor + 1
+    resto = 11 - suma % 11
+    return {11: "0", 10: "K"}.get(resto, str(resto))
+
+def _fecha_nacimiento(rng, anio_referencia):
+    edad_min, edad_max, _ = rng.choices(DISTRIBUCION_EDADES, weights=[peso for *_, peso in DISTRIBUCION_EDADES])[0]
+    edad = rng.randint(edad_min, edad_max)
+    return datetime.date(anio_referencia - edad, rng.randint(1, 12), rng.randint(1, 28)).isoformat()
+
+def _definir_categorias(cantidad):
+    """Combinaciones banda x embarcación x género, de la más común a la menos común, hasta 'cantidad'."""
+    categorias = []
+    for tipo, tripulantes, km_vuelta, min_km in EMBARCACIONES:
+        for banda, edad_min, edad_max in BANDAS_CATEGORIA:
+            for genero, sufijo, nombre_genero in (('Varones', 'M', 'MASCULINO'), ('Damas', 'F', 'FEMENINO')):
+                categorias.append({
+                    'nombre_categoria': f"{tipo} {banda} {nombre_genero}",
+                    'codigo_categoria': f"{tipo.replace(' ', '')}_{banda.replace(' ', '')}_{sufijo}",
+                    'edad_min': edad_min, 'edad_max': edad_max, 'genero': genero, 'tipo_embarcacion': tipo,
+                    'numero_vueltas': 1 if edad_max <= 14 else (3 if banda == "SENIOR" else 2),
+                    'tripulantes': tripulantes, 'minutos_km': min_km,
+                })
+                categorias[-1]['distancia_km'] = round(km_vuelta * categorias[-1]['numero_vueltas'], 1)
+    return categorias[:cantidad]
+
+def _resultado_sintetico(rng, categoria):
+    """(tiempo_final, estado, {vuelta: tiempo_ms}) con vueltas parciales para los DNF."""
+    estado = rng.choices([e for e, _ in PROBABILIDAD_ESTADOS], weights=[p for _, p in PROBABILIDAD_ESTADOS])[0]
+    if estado == 'DNS':
+        return None, estado, {}
+    vueltas = categoria['numero_vueltas']
+    ms_vuelta = categoria['distancia_km'] / vueltas * categoria['minutos_km'] * 60_000 * rng.uniform(0.85, 1.35)
+    tiempos = {v: int(ms_vuelta * rng.uniform(0.95, 1.08)) for v in range(1, vueltas + 1)}
+    if estado == 'DNF':
+        abandono = rng.randint(1, vueltas)   # vuelta en la que abandonó: no se registra
+        tiempos = {v: t for v, t in tiempos.items() if v < abandono}
+        return None, estado, tiempos
+    return formatear_tiempo_ms(sum(tiempos.values())), estado, tiempos
+
+def generar_base_datos(ruta, clubes=40, deportistas=3000, categorias=60, eventos=3, inscripciones_por_evento=1000,
+                       semilla=2025, reemplazar=False):
+    """
+    Crea 'ruta' desde cero y la deja como base de datos activa de database_maraton, en el modo actual (db.MODO_DB).
+    No toca un archivo existente salvo que reemplazar=True. Devuelve (True, resumen) o (False, mensaje).
+    """
+    ruta = os.path.abspath(ruta)
+    if os.path.exists(ruta):
+        if not reemplazar:
+            return False, f"Ya existe {ruta}; usa reemplazar=True (--reemplazar) para sobrescribirla."
+        db.cerrar_base_datos()
+        for sufijo in ("", "-wal", "-shm"):
+            if os.path.exists(ruta + sufijo): os.remove(ruta + sufijo)
+    rng = random.Random(semilla)
+    anio = datetime.date.today().year
+
+    exito, mensaje = db.configurar_base_datos(ruta)
+    if not exito:
+        return False, mensaje
+    db.inicializar_db()
+
+    definiciones = _definir_categorias(categorias)
+    with db.conectar_db() as conn:
+        cursor = conn.cursor()
+        cursor.executemany("INSERT INTO clubes (nombre_club, abreviatura, ciudad) VALUES (?, ?, ?)",
+                           [(f"Club de Canotaje {CIUDADES[i % len(CIUDADES)]}{'' if i < len(CIUDADES) else f' {i // len(CIUDADES) + 1}'}",
+                             f"C{i + 1:03d}", CIUDADES[i % len(CIUDADES)]) for i in range(clubes)])
+        club_ids = [fila[0] for fila in cursor.execute("SELECT id FROM clubes ORDER BY id")]
+        filas_deportistas = []
+        for i in range(deportistas):
+            genero = 'Masculino' if rng.random() < 0.58 else 'Femenino'
+            numero_rut = 8_000_000 + i * 37
+            filas_deportistas.append((rng.choice(NOMBRES[genero]), f"{rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}",
+                                      f"{numero_rut}-{_digito_verificador(numero_rut)}", _fecha_nacimiento(rng, anio), genero,
+                                      rng.choice(club_ids)))
+        cursor.executemany("INSERT INTO participantes (nombre, apellido, rut_o_id, fecha_nacimiento, genero, club_id) VALUES (?, ?, ?, ?, ?, ?)", filas_deportistas)
+        cursor.executemany("INSERT INTO categorias (nombre_categoria, codigo_categoria, edad_min, edad_max, genero, tipo_embarcacion, distancia_km, numero_vueltas) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                           [(c['nombre_categoria'], c['codigo_categoria'], c['edad_min'], c['edad_max'], c['genero'],
+                             c['tipo_embarcacion'], c['distancia_km'], c['numero_vueltas']) for c in definiciones])
+        conn.commit()
+
+    # Deportistas elegibles por categoría (género y edad cumplida en el año)
+    por_rut = {f[2]: f for f in filas_deportistas}
+    with db.conectar_db() as conn:
+        clubes_por_id = dict(conn.execute("SELECT id, nombre_club FROM clubes").fetchall())
+    elegibles = []
+    for c in definiciones:
+        genero = 'Masculino' if c['genero'] == 'Varones' else 'Femenino'
+        elegibles.append([rut for rut, f in por_rut.items()
+                          if f[4] == genero and c['edad_min'] <= anio - int(f[3][:4]) <= c['edad_max']])
+    pesos = [len(e) // c['tripulantes'] for c, e in zip(definiciones, elegibles)]
+    if not any(pesos):
+        return False, "No hay deportistas suficientes para formar ninguna tripulación."
+
+    total_inscripciones = 0
+    for numero_evento in range(1, eventos + 1):
+        fecha = datetime.date(anio, 1, 15) + datetime.timedelta(weeks=4 * (numero_evento - 1))
+        evento_id, mensaje = db.agregar_o_actualizar_evento({'nombre_evento': f"Regata Sintética {numero_evento}", 'fecha': fecha.isoformat(),
+                                                              'lugar': rng.choice(CIUDADES), 'notas': f"Generado con semilla {semilla}"})
+        if not evento_id:
+            return False, mensaje
+        # Un deportista compite a lo más una vez por categoría y evento
+        ocupados, entradas, categorias_entrada = set(), [], []
+        intentos_fallidos = 0
+        while len(entradas) < inscripciones_por_evento and intentos_fallidos < 1000:
+            indice = rng.choices(range(len(definiciones)), weights=pesos)[0]
+            categoria = definiciones[indice]
+            libres = [rut for rut in rng.sample(elegibles[indice], min(len(elegibles[indice]), 8 * categoria['tripulantes']))
+                      if (indice, rut) not in ocupados]
+            if len(libres) < categoria['tripulantes']:
+                intentos_fallidos += 1
+                continue
+            tripulacion = libres[:categoria['tripulantes']]
+            ocupados.update((indice, rut) for rut in tripulacion)
+            entradas.append({'codigo_categoria': categoria['codigo_categoria'], 'numero_competidor': None, 'tripulantes': [
+                {'nombre_completo': f"{por_rut[rut][0]} {por_rut[rut][1]}", 'rut_o_id': rut, 'fecha_nacimiento': por_rut[rut][3],
+                 'genero': por_rut[rut][4], 'club': clubes_por_id[por_rut[rut][5]]} for rut in tripulacion]})
+            categorias_entrada.append(categoria)
+        resultados_importacion = db.importar_inscripciones_lote(evento_id, entradas)
+
+        cambios = []
+        for (inscripcion_id, _), categoria in zip(resultados_importacion, categorias_entrada):
+            if not inscripcion_id: continue
+            tiempo_final, estado, tiempos_vuelta = _resultado_sintetico(rng, categoria)
+            cambios.append({'inscripcion_id': inscripcion_id, 'tiempo_final': tiempo_final, 'estado': estado, 'tiempos_vuelta': tiempos_vuelta})
+        for inicio in range(0, len(cambios), 500):
+            db.aplicar_resultados_lote(cambios[inicio:inicio + 500])
+        total_inscripciones += len(cambios)
+
+    if db.MODO_DB == 'memoria':
+        db.volcar_memoria_a_disco()   # el archivo queda completo al volver, sin esperar al hilo de volcado
+    resumen = {'clubes': clubes, 'deportistas': deportistas, 'categorias': len(definiciones), 'eventos': eventos, 'inscripciones': total_inscripciones}
+    print(f"[INFO] Base de datos sintética creada en {ruta}: {resumen}")
+    return True, resumen
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Genera una base de datos sintética para pruebas de carga.")
+    parser.add_argument("ruta", help="Archivo .db a crear.")
+    parser.add_argument("--clubes", type=int, default=40)
+    parser.add_argument("--deportistas", type=int, default=3000)
+    parser.add_argument("--categorias", type=int, default=60)
+    parser.add_argument("--eventos", type=int, default=3)
+    parser.add_argument("--inscripciones", type=int, default=1000, help="Inscripciones por evento.")
+    parser.add_argument("--semilla", type=int, default=2025)
+    parser.add_argument("--reemplazar", action="store_true", help="Sobrescribir el archivo si existe.")
+    opciones = parser.parse_args(argumentos)
+    exito, resultado = generar_base_datos(opciones.ruta, opciones.clubes, opciones.deportistas, opciones.categorias,
+                                          opciones.eventos, opciones.inscripciones, opciones.semilla, opciones.reemplazar)
+    if not exito:
+        print(f"[ADVERTENCIA] {resultado}")
+    db.cerrar_base_datos()
+    return 0 if exito else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -8,10 +8,16 @@ import base64
 from PySide6.QtGui import QTextDocument, QImage, QPainter
 from PySide6.QtCore import QUrl, QSize, QBuffer
 import database_maraton as db
+from evento_snapshot import EventoSnapshot
 from utils_maraton import resource_path
+import miniaturas_logos
 
-def image_to_base64(path):
-    """Convierte una imagen en una cadena base64 para embeberla en HTML."""
+def image_to_base64(path, tipo=None):
+    """
+    Convierte una imagen en una cadena base64 para embeberla en HTML. Con 'tipo' (ver miniaturas_logos.TAMANOS)
+    se usa la miniatura cacheada de ese tamaño en vez del archivo original.
+    """
+    if tipo: return miniaturas_logos.logo_data_uri(path, tipo)
     if not path or not os.path.exists(path): return ""
     try:
         with open(path, "rb") as image_file:
@@ -37,7 +43,7 @@ def crear_documento_base(titulo_reporte, nombre_evento, fecha_evento, logo_path)
              return "" # Retorna un string vacío si falla, o se lanza la excepción.
         ruta_logo_real = logo_path
         
-    logo_src = image_to_base64(ruta_logo_real)
+    logo_src = image_to_base64(ruta_logo_real, 'cabecera')
     
     html = f"""
     <!DOCTYPE html>
@@ -88,7 +94,7 @@ def finalizar_documento_html(html, sponsor_logo_paths):
     if sponsor_logo_paths:
         sponsors_html += "<div class='sponsors-title'>Auspician:</div><div class='sponsors-container'>"
         for sp_logo_path in sponsor_logo_paths:
-            sp_logo_src = image_to_base64(sp_logo_path)
+            sp_logo_src = image_to_base64(sp_logo_path, 'sponsor')
             if sp_logo_src:
                 sponsors_html += f'<img src="{sp_logo_src}" class="sponsor-logo">'
         sponsors_html += "</div>"
@@ -133,207 +139,197 @@ def document_to_png(doc, output_path=None):
         image.save(buffer, "PNG")
         return buffer.data()
 
-# Se deja como 4 argumentos para consistencia, aunque sistema_puntuacion no se use
-def crear_start_list(evento_id, sistema_puntuacion, logo_path, sponsor_logo_paths):
-    """Genera el Listado de Partida."""
-    # sistema_puntuacion se acepta y se ignora
-    evento_info = db.obtener_info_evento(evento_id)
-    categoria_info = db.obtener_info_categoria(categoria_id)
-    if not evento_info or not categoria_info: return None, None
-    nombre_evento, fecha_evento, nombre_categoria = evento_info[1], evento_info[2], categoria_info[1]
-    
-    html = crear_documento_base(f"Listado de Partida - {nombre_categoria}", nombre_evento, fecha_evento, logo_path)
-    html += """<table><thead><tr><th class="center" style="width:10%;">Nº</th><th style="width:40%;">Nombre Participante</th><th class="center" style="width:15%;">Año Nac.</th><th style="width:35%;">Club</th></tr></thead><tbody>"""
-    
-    inscripciones = db.obtener_inscripciones_por_categoria(evento_id, categoria_id)
+def _logo_html(logo_path):
+    logo_b64 = image_to_base64(logo_path, 'fila')
+    return f'<img src="{logo_b64}" class="club-logo">' if logo_b64 else ''
+
+def _ano_nacimiento(fecha_nac):
+    try: return datetime.datetime.strptime(fecha_nac, "%Y-%m-%d").year if fecha_nac else ""
+    except (ValueError, TypeError): return ""
+
+def _obtener_snapshot(evento_id, snapshot):
+    """Usa la foto del evento recibida o carga una nueva (unas pocas consultas para todo el evento)."""
+    if snapshot is not None and snapshot.evento_id == evento_id:
+        return snapshot
+    return EventoSnapshot.cargar(evento_id)
+
+def _usa_sistema_guardado(snapshot, sistema_puntuacion):
+    if sistema_puntuacion is None: return True
+    return {int(lugar): puntos for lugar, puntos in sistema_puntuacion.items() if puntos} == snapshot.sistema_puntuacion
+
+def _tabla_resultados(inscripciones):
+    """Tabla HTML de resultados (lugar, número, embarcación, tiempo, estado) de una categoría."""
+    html = """<table><thead><tr><th class="rank">Lugar</th><th class="lane">Nº</th><th class="boat">Embarcación</th><th class="time">Tiempo Final</th><th class="time">Estado</th></tr></thead><tbody>"""
     for insc in inscripciones:
-        _, numero, p1_n, p1_fn, p1_c, p1_l, p2_n, p2_fn, p2_c, p2_l, p3_n, p3_fn, p3_c, p3_l, p4_n, p4_fn, p4_c, p4_l, *_ = insc
-        
-        try: ano_p1 = datetime.datetime.strptime(p1_fn, "%Y-%m-%d").year if p1_fn else ""
-        except (ValueError, TypeError): ano_p1 = ""
-        logo1_b64 = image_to_base64(p1_l); logo1_html = f'<img src="{logo1_b64}" class="club-logo">' if logo1_b64 else ''
-        html += f"""<tr><td class="center" rowspan="1">{numero}</td><td>{p1_n}</td><td class="center">{ano_p1}</td><td>{logo1_html}{p1_c or ""}</td></tr>"""
-        
-        if p2_n and p2_n.strip() != ',':
-            try: ano_p2 = datetime.datetime.strptime(p2_fn, "%Y-%m-%d").year if p2_fn else ""
-            except (ValueError, TypeError): ano_p2 = ""
-            logo2_b64 = image_to_base64(p2_l); logo2_html = f'<img src="{logo2_b64}" class="club-logo">' if logo2_b64 else ''
-            html += f"""<tr><td></td><td>{p2_n}</td><td class="center">{ano_p2}</td><td>{logo2_html}{p2_c or ""}</td></tr>"""
-        
-        if p3_n and p3_n.strip() != ',':
-            try: ano_p3 = datetime.datetime.strptime(p3_fn, "%Y-%m-%d").year if p3_fn else ""
-            except (ValueError, TypeError): ano_p3 = ""
-            logo3_b64 = image_to_base64(p3_l); logo3_html = f'<img src="{logo3_b64}" class="club-logo">' if logo3_b64 else ''
-            html += f"""<tr><td></td><td>{p3_n}</td><td class="center">{ano_p3}</td><td>{logo3_html}{p3_c or ""}</td></tr>"""
+        boat_html = f'<div class="boat-details"><p class="club">{_logo_html(insc.logo_club)}{insc.club or "S/C"}</p>'
+        for tripulante in insc.tripulantes:
+            boat_html += format_participant(tripulante.nombre_completo, tripulante.fecha_nacimiento)
+        boat_html += '</div>'
+        html += f"""<tr><td class="rank">{insc.lugar or '-'}</td><td class="lane">{insc.numero}</td><td class="boat">{boat_html}</td><td class="time">{insc.tiempo or '-'}</td><td class="time">{insc.estado or 'Inscrito'}</td></tr>"""
+    html += "</tbody></table>"
+    return html
 
-        if p4_n and p4_n.strip() != ',':
-            try: ano_p4 = datetime.datetime.strptime(p4_fn, "%Y-%m-%d").year if p4_fn else ""
-            except (ValueError, TypeError): ano_p4 = ""
-            logo4_b64 = image_to_base64(p4_l); logo4_html = f'<img src="{logo4_b64}" class="club-logo">' if logo4_b64 else ''
-            html += f"""<tr><td></td><td>{p4_n}</td><td class="center">{ano_p4}</td><td>{logo4_html}{p4_c or ""}</td></tr>"""
-            
+def _tabla_ranking_clubes(puntuacion, con_eventos=False):
+    """Tabla de clasificación por puntos de clubes; con_eventos agrega la columna de eventos disputados (temporadas)."""
+    columna_eventos = "<th class='center'>Eventos</th>" if con_eventos else ""
+    html = f"<table><thead><tr><th class='center'>Lugar</th><th>Club</th><th class='center'>Puntuación Total</th>{columna_eventos}</tr></thead><tbody>"
+    for i, (club, logo, puntos, *resto) in enumerate(puntuacion):
+        celda_eventos = f'<td class="center">{resto[0]}</td>' if con_eventos else ""
+        html += f"""<tr><td class="center">{i+1}</td><td>{_logo_html(logo)}{club}</td><td class="center">{puntos}</td>{celda_eventos}</tr>"""
     html += "</tbody></table>"
+    return html
+
+def _tabla_ranking_deportistas(ranking, con_eventos=False):
+    """Tabla del ranking individual por puntos; con_eventos agrega la columna de eventos disputados (temporadas)."""
+    columna_eventos = "<th class='center'>Eventos</th>" if con_eventos else ""
+    html = f"""<table><thead><tr><th class='center'>Lugar</th><th>Deportista</th><th>Club</th><th class='center'>Puntos</th>{columna_eventos}</tr></thead><tbody>"""
+    for i, data in enumerate(ranking):
+        celda_eventos = f'<td class="center">{data["eventos"]}</td>' if con_eventos else ""
+        html += f"""<tr><td class="center">{i+1}</td><td>{data['nombre']}</td><td>{_logo_html(data.get('logo_path'))}{data['club']}</td><td class="center">{data['puntos']}</td>{celda_eventos}</tr>"""
+    html += "</tbody></table>"
+    return html
+
+def _cerrar_reporte(html, sponsor_logo_paths):
     html = finalizar_documento_html(html, sponsor_logo_paths)
     doc = QTextDocument(); doc.setHtml(html)
     png_bytes = document_to_png(doc)
     return doc, png_bytes
 
-def crear_resultados_categoria(evento_id, categoria_id, logo_path, sponsor_logo_paths):
-    """Genera los Resultados Finales de una categoría."""
-    evento_info = db.obtener_info_evento(evento_id)
-    categoria_info = db.obtener_info_categoria(categoria_id)
-    if not evento_info or not categoria_info: return None, None
-    nombre_evento, fecha_evento, nombre_categoria = evento_info[1], evento_info[2], categoria_info[1]
+# Todas las funciones de reporte aceptan un 'snapshot' opcional (evento_snapshot.EventoSnapshot):
+# al generar varios reportes seguidos se carga el evento una sola vez y se reutiliza.
+
+def crear_start_list(evento_id, categoria_id, logo_path, sponsor_logo_paths, snapshot=None):
+    """Genera el Listado de Partida de una categoría."""
+    snapshot = _obtener_snapshot(evento_id, snapshot)
+    categoria = snapshot.categoria(categoria_id) if snapshot else None
+    if not snapshot or not categoria: return None, None
     
-    html = crear_documento_base(f"Resultados Finales - {nombre_categoria}", nombre_evento, fecha_evento, logo_path)
-    html += """<table><thead><tr><th class="rank">Lugar</th><th class="lane">Nº</th><th class="boat">Embarcación</th><th class="time">Tiempo Final</th><th class="time">Estado</th></tr></thead><tbody>"""
+    html = crear_documento_base(f"Listado de Partida - {categoria.nombre}", snapshot.nombre_evento, snapshot.fecha, logo_path)
+    html += """<table><thead><tr><th class="center" style="width:10%;">Nº</th><th style="width:40%;">Nombre Participante</th><th class="center" style="width:15%;">Año Nac.</th><th style="width:35%;">Club</th></tr></thead><tbody>"""
     
-    inscripciones = db.obtener_inscripciones_por_categoria(evento_id, categoria_id)
-    for insc in inscripciones:
-        _, numero, p1_n, p1_fn, p1_c, p1_l, p2_n, p2_fn, p2_c, p2_l, p3_n, p3_fn, p3_c, p3_l, p4_n, p4_fn, p4_c, p4_l, lugar, tiempo, estado, _ = insc
+    for insc in snapshot.inscripciones_de(categoria_id):
+        tripulantes = insc.tripulantes or (None,)
+        for posicion, tripulante in enumerate(tripulantes):
+            numero = insc.numero if posicion == 0 else ""
+            if tripulante is None:
+                html += f"""<tr><td class="center">{numero}</td><td></td><td class="center"></td><td></td></tr>"""
+                continue
+            html += f"""<tr><td class="center">{numero}</td><td>{tripulante.nombre_completo}</td><td class="center">{_ano_nacimiento(tripulante.fecha_nacimiento)}</td><td>{_logo_html(tripulante.logo_path)}{tripulante.club or ""}</td></tr>"""
+            
+    html += "</tbody></table>"
+    return _cerrar_reporte(html, sponsor_logo_paths)
 
-        logo1_b64 = image_to_base64(p1_l)
-        logo1_html = f'<img src="{logo1_b64}" class="club-logo">' if logo1_b64 else ''
-        
-        boat_html = f'<div class="boat-details"><p class="club">{logo1_html}{p1_c or "S/C"}</p>'
-        boat_html += format_participant(p1_n, p1_fn)
-        if p2_n and p2_n.strip() != ',': boat_html += format_participant(p2_n, p2_fn)
-        if p3_n and p3_n.strip() != ',': boat_html += format_participant(p3_n, p3_fn)
-        if p4_n and p4_n.strip() != ',': boat_html += format_participant(p4_n, p4_fn)
-        boat_html += '</div>'
-        
-        html += f"""<tr><td class="rank">{lugar or '-'}</td><td class="lane">{numero}</td><td class="boat">{boat_html}</td><td class="time">{tiempo or '-'}</td><td class="time">{estado or 'Inscrito'}</td></tr>"""
+def crear_resultados_categoria(evento_id, categoria_id, logo_path, sponsor_logo_paths, snapshot=None):
+    """Genera los Resultados Finales de una categoría."""
+    snapshot = _obtener_snapshot(evento_id, snapshot)
+    categoria = snapshot.categoria(categoria_id) if snapshot else None
+    if not snapshot or not categoria: return None, None
     
-    html += "</tbody></table>"
-    html = finalizar_documento_html(html, sponsor_logo_paths)
-    doc = QTextDocument(); doc.setHtml(html)
-    png_bytes = document_to_png(doc)
-    return doc, png_bytes
+    html = crear_documento_base(f"Resultados Finales - {categoria.nombre}", snapshot.nombre_evento, snapshot.fecha, logo_path)
+    html += _tabla_resultados(snapshot.inscripciones_de(categoria_id))
+    return _cerrar_reporte(html, sponsor_logo_paths)
 
 
-def crear_ranking_puntuacion_pdf(evento_id, sistema_puntuacion, logo_path, sponsor_logo_paths):
-    """Genera el ranking de puntos por club. (4 argumentos, usa sistema_puntuacion)"""
-    evento_info = db.obtener_info_evento(evento_id)
-    if not evento_info: return None, None
-    nombre_evento, fecha_evento = evento_info[1], evento_info[2]
+def crear_ranking_puntuacion_pdf(evento_id, sistema_puntuacion, logo_path, sponsor_logo_paths, snapshot=None):
+    """Genera el ranking de puntos por club. (usa sistema_puntuacion si difiere del guardado)"""
+    snapshot = _obtener_snapshot(evento_id, snapshot)
+    if not snapshot: return None, None
     
-    html = crear_documento_base("Clasificación General por Puntos", nombre_evento, fecha_evento, logo_path)
-    html += "<table><thead><tr><th class='center'>Lugar</th><th>Club</th><th class='center'>Puntuación Total</th></tr></thead><tbody>"
-    
-    puntuacion = db.calcular_puntuacion_clubes(evento_id, sistema_puntuacion)
-    for i, (club, logo, puntos) in enumerate(puntuacion):
-        logo_b64 = image_to_base64(logo)
-        logo_html = f'<img src="{logo_b64}" class="club-logo">' if logo_b64 else ''
-        html += f"""<tr><td class="center">{i+1}</td><td>{logo_html}{club}</td><td class="center">{puntos}</td></tr>"""
-        
-    html += "</tbody></table>"
-    html = finalizar_documento_html(html, sponsor_logo_paths)
-    doc = QTextDocument(); doc.setHtml(html)
-    png_bytes = document_to_png(doc)
-    return doc, png_bytes
+    html = crear_documento_base("Clasificación General por Puntos", snapshot.nombre_evento, snapshot.fecha, logo_path)
+    if _usa_sistema_guardado(snapshot, sistema_puntuacion):
+        puntuacion = snapshot.puntuacion_clubes
+    else:
+        puntuacion = db.calcular_puntuacion_clubes(evento_id, sistema_puntuacion)
+    html += _tabla_ranking_clubes(puntuacion)
+    return _cerrar_reporte(html, sponsor_logo_paths)
 
 
-def crear_ranking_medallas_pdf(evento_id, sistema_puntuacion, logo_path, sponsor_logo_paths):
-    """Genera el ranking de medallas por club (Medallero). (4 argumentos, IGNORA sistema_puntuacion)"""
-    evento_info = db.obtener_info_evento(evento_id)
-    if not evento_info: return None, None
-    nombre_evento, fecha_evento = evento_info[1], evento_info[2]
+def crear_ranking_medallas_pdf(evento_id, sistema_puntuacion, logo_path, sponsor_logo_paths, snapshot=None):
+    """Genera el ranking de medallas por club (Medallero). (IGNORA sistema_puntuacion)"""
+    snapshot = _obtener_snapshot(evento_id, snapshot)
+    if not snapshot: return None, None
     
-    html = crear_documento_base("Medallero por Club", nombre_evento, fecha_evento, logo_path)
+    html = crear_documento_base("Medallero por Club", snapshot.nombre_evento, snapshot.fecha, logo_path)
     html += "<table><thead><tr><th class='center'>Lugar</th><th>Club</th><th class='center'>🥇 Oro</th><th class='center'>🥈 Plata</th><th class='center'>🥉 Bronce</th></tr></thead><tbody>"
     
-    medallero = db.calcular_ranking_medallas(evento_id)
-    for i, (club, logo, oro, plata, bronce) in enumerate(medallero):
-        logo_b64 = image_to_base64(logo)
-        logo_html = f'<img src="{logo_b64}" class="club-logo">' if logo_b64 else ''
-        html += f"""<tr><td class="center">{i+1}</td><td>{logo_html}{club}</td><td class="center">{oro}</td><td class="center">{plata}</td><td class="center">{bronce}</td></tr>"""
+    for i, (club, logo, oro, plata, bronce) in enumerate(snapshot.medallero_clubes):
+        html += f"""<tr><td class="center">{i+1}</td><td>{_logo_html(logo)}{club}</td><td class="center">{oro}</td><td class="center">{plata}</td><td class="center">{bronce}</td></tr>"""
         
     html += "</tbody></table>"
-    html = finalizar_documento_html(html, sponsor_logo_paths)
-    doc = QTextDocument(); doc.setHtml(html)
-    png_bytes = document_to_png(doc)
-    return doc, png_bytes
+    return _cerrar_reporte(html, sponsor_logo_paths)
 
 
-def crear_resultados_completos(evento_id, sistema_puntuacion, logo_path, sponsor_logo_paths):
-    """Genera un reporte con los resultados de todas las categorías. (4 argumentos, IGNORA sistema_puntuacion)"""
-    # sistema_puntuacion se acepta y se ignora
-    evento_info = db.obtener_info_evento(evento_id)
-    if not evento_info: return None, None
-    nombre_evento, fecha_evento = evento_info[1], evento_info[2]
-    html = crear_documento_base("Resultados Completos del Evento", nombre_evento, fecha_evento, logo_path)
-    categorias = db.obtener_categorias()
-    for cat_id, nombre_categoria, *_ in categorias:
-        inscripciones = db.obtener_inscripciones_por_categoria(evento_id, cat_id)
-        if not inscripciones: continue
-        html += f"<h3 style='page-break-before: always;'>Resultados - {nombre_categoria}</h3>"
-        html += """<table><thead><tr><th class="rank">Lugar</th><th class="lane">Nº</th><th class="boat">Embarcación</th><th class="time">Tiempo Final</th><th class="time">Estado</th></tr></thead><tbody>"""
-        for insc in inscripciones:
-            _, numero, p1_n, p1_fn, p1_c, p1_l, p2_n, p2_fn, _, _, p3_n, p3_fn, _, _, p4_n, p4_fn, _, _, lugar, tiempo, estado, _ = insc
-            logo1_b64 = image_to_base64(p1_l)
-            logo1_html = f'<img src="{logo1_b64}" class="club-logo">' if logo1_b64 else ''
-            boat_html = f'<div class="boat-details"><p class="club">{logo1_html}{p1_c or "S/C"}</p>'
-            boat_html += format_participant(p1_n, p1_fn)
-            if p2_n and p2_n.strip() != ',': boat_html += format_participant(p2_n, p2_fn)
-            if p3_n and p3_n.strip() != ',': boat_html += format_participant(p3_n, p3_fn)
-            if p4_n and p4_n.strip() != ',': boat_html += format_participant(p4_n, p4_fn)
-            boat_html += '</div>'
-            html += f"""<tr><td class="rank">{lugar or '-'}</td><td class="lane">{numero}</td><td class="boat">{boat_html}</td><td class="time">{tiempo or '-'}</td><td class="time">{estado or 'Inscrito'}</td></tr>"""
-        html += "</tbody></table>"
-    html = finalizar_documento_html(html, sponsor_logo_paths)
-    doc = QTextDocument(); doc.setHtml(html)
-    png_bytes = document_to_png(doc)
-    return doc, png_bytes
+def crear_resultados_completos(evento_id, sistema_puntuacion, logo_path, sponsor_logo_paths, snapshot=None):
+    """Genera un reporte con los resultados de todas las categorías con inscritos. (IGNORA sistema_puntuacion)"""
+    snapshot = _obtener_snapshot(evento_id, snapshot)
+    if not snapshot: return None, None
+    html = crear_documento_base("Resultados Completos del Evento", snapshot.nombre_evento, snapshot.fecha, logo_path)
+    for categoria in snapshot.categorias_con_inscripciones():
+        html += f"<h3 style='page-break-before: always;'>Resultados - {categoria.nombre}</h3>"
+        html += _tabla_resultados(snapshot.inscripciones_de(categoria.id))
+    return _cerrar_reporte(html, sponsor_logo_paths)
 
-def crear_ranking_deportistas_puntos(evento_id, sistema_puntuacion, logo_path, sponsor_logo_paths):
-    """Genera el ranking individual de deportistas por puntos. (4 argumentos, usa sistema_puntuacion)"""
-    evento_info = db.obtener_info_evento(evento_id)
-    if not evento_info: return None, None
-    nombre_evento, fecha_evento = evento_info[1], evento_info[2]
-    html = crear_documento_base("Ranking Individual por Puntos", nombre_evento, fecha_evento, logo_path)
-    html += """<table><thead><tr><th class='center'>Lugar</th><th>Deportista</th><th>Club</th><th class='center'>Puntos</th></tr></thead><tbody>"""
-    ranking = db.calcular_puntuacion_deportistas(evento_id, sistema_puntuacion)
-    for i, data in enumerate(ranking):
-        logo_b64 = image_to_base64(data.get('logo_path'))
-        logo_html = f'<img src="{logo_b64}" class="club-logo">' if logo_b64 else ''
-        html += f"""<tr><td class="center">{i+1}</td><td>{data['nombre']}</td><td>{logo_html}{data['club']}</td><td class="center">{data['puntos']}</td></tr>"""
-    html += "</tbody></table>"
-    html = finalizar_documento_html(html, sponsor_logo_paths)
-    doc = QTextDocument(); doc.setHtml(html)
-    png_bytes = document_to_png(doc)
-    return doc, png_bytes
+def crear_ranking_deportistas_puntos(evento_id, sistema_puntuacion, logo_path, sponsor_logo_paths, snapshot=None):
+    """Genera el ranking individual de deportistas por puntos. (usa sistema_puntuacion si difiere del guardado)"""
+    snapshot = _obtener_snapshot(evento_id, snapshot)
+    if not snapshot: return None, None
+    html = crear_documento_base("Ranking Individual por Puntos", snapshot.nombre_evento, snapshot.fecha, logo_path)
+    if _usa_sistema_guardado(snapshot, sistema_puntuacion):
+        ranking = snapshot.puntuacion_deportistas
+    else:
+        ranking = db.calcular_puntuacion_deportistas(evento_id, sistema_puntuacion)
+    html += _tabla_ranking_deportistas(ranking)
+    return _cerrar_reporte(html, sponsor_logo_paths)
 
-def crear_ranking_deportistas_medallas(evento_id, sistema_puntuacion, logo_path, sponsor_logo_paths):
-    """Genera el ranking individual de deportistas por medallas. (4 argumentos, IGNORA sistema_puntuacion)"""
-    # sistema_puntuacion se acepta y se ignora
-    evento_info = db.obtener_info_evento(evento_id)
-    if not evento_info: return None, None
-    nombre_evento, fecha_evento = evento_info[1], evento_info[2]
-    html = crear_documento_base("Ranking Individual por Medallas", nombre_evento, fecha_evento, logo_path)
+def crear_ranking_deportistas_medallas(evento_id, sistema_puntuacion, logo_path, sponsor_logo_paths, snapshot=None):
+    """Genera el ranking individual de deportistas por medallas. (IGNORA sistema_puntuacion)"""
+    snapshot = _obtener_snapshot(evento_id, snapshot)
+    if not snapshot: return None, None
+    html = crear_documento_base("Ranking Individual por Medallas", snapshot.nombre_evento, snapshot.fecha, logo_path)
     html += """<table><thead><tr><th class='center'>Lugar</th><th>Deportista</th><th>Club</th><th class='center'>🥇</th><th class='center'>🥈</th><th class='center'>🥉</th></tr></thead><tbody>"""
-    medallero = db.calcular_ranking_medallas_deportistas(evento_id)
-    for i, data in enumerate(medallero):
-        logo_b64 = image_to_base64(data.get('logo_path'))
-        logo_html = f'<img src="{logo_b64}" class="club-logo">' if logo_b64 else ''
-        html += f"""<tr><td class="center">{i+1}</td><td>{data['nombre']}</td><td>{logo_html}{data['club']}</td><td class="center">{data['oro']}</td><td class="center">{data['plata']}</td><td class="center">{data['bronce']}</td></tr>"""
+    for i, data in enumerate(snapshot.medallero_deportistas):
+        html += f"""<tr><td class="center">{i+1}</td><td>{data['nombre']}</td><td>{_logo_html(data.get('logo_path'))}{data['club']}</td><td class="center">{data['oro']}</td><td class="center">{data['plata']}</td><td class="center">{data['bronce']}</td></tr>"""
     html += "</tbody></table>"
-    html = finalizar_documento_html(html, sponsor_logo_paths)
-    doc = QTextDocument(); doc.setHtml(html)
-    png_bytes = document_to_png(doc)
-    return doc, png_bytes
+    return _cerrar_reporte(html, sponsor_logo_paths)
 
-def crear_programa_evento_pdf(evento_id, sistema_puntuacion, logo_path, sponsor_logo_paths):
-    """Genera el Programa Oficial del Evento con horarios. (4 argumentos, IGNORA sistema_puntuacion)"""
-    evento_info = db.obtener_info_evento(evento_id)
-    if not evento_info: return None, None
-    nombre_evento, fecha_evento = evento_info[1], evento_info[2]
-    html = crear_documento_base("Programa Oficial de Regatas", nombre_evento, fecha_evento, logo_path)
+def crear_programa_evento_pdf(evento_id, sistema_puntuacion, logo_path, sponsor_logo_paths, snapshot=None):
+    """Genera el Programa Oficial del Evento con horarios. (IGNORA sistema_puntuacion)"""
+    snapshot = _obtener_snapshot(evento_id, snapshot)
+    if not snapshot: return None, None
+    html = crear_documento_base("Programa Oficial de Regatas", snapshot.nombre_evento, snapshot.fecha, logo_path)
     html += """<table><thead><tr><th class="center" style="width:20%;">Hora</th><th style="width:80%;">Categoría</th></tr></thead><tbody>"""
-    programa = db.obtener_programa_pruebas(evento_id)
-    for cat_id, nombre_cat, codigo_cat, hora in programa:
-        html += f"""<tr><td class="center"><b>{hora or 'A definir'}</b></td><td>{nombre_cat} ({codigo_cat})</td></tr>"""
+    for item in snapshot.programa:
+        html += f"""<tr><td class="center"><b>{item.hora_inicio or 'A definir'}</b></td><td>{item.nombre_categoria} ({item.codigo_categoria})</td></tr>"""
     html += "</tbody></table>"
-    html = finalizar_documento_html(html, sponsor_logo_paths)
-    doc = QTextDocument(); doc.setHtml(html)
-    png_bytes = document_to_png(doc)
-    return doc, png_bytes
\ No newline at end of file
+    return _cerrar_reporte(html, sponsor_logo_paths)
+
+# --- Reportes de temporada ---
+
+def _cabecera_temporada(titulo, temporada_id, logo_path):
+    temporada = db.obtener_info_temporada(temporada_id)
+    if not temporada: return None
+    _, nombre, anio, mejores_n = temporada
+    eventos = db.obtener_eventos_temporada(temporada_id)
+    if mejores_n == 1 and len(eventos) > 1:
+        criterio = f"Suma el mejor resultado de {len(eventos)} eventos"
+    elif mejores_n and mejores_n < len(eventos):
+        criterio = f"Suman los {mejores_n} mejores resultados de {len(eventos)} eventos"
+    else:
+        criterio = f"Suman todos los eventos ({len(eventos)})"
+    html = crear_documento_base(titulo, nombre, anio or "", logo_path)
+    html += f"<p class='center'>{criterio}: {', '.join(nombre_evento for _, nombre_evento, _ in eventos)}</p>"
+    return html
+
+def crear_ranking_temporada_clubes_pdf(temporada_id, logo_path, sponsor_logo_paths=None):
+    """Genera la clasificación de clubes de la temporada (mejores N eventos de cada club)."""
+    html = _cabecera_temporada("Ranking de Temporada por Clubes", temporada_id, logo_path)
+    if html is None: return None, None
+    html += _tabla_ranking_clubes(db.calcular_ranking_temporada_clubes(temporada_id), con_eventos=True)
+    return _cerrar_reporte(html, sponsor_logo_paths or [])
+
+def crear_ranking_temporada_deportistas_pdf(temporada_id, logo_path, sponsor_logo_paths=None):
+    """Genera el ranking individual de la temporada (mejores N eventos de cada deportista)."""
+    html = _cabecera_temporada("Ranking Individual de Temporada", temporada_id, logo_path)
+    if html is None: return None, None
+    html += _tabla_ranking_deportistas(db.calcular_ranking_temporada_deportistas(temporada_id), con_eventos=True)
+    return _cerrar_reporte(html, sponsor_logo_paths or [])
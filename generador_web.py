@@ -5,20 +5,15 @@ import os
 import shutil
 from PySide6.QtGui import QTextDocument
 import database_maraton as db
-# Se añade una importación condicional para manejar el sistema de puntuación
-try:
-    from database_maraton import obtener_sistema_puntuacion_activo 
-except ImportError:
-    # Si la función no existe, definimos un valor por defecto
-    def obtener_sistema_puntuacion_activo(evento_id):
-        return [25, 18, 15, 12, 10, 8, 6, 4, 2, 1] 
-
+from evento_snapshot import EventoSnapshot
 
 from generador_pdf_reportes import (
     crear_resultados_categoria, 
     crear_ranking_puntuacion_pdf, 
     crear_ranking_medallas_pdf,
     crear_programa_evento_pdf,
+    crear_ranking_temporada_clubes_pdf,
+    crear_ranking_temporada_deportistas_pdf,
     image_to_base64
 )
 from utils_maraton import resource_path
@@ -157,30 +152,26 @@ def crear_pagina_html(titulo, cuerpo_html, ruta_css="style.css", back_link="inde
 </html>
 """
 
-def generar_todos_los_reportes(evento_id, ruta_destino, generar_todo=False):
+def generar_todos_los_reportes(evento_id, ruta_destino, generar_todo=False, snapshot=None):
     """
     Genera los archivos HTML para cada reporte de la regata.
     Crea un índice para navegar entre ellos.
     """
-    evento_info = db.obtener_info_evento(evento_id)
-    if not evento_info: return False
-    nombre_evento, fecha_evento = evento_info[1], evento_info[2]
+    if snapshot is None:
+        snapshot = EventoSnapshot.cargar(evento_id)
+    if not snapshot: return False
+    nombre_evento, fecha_evento = snapshot.nombre_evento, snapshot.fecha
     
     ruta_resultados = os.path.join(ruta_destino, "resultados")
     os.makedirs(ruta_resultados, exist_ok=True)
     
     enlaces_reportes = []
     
-    # 0. Obtener sistema de puntuación para el ranking de puntos
-    try:
-        sistema_puntuacion = obtener_sistema_puntuacion_activo(evento_id)
-    except Exception as e:
-        print(f"ADVERTENCIA: No se pudo obtener el sistema de puntuación ({e}). Usando valor por defecto [25, 18, ...]")
-        sistema_puntuacion = [25, 18, 15, 12, 10, 8, 6, 4, 2, 1] 
+    # 0. Sistema de puntuación guardado para el evento (el mismo que usan la pestaña Puntuación y los PDF)
+    sistema_puntuacion = snapshot.sistema_puntuacion
 
     # 1. Obtener los logos de sponsor 
-    sponsors = db.obtener_sponsors_por_evento(evento_id)
-    sponsor_logo_paths = [s[2] for s in sponsors] # Esto debe ser una lista de rutas (strings)
+    sponsor_logo_paths = snapshot.sponsor_logo_paths
     
     # 2. Reportes fijos
     reportes_fijos = [
@@ -198,7 +189,7 @@ def generar_todos_los_reportes(evento_id, ruta_destino, generar_todo=False):
             # aceptan cuatro argumentos (el segundo es sistema_puntuacion).
             # Si crear_ranking_medallas_pdf o crear_programa_evento_pdf no usan el sistema_puntuacion,
             # simplemente deben aceptar el argumento y ignorarlo internamente.
-            doc, _ = funcion_creadora(evento_id, sistema_puntuacion, 'logo.png', sponsor_logo_paths)
+            doc, _ = funcion_creadora(evento_id, sistema_puntuacion, 'logo.png', sponsor_logo_paths, snapshot=snapshot)
             
             doc_html = doc.toHtml()
             
@@ -214,11 +205,10 @@ def generar_todos_los_reportes(evento_id, ruta_destino, generar_todo=False):
             
     # 3. Reportes de categorías individuales
     if generar_todo:
-        categorias = db.obtener_categorias()
-        for cat_id, nombre_cat, _, _, _, _, _, _, _ in categorias:
+        # Solo las categorías con inscritos; las vacías darían páginas en blanco
+        for cat_id, nombre_cat, *_ in snapshot.categorias_con_inscripciones():
             try:
-                # Esta función requiere 4 argumentos: evento_id, cat_id, logo_path, sponsor_logo_paths
-                doc, _ = crear_resultados_categoria(evento_id, cat_id, 'logo.png', sponsor_logo_paths)
+                doc, _ = crear_resultados_categoria(evento_id, cat_id, 'logo.png', sponsor_logo_paths, snapshot=snapshot)
                 doc_html = doc.toHtml()
                 
                 if doc_html:
@@ -262,23 +252,23 @@ def generar_estilos_css(ruta_destino):
         print(f"Error al escribir el archivo CSS: {e}")
         return False
 
-def generar_pagina_inicio_evento(evento_id, ruta_destino):
+def generar_pagina_inicio_evento(evento_id, ruta_destino, snapshot=None):
     """Genera la página de inicio del sitio web con información del evento y links a los reportes."""
-    evento_info = db.obtener_info_evento(evento_id)
-    if not evento_info: return
+    if snapshot is None:
+        snapshot = EventoSnapshot.cargar(evento_id)
+    if not snapshot: return
     
-    nombre_evento, fecha_evento, lugar_evento, notas_evento = evento_info[1:5]
+    nombre_evento, fecha_evento, lugar_evento, notas_evento = snapshot.nombre_evento, snapshot.fecha, snapshot.lugar, snapshot.notas
     
     # El logo de la cabecera se incrusta en el HTML como base64
     logo_path_header = resource_path('logo.png')
-    logo_src = image_to_base64(logo_path_header)
+    logo_src = image_to_base64(logo_path_header, 'web_cabecera')
     
-    sponsors = db.obtener_sponsors_por_evento(evento_id)
     sponsors_html = ""
-    for _, _, logo_path in sponsors:
+    for _, _, logo_path in snapshot.sponsors:
         # Se comprueba la existencia de la ruta ANTES de procesar
         if os.path.exists(logo_path):
-            sponsor_logo_src = image_to_base64(logo_path)
+            sponsor_logo_src = image_to_base64(logo_path, 'web_sponsor')
             if sponsor_logo_src:
                 # Aplicamos la clase CSS para controlar el tamaño
                 sponsors_html += f'<img src="{sponsor_logo_src}" class="sponsor-logo-footer">'
@@ -326,14 +316,61 @@ def generar_sitio_completo(evento_id, ruta_destino, generar_todo=False):
     if not generar_estilos_css(ruta_destino):
         return False, "Error al generar los estilos CSS."
     
+    # El evento se lee una sola vez y todas las páginas se generan desde memoria
+    snapshot = EventoSnapshot.cargar(evento_id)
+    if snapshot is None:
+        return False, "El evento seleccionado no existe."
+
     # 2. Generar todos los reportes (PDF to HTML conversion and index)
-    if not generar_todos_los_reportes(evento_id, ruta_destino, generar_todo):
+    if not generar_todos_los_reportes(evento_id, ruta_destino, generar_todo, snapshot=snapshot):
         return False, "Error al generar los reportes individuales y el índice de resultados."
     
     # 3. Generar la página de inicio (index.html principal)
     try:
-        generar_pagina_inicio_evento(evento_id, ruta_destino)
+        generar_pagina_inicio_evento(evento_id, ruta_destino, snapshot=snapshot)
     except Exception as e:
         return False, f"Error al generar la página de inicio (index.html): {e}"
 
-    return True, f"Sitio web generado con éxito en: {ruta_destino}"
\ No newline at end of file
+    return True, f"Sitio web generado con éxito en: {ruta_destino}"
+
+def generar_sitio_temporada(temporada_id, ruta_destino):
+    """
+    Genera el sitio estático de una temporada: índice con los eventos que la componen
+    y las páginas de ranking de clubes y de deportistas.
+    """
+    temporada = db.obtener_info_temporada(temporada_id)
+    if temporada is None:
+        return False, "La temporada seleccionada no existe."
+    _, nombre_temporada, anio, _ = temporada
+    os.makedirs(ruta_destino, exist_ok=True)
+    if not generar_estilos_css(ruta_destino):
+        return False, "Error al generar los estilos CSS."
+
+    paginas = [
+        ("Ranking de Temporada por Clubes", "ranking_clubes.html", crear_ranking_temporada_clubes_pdf),
+        ("Ranking Individual de Temporada", "ranking_deportistas.html", crear_ranking_temporada_deportistas_pdf),
+    ]
+    enlaces = ""
+    for titulo, nombre_archivo, funcion_creadora in paginas:
+        try:
+            doc, _ = funcion_creadora(temporada_id, 'logo.png')
+            pagina_completa = crear_pagina_html(f"{titulo} | {nombre_temporada}", doc.toHtml(), ruta_css="style.css", back_link="index.html")
+            with open(os.path.join(ruta_destino, nombre_archivo), "w", encoding="utf-8") as f:
+                f.write(pagina_completa)
+            enlaces += f"<li><a href='{nombre_archivo}'>{titulo}</a></li>"
+        except Exception as e:
+            print(f"Error generando {titulo}: {e}")
+
+    eventos_html = "".join(f"<li>{nombre_evento} ({fecha})</li>" for _, nombre_evento, fecha in db.obtener_eventos_temporada(temporada_id))
+    html = f"""
+    <div class="header">
+        <h1>{nombre_temporada}</h1>
+        <h2>Temporada {anio or ''}</h2>
+    </div>
+    <ul class="report-list">{enlaces}</ul>
+    <h3>Eventos de la temporada</h3>
+    <ul>{eventos_html or "<li><i>(Sin eventos)</i></li>"}</ul>
+    """
+    with open(os.path.join(ruta_destino, "index.html"), "w", encoding="utf-8") as f:
+        f.write(crear_pagina_html(f"Temporada: {nombre_temporada}", html, ruta_css="style.css", back_link="#"))
+    return True, f"Sitio de la temporada generado con éxito en: {ruta_destino}"
@@ -48,6 +48,8 @@ class GeneracionWebThread(QThread):
             self.finalizado.emit(True, f"Sitio web generado correctamente en:\n{self.ruta_destino}")
         except Exception as e:
             self.finalizado.emit(False, f"Error al generar el sitio web: {e}")
+        finally:
+            db.cerrar_conexion_hilo()
 
 class GeneradorWebDialog(QDialog):
     def __init__(self, evento_id, parent=None):
@@ -114,17 +114,29 @@ class ImportadorCsvDialog(QDialog):
                 
                 exitos = 0
                 fallos = 0
+                entradas, filas_entradas = [], []
                 
                 for i, fila in enumerate(lector_csv):
-                    fila_limpia = {k.strip(): v.strip() for k, v in fila.items()}
+                    fila_limpia = {k.strip(): (v or '').strip() for k, v in fila.items() if k}
                     self.progress_bar.setValue(i + 1)
                     try:
-                        self.procesar_fila(fila_limpia)
-                        exitos += 1
+                        entradas.append(self.construir_entrada(fila_limpia))
+                        filas_entradas.append(i + 2)
                     except Exception as e:
                         fallos += 1
                         self.log(f"<b><font color='red'>ERROR en fila {i+2}:</font></b> {e}")
                 
+                # Todas las filas válidas se guardan en una sola transacción
+                self.log(f"Guardando {len(entradas)} inscripciones...")
+                resultados = db.importar_inscripciones_lote(self.evento_id, entradas)
+                for numero_fila, entrada, (insc_id, mensaje) in zip(filas_entradas, entradas, resultados):
+                    if insc_id:
+                        exitos += 1
+                        self.log(f"ÉXITO Fila {numero_fila}: {mensaje} Categoría '{entrada['codigo_categoria']}'.")
+                    else:
+                        fallos += 1
+                        self.log(f"<b><font color='red'>ERROR en fila {numero_fila}:</font></b> {mensaje}")
+                
                 self.log("\n--- Proceso de importación finalizado ---")
                 resumen = (f"Resumen:\n"
                            f" - Filas procesadas: {total_filas}\n"
@@ -140,60 +152,40 @@ class ImportadorCsvDialog(QDialog):
         
         self.btn_iniciar_importacion.setEnabled(True)
 
-    def procesar_fila(self, fila):
-        """Procesa una única fila del archivo CSV."""
+    def construir_entrada(self, fila):
+        """Convierte una fila del CSV en una entrada para db.importar_inscripciones_lote."""
         codigo_categoria = fila.get('Codigo Categoria')
         if not codigo_categoria:
             raise ValueError("La columna 'Codigo Categoria' es obligatoria y no puede estar vacía.")
 
-        categoria_id = db.obtener_categoria_por_codigo(codigo_categoria)
-        if not categoria_id:
-            raise ValueError(f"La categoría con código '{codigo_categoria}' no fue encontrada en la base de datos. Por favor, créala primero.")
-
-        participantes_ids = []
-        for i in range(1, 5):
+        tripulantes = []
+        num_tripulantes = sum(1 for columna in fila if columna.startswith('Nombre Completo P'))
+        for i in range(1, num_tripulantes + 1):
             nombre_completo = fila.get(f'Nombre Completo P{i}')
             rut = fila.get(f'RUT P{i}')
             
             if nombre_completo and rut:
-                datos_p = {
+                tripulantes.append({
                     'nombre_completo': nombre_completo,
                     'rut_o_id': rut,
                     'fecha_nacimiento': fila.get(f'Fecha Nacimiento P{i}'),
                     'genero': fila.get(f'Genero P{i}'),
                     'club': fila.get(f'Club P{i}')
-                }
-                participante_id = db.buscar_o_crear_participante(datos_p)
-                if participante_id:
-                    participantes_ids.append(participante_id)
-                else:
-                    raise ValueError(f"No se pudo buscar o crear al participante {i} ({nombre_completo}).")
+                })
         
-        if not participantes_ids:
+        if not tripulantes:
             raise ValueError("La inscripción no contiene ningún participante válido.")
 
         numero_competidor_str = fila.get('Numero Competidor')
+        numero_competidor = None # Sin número se asigna el siguiente disponible de la categoría
         if numero_competidor_str:
             try:
                 numero_competidor = int(numero_competidor_str)
             except ValueError:
                 raise ValueError(f"El 'Numero Competidor' ('{numero_competidor_str}') no es un número válido.")
-        else:
-            self.log(f"INFO Fila {self.progress_bar.value()}: 'Numero Competidor' no encontrado. Asignando el siguiente número disponible...")
-            numero_competidor = db.obtener_siguiente_numero_competidor(self.evento_id, categoria_id)
 
-        datos_inscripcion = {
-            'evento_id': self.evento_id,
-            'categoria_id': categoria_id,
+        return {
+            'codigo_categoria': codigo_categoria,
             'numero_competidor': numero_competidor,
-            'participante1_id': participantes_ids[0] if len(participantes_ids) > 0 else None,
-            'participante2_id': participantes_ids[1] if len(participantes_ids) > 1 else None,
-            'participante3_id': participantes_ids[2] if len(participantes_ids) > 2 else None,
-            'participante4_id': participantes_ids[3] if len(participantes_ids) > 3 else None,
+            'tripulantes': tripulantes,
         }
-
-        insc_id, mensaje = db.inscribir_embarcacion(datos_inscripcion)
-        if "Error" in mensaje:
-            raise Exception(mensaje)
-        
-        self.log(f"ÉXITO Fila {self.progress_bar.value()}: Inscripción para Nº{numero_competidor} en categoría '{codigo_categoria}' guardada.")
@@ -50,6 +50,7 @@ class InscripcionesTabWidget(QWidget):
         super().__init__()
         self.id_evento_activo = None
         self.nombre_evento_activo = "Ninguno"
+        self.evento_archivado = False
         self.id_categoria_activa = None
         self.id_inscripcion_seleccionada = None
         
@@ -84,11 +85,12 @@ class InscripcionesTabWidget(QWidget):
         layout_seleccion.addWidget(self.btn_exportar_csv)
         layout_principal.addWidget(panel_seleccion)
 
-        panel_inscripcion = QGroupBox("Nueva Inscripción")
-        layout_inscripcion = QFormLayout(panel_inscripcion)
+        self.panel_inscripcion = QGroupBox("Nueva Inscripción")
+        layout_inscripcion = QFormLayout(self.panel_inscripcion)
         
         self.numero_competidor_input = QSpinBox()
-        self.numero_competidor_input.setRange(1, 9999)
+        self.numero_competidor_input.setRange(0, db.NUMERO_MAXIMO_COMPETIDOR)
+        self.numero_competidor_input.setSpecialValueText("Automático")  # 0 = primer número libre (respeta reservas)
         
         layout_p1 = QHBoxLayout()
         self.label_p1 = QLabel("<i>(Ninguno seleccionado)</i>")
@@ -129,7 +131,7 @@ class InscripcionesTabWidget(QWidget):
         layout_inscripcion.addRow("Participante 3:", layout_p3)
         layout_inscripcion.addRow("Participante 4:", layout_p4)
         layout_inscripcion.addRow(self.btn_guardar_inscripcion)
-        layout_principal.addWidget(panel_inscripcion)
+        layout_principal.addWidget(self.panel_inscripcion)
 
         panel_tabla = QGroupBox("Inscripciones en la Categoría Seleccionada")
         layout_tabla = QVBoxLayout(panel_tabla)
@@ -229,13 +231,11 @@ class InscripcionesTabWidget(QWidget):
         try:
             inscripciones = db.obtener_inscripciones_para_exportar(self.id_evento_activo)
             
-            headers = [
-                'Codigo Categoria', 'Numero Competidor', 
-                'Nombre Completo P1', 'RUT P1', 'Fecha Nacimiento P1', 'Genero P1', 'Club P1',
-                'Nombre Completo P2', 'RUT P2', 'Fecha Nacimiento P2', 'Genero P2', 'Club P2',
-                'Nombre Completo P3', 'RUT P3', 'Fecha Nacimiento P3', 'Genero P3', 'Club P3',
-                'Nombre Completo P4', 'RUT P4', 'Fecha Nacimiento P4', 'Genero P4', 'Club P4'
-            ]
+            # Al menos 4 tripulantes (formato histórico); más columnas si hay botes K-6/K-8.
+            max_tripulantes = max([4] + [(len(fila) - 2) // 5 for fila in inscripciones])
+            headers = ['Codigo Categoria', 'Numero Competidor']
+            for n in range(1, max_tripulantes + 1):
+                headers += [f'Nombre Completo P{n}', f'RUT P{n}', f'Fecha Nacimiento P{n}', f'Genero P{n}', f'Club P{n}']
 
             with open(ruta_archivo, 'w', newline='', encoding='utf-8-sig') as f:
                 writer = csv.writer(f, delimiter=';')
@@ -258,6 +258,12 @@ class InscripcionesTabWidget(QWidget):
         self.id_evento_activo = evento_id
         self.nombre_evento_activo = nombre_evento
         self.label_evento_activo.setText(f"<b>Evento Activo:</b> {self.nombre_evento_activo}")
+        # Un evento archivado se consulta desde su archivo de temporada pero no se edita
+        self.evento_archivado = evento_id in db.obtener_archivos_eventos()
+        if self.evento_archivado:
+            self.label_evento_activo.setText(f"<b>Evento Activo:</b> {self.nombre_evento_activo} <i>(archivado, solo lectura)</i>")
+        for widget in (self.panel_inscripcion, self.btn_importar_csv, self.btn_editar_numero, self.btn_eliminar_inscripcion):
+            widget.setEnabled(not self.evento_archivado)
         self.cargar_combo_categorias()
     
     def cargar_combo_categorias(self):
@@ -320,7 +326,7 @@ class InscripcionesTabWidget(QWidget):
             'participante2_id': self.participante2_seleccionado['id'] if self.participante2_seleccionado else None,
             'participante3_id': self.participante3_seleccionado['id'] if self.participante3_seleccionado else None,
             'participante4_id': self.participante4_seleccionado['id'] if self.participante4_seleccionado else None,
-            'numero_competidor': self.numero_competidor_input.value()
+            'numero_competidor': self.numero_competidor_input.value() or None
         }
         
         insc_id, mensaje = db.inscribir_embarcacion(datos)
@@ -353,50 +359,29 @@ class InscripcionesTabWidget(QWidget):
             QMessageBox.critical(self, "Error de Datos", f"Datos de evento o categoría inválidos: {e}")
             return
         
-        inscripciones = db.obtener_inscripciones_por_categoria(self.id_evento_activo, self.id_categoria_activa)
+        inscripciones = db.obtener_inscripciones_con_tripulacion(self.id_evento_activo, self.id_categoria_activa)
         
-        for row_idx, row_data in enumerate(inscripciones):
+        for row_idx, insc in enumerate(inscripciones):
             self.tabla_inscripciones.insertRow(row_idx)
             
-            # ID
-            self.tabla_inscripciones.setItem(row_idx, 0, QTableWidgetItem(str(row_data[0])))
-            # Número
-            self.tabla_inscripciones.setItem(row_idx, 1, QTableWidgetItem(str(row_data[1])))
-            # Participante 1
-            self.tabla_inscripciones.setItem(row_idx, 2, QTableWidgetItem(row_data[2] or ""))
-            # Club 1
-            self.tabla_inscripciones.setItem(row_idx, 3, QTableWidgetItem(row_data[3] or ""))
-            # Participante 2
-            self.tabla_inscripciones.setItem(row_idx, 4, QTableWidgetItem(row_data[5] or ""))
-            # Club 2
-            self.tabla_inscripciones.setItem(row_idx, 5, QTableWidgetItem(row_data[6] or ""))
-            # Participante 3
-            self.tabla_inscripciones.setItem(row_idx, 6, QTableWidgetItem(row_data[8] or ""))
-            # Club 3
-            self.tabla_inscripciones.setItem(row_idx, 7, QTableWidgetItem(row_data[9] or ""))
-            # Participante 4
-            self.tabla_inscripciones.setItem(row_idx, 8, QTableWidgetItem(row_data[11] or ""))
-            # Club 4
-            self.tabla_inscripciones.setItem(row_idx, 9, QTableWidgetItem(row_data[12] or ""))
-            # Lugar
-            self.tabla_inscripciones.setItem(row_idx, 10, QTableWidgetItem(str(row_data[14]) if row_data[14] else ""))
-            # Tiempo
-            self.tabla_inscripciones.setItem(row_idx, 11, QTableWidgetItem(row_data[15] or ""))
-            # Estado
-            self.tabla_inscripciones.setItem(row_idx, 12, QTableWidgetItem(row_data[16] or 'Inscrito'))
+            self.tabla_inscripciones.setItem(row_idx, 0, QTableWidgetItem(str(insc.id)))
+            self.tabla_inscripciones.setItem(row_idx, 1, QTableWidgetItem(str(insc.numero)))
+            # Participantes y clubes: columnas 2..9 en pares (P1, Club 1, ..., P4, Club 4)
+            for posicion in range(4):
+                tripulante = insc.tripulantes[posicion] if posicion < len(insc.tripulantes) else None
+                self.tabla_inscripciones.setItem(row_idx, 2 + posicion * 2, QTableWidgetItem(tripulante.nombre_completo if tripulante else ""))
+                self.tabla_inscripciones.setItem(row_idx, 3 + posicion * 2, QTableWidgetItem((tripulante.club or "") if tripulante else ""))
+            self.tabla_inscripciones.setItem(row_idx, 10, QTableWidgetItem(str(insc.lugar) if insc.lugar else ""))
+            self.tabla_inscripciones.setItem(row_idx, 11, QTableWidgetItem(insc.tiempo or ""))
+            self.tabla_inscripciones.setItem(row_idx, 12, QTableWidgetItem(insc.estado or 'Inscrito'))
+            if len(insc.tripulantes) > 4:
+                self.tabla_inscripciones.item(row_idx, 1).setToolTip("\n".join(t.nombre_completo for t in insc.tripulantes))
             
-            # Verificar edades de los participantes
+            # Verificar edades de toda la tripulación
             edad_correcta = True
-            ids_participantes = list(filter(None, [row_data[4], row_data[7], row_data[10], row_data[13]]))
-            
-            for p_id in ids_participantes:
-                participante_db = db.obtener_info_participante(p_id)
-                if not participante_db or not participante_db[4]: 
-                    edad_correcta = False
-                    break
-                
+            for tripulante in insc.tripulantes:
                 try:
-                    fecha_nac_part = datetime.datetime.strptime(participante_db[4], "%Y-%m-%d").date()
+                    fecha_nac_part = datetime.datetime.strptime(tripulante.fecha_nacimiento, "%Y-%m-%d").date()
                     edad_calendario = ano_competicion - fecha_nac_part.year
                     
                     if not (edad_min_cat <= edad_calendario <= edad_max_cat): 
@@ -443,6 +428,6 @@ class InscripcionesTabWidget(QWidget):
         self.label_p2.setText("<i>(Opcional)</i>")
         self.label_p3.setText("<i>(Opcional)</i>")
         self.label_p4.setText("<i>(Opcional)</i>")
-        self.numero_competidor_input.setValue(1)
+        self.numero_competidor_input.setValue(0)
         self.tabla_inscripciones.clearSelection()
         self.btn_guardar_inscripcion.setEnabled(False)
\ No newline at end of file
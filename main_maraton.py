@@ -3,6 +3,12 @@
 
 import sys
 import os 
+import time
+import argparse
+
+# Tiempos de arranque, medidos desde antes de importar Qt y las pestañas
+TIEMPOS_ARRANQUE = {'inicio': time.perf_counter(), 'base_datos_ms': None, 'primer_pintado_ms': None}
+
 from PySide6.QtWidgets import QApplication, QMainWindow, QTabWidget, QMessageBox
 from PySide6.QtGui import QAction
 from PySide6.QtCore import Qt
@@ -19,6 +25,10 @@ from puntuacion_ui import PuntuacionTabWidget
 from reportes_ui import ReportesTabWidget
 from gestion_deportista_ui import GestionDeportistaTabWidget
 from programa_ui import ProgramaTabWidget # <-- 1. IMPORTACIÓN AÑADIDA
+from temporadas_ui import TemporadasTabWidget
+from mantenimiento_ui import MantenimientoDialog
+from diagnostico_ui import DiagnosticoDialog
+import diagnostico_db as diag
 
 class VentanaPrincipalMaraton(QMainWindow):
     def __init__(self):
@@ -59,11 +69,22 @@ class VentanaPrincipalMaraton(QMainWindow):
         self.tab_gestion_deportista = GestionDeportistaTabWidget()
         self.pestanas.addTab(self.tab_gestion_deportista, "Gestionar Deportista")
 
+        self.tab_temporadas = TemporadasTabWidget()
+        self.pestanas.addTab(self.tab_temporadas, "Temporadas")
+
         self.crear_menu()
         self.conectar_senales()
         
         print("[INFO] Ventana principal del Gestor de Regatas de Maratón inicializada.")
 
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if TIEMPOS_ARRANQUE['primer_pintado_ms'] is None:
+            TIEMPOS_ARRANQUE['primer_pintado_ms'] = (time.perf_counter() - TIEMPOS_ARRANQUE['inicio']) * 1000
+            base_datos = TIEMPOS_ARRANQUE['base_datos_ms']
+            detalle = f" (base de datos: {base_datos:.0f} ms)" if base_datos is not None else ""
+            print(f"[INFO] Arranque: primera ventana pintada a los {TIEMPOS_ARRANQUE['primer_pintado_ms']:.0f} ms{detalle}.")
+
     def aplicar_estilo_profesional(self):
         """Aplica un estilo profesional con degradados celestes"""
         estilo = """
@@ -74,11 +95,24 @@ class VentanaPrincipalMaraton(QMainWindow):
     def crear_menu(self):
         menu_bar = self.menuBar()
         menu_archivo = menu_bar.addMenu("&Archivo")
+        accion_mantenimiento = QAction("&Mantenimiento de base de datos...", self)
+        accion_mantenimiento.triggered.connect(self.abrir_mantenimiento)
+        menu_archivo.addAction(accion_mantenimiento)
+        accion_diagnostico = QAction("&Diagnóstico de base de datos...", self)
+        accion_diagnostico.triggered.connect(self.abrir_diagnostico)
+        menu_archivo.addAction(accion_diagnostico)
+        menu_archivo.addSeparator()
         accion_salir = QAction("&Salir", self)
         accion_salir.setShortcut("Ctrl+Q")
         accion_salir.triggered.connect(self.close)
         menu_archivo.addAction(accion_salir)
 
+    def abrir_mantenimiento(self):
+        MantenimientoDialog(self).exec()
+
+    def abrir_diagnostico(self):
+        DiagnosticoDialog(self).exec()
+
     def conectar_senales(self):
         """Conecta las señales entre las diferentes pestañas."""
         self.tab_evento.evento_activo_cambiado.connect(self.tab_inscripciones.actualizar_evento_activo)
@@ -87,18 +121,26 @@ class VentanaPrincipalMaraton(QMainWindow):
         self.tab_evento.evento_activo_cambiado.connect(self.tab_puntuacion.actualizar_evento_activo)
         self.tab_evento.evento_activo_cambiado.connect(self.tab_reportes.actualizar_evento_activo)
         self.tab_evento.evento_activo_cambiado.connect(self.tab_gestion_deportista.actualizar_evento_activo)
-        
-        self.tab_puntuacion.btn_calcular.clicked.connect(
-            lambda: self.tab_reportes.actualizar_sistema_puntuacion(
-                {lugar: spinner.value() for lugar, spinner in self.tab_puntuacion.spinboxes_puntuacion.items()}
-            )
-        )
+
+def leer_opciones_base_datos():
+    """Opciones de ubicación y modo de la base de datos; el resto de argv queda para Qt."""
+    parser = argparse.ArgumentParser(description="Gestor de Regatas de Maratón.")
+    parser.add_argument("--db", help=f"Ruta de la base de datos (o ${db.VARIABLE_RUTA}; por defecto {db.DB_FILENAME} junto al programa).")
+    parser.add_argument("--modo-db", choices=db.MODOS_BASE_DATOS, help=f"Modo de la base de datos (o ${db.VARIABLE_MODO}; por defecto wal).")
+    parser.add_argument("--volcado-s", type=float, help=f"Segundos entre volcados a disco en modo memoria (o ${db.VARIABLE_VOLCADO}; por defecto {db.INTERVALO_VOLCADO_S}).")
+    return parser.parse_known_args()
 
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
+    opciones, argumentos_qt = leer_opciones_base_datos()
+    app = QApplication(sys.argv[:1] + argumentos_qt)
+    diag.activar_desde_entorno()
     
     try:
+        inicio_db = time.perf_counter()
+        exito, mensaje = db.configurar_desde_entorno(opciones.db, opciones.modo_db, opciones.volcado_s)
+        if not exito: raise RuntimeError(mensaje)
         db.inicializar_db()
+        TIEMPOS_ARRANQUE['base_datos_ms'] = (time.perf_counter() - inicio_db) * 1000
     except Exception as e:
         QMessageBox.critical(None, "Error Crítico de Base de Datos", 
                              f"No se pudo inicializar la base de datos de regatas.\nError: {e}\nLa aplicación se cerrará.")
@@ -107,4 +149,12 @@ if __name__ == '__main__':
     ventana = VentanaPrincipalMaraton()
     ventana.show()
     
-    sys.exit(app.exec())
\ No newline at end of file
+    codigo_salida = app.exec()
+    print(f"[INFO] Estadísticas de conexiones a la base de datos: {db.obtener_estadisticas_conexion()}")
+    print(f"[INFO] Estadísticas de la caché de lecturas: {db.obtener_estadisticas_cache()}")
+    if diag.activo():
+        print(f"[INFO] {diag.guardar_informe()[1]}")
+    db.cerrar_base_datos()
+    if db.MODO_DB == 'memoria':
+        print(f"[INFO] Volcados de la base de datos en memoria: {db.obtener_estado_base_datos()['volcado']}")
+    sys.exit(codigo_salida)
\ No newline at end of file
@@ -0,0 +1,229 @@
+# mantenimiento_db.py
+# Mantenimiento de regatas_maraton.db: respaldo en línea, estadísticas del planificador,
+# VACUUM incremental y verificación rápida de integridad.
+# Se usa desde Archivo > Mantenimiento de base de datos... o desde la consola:
+#     python mantenimiento_db.py --respaldo respaldos/copia.db
+
+import sqlite3
+import os
+import re
+import sys
+import time
+import datetime
+import argparse
+import database_maraton as db
+
+PAGINAS_POR_PASO_RESPALDO = 256     # 1 MB por paso con páginas de 4 KB
+PAGINAS_VACUUM_INCREMENTAL = None   # None = liberar todas las páginas libres
+CARPETA_RESPALDOS = "respaldos"
+
+def tamano_base_datos():
+    """Tamaño del archivo principal y del WAL, páginas totales y páginas libres."""
+    if db.MODO_DB == 'memoria':
+        # El archivo solo cambia al volcar: sin esto se mediría la copia del último volcado
+        exito, mensaje = db.volcar_memoria_a_disco()
+        if not exito: print(f"[ADVERTENCIA] {mensaje}")
+    with db.conectar_db() as conn:
+        tamano_pagina = conn.execute("PRAGMA page_size").fetchone()[0]
+        paginas = conn.execute("PRAGMA page_count").fetchone()[0]
+        paginas_libres = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    ruta_wal = db.DB_PATH + "-wal"
+    return {
+        'archivo_bytes': os.path.getsize(db.DB_PATH) if os.path.exists(db.DB_PATH) else 0,
+        'wal_bytes': os.path.getsize(ruta_wal) if os.path.exists(ruta_wal) else 0,
+        'tamano_pagina': tamano_pagina,
+        'paginas': paginas,
+        'paginas_libres': paginas_libres,
+    }
+
+def ruta_respaldo_por_defecto():
+    """respaldos/regatas_maraton_AAAAMMDD_HHMMSS.db junto a la base de datos."""
+    carpeta = os.path.join(os.path.dirname(db.DB_PATH), CARPETA_RESPALDOS)
+    nombre_base = os.path.splitext(os.path.basename(db.DB_PATH))[0]
+    return os.path.join(carpeta, f"{nombre_base}_{datetime.datetime.now():%Y%m%d_%H%M%S}.db")
+
+def respaldar_db(ruta_destino, progreso=None, paginas_por_paso=PAGINAS_POR_PASO_RESPALDO):
+    """
+    Copia la base de datos con la API de respaldo de SQLite mientras la aplicación sigue en uso.
+    La copia avanza por pasos de paginas_por_paso páginas y suelta el bloqueo entre pasos, de modo
+    que las escrituras no esperan; si alguien escribe a mitad de camino, SQLite reinicia la copia
+    para que el respaldo quede consistente. progreso(copiadas, total) se llama después de cada paso.
+    Se escribe primero a un archivo temporal y solo se renombra si pasa quick_check.
+    """
+    carpeta = os.path.dirname(os.path.abspath(ruta_destino))
+    os.makedirs(carpeta, exist_ok=True)
+    ruta_temporal = ruta_destino + ".tmp"
+    if os.path.exists(ruta_temporal):
+        os.remove(ruta_temporal)
+
+    def _al_avanzar(estado, restantes, total):
+        if progreso: progreso(total - restantes, total)
+
+    destino = sqlite3.connect(ruta_temporal)
+    try:
+        with db.conectar_db() as conn:
+            conn.backup(destino, pages=paginas_por_paso, progress=_al_avanzar)
+        problemas = _problemas_integridad(destino)
+        # El respaldo queda como un solo archivo autónomo, sin WAL
+        destino.execute("PRAGMA journal_mode = DELETE")
+    except sqlite3.Error as e:
+        destino.close()
+        os.remove(ruta_temporal)
+        return False, f"Error al respaldar la base de datos: {e}"
+    destino.close()
+    if problemas:
+        os.remove(ruta_temporal)
+        return False, f"El respaldo no pasó la verificación de integridad: {problemas[0]}"
+    os.replace(ruta_temporal, ruta_destino)
+    return True, f"Respaldo guardado en {ruta_destino}"
+
+def optimizar_estadisticas():
+    """Recalcula las estadísticas del planificador (ANALYZE) y deja que PRAGMA optimize ajuste el resto."""
+    try:
+        with db.conectar_db() as conn:
+            conn.execute("ANALYZE")
+            conn.execute("PRAGMA optimize")
+            conn.commit()
+        return True, "Estadísticas del planificador actualizadas."
+    except sqlite3.Error as e:
+        return False, f"Error al actualizar estadísticas: {e}"
+
+def vacuum_incremental(paginas=PAGINAS_VACUUM_INCREMENTAL):
+    """
+    Devuelve al sistema las páginas libres que dejan los eventos borrados.
+    La primera vez la base de datos se pasa a auto_vacuum = INCREMENTAL, lo que exige un VACUUM
+    completo; desde entonces basta con PRAGMA incremental_vacuum, que es mucho más liviano.
+    Al final se trunca el WAL para que el tamaño en disco refleje el resultado; en modo 'memoria' el
+    archivo se achica con el siguiente volcado (tamano_base_datos() lo fuerza).
+    """
+    try:
+        with db.conectar_db() as conn:
+            if conn.in_transaction: conn.commit()
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("VACUUM")
+                mensaje = "Base de datos compactada con VACUUM completo y pasada a modo incremental."
+            else:
+                libres = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                argumento = f"({int(paginas)})" if paginas else ""
+                # executescript avanza la sentencia hasta el final; execute() libera una sola página
+                conn.executescript(f"PRAGMA incremental_vacuum{argumento};")
+                mensaje = f"VACUUM incremental: {libres - conn.execute('PRAGMA freelist_count').fetchone()[0]} páginas liberadas."
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        return True, mensaje
+    except sqlite3.Error as e:
+        return False, f"Error al compactar la base de datos: {e}"
+
+_NULO_REPORTADO = re.compile(r"^NULL value in (\w+)\.(\w+)$")
+
+def _problemas_integridad(conn):
+    """
+    Mensajes de PRAGMA quick_check distintos de 'ok'. SQLite 3.40 informa 'NULL value in tabla.columna'
+    por error en tablas WITHOUT ROWID (inscripcion_tripulantes, tiempos_vuelta); esos avisos solo se
+    mantienen si la columna de verdad tiene valores NULL.
+    """
+    problemas = []
+    for (mensaje,) in conn.execute("PRAGMA quick_check(20)").fetchall():
+        if mensaje == 'ok': continue
+        nulo = _NULO_REPORTADO.match(mensaje)
+        if nulo and mensaje in problemas: continue
+        if nulo and not conn.execute(f'SELECT 1 FROM "{nulo[1]}" WHERE "{nulo[2]}" IS NULL LIMIT 1').fetchone():
+            continue
+        problemas.append(mensaje)
+    return problemas
+
+def verificar_integridad():
+    """PRAGMA quick_check: devuelve (True, 'ok') o (False, primeros problemas encontrados)."""
+    try:
+        with db.conectar_db() as conn:
+            problemas = _problemas_integridad(conn)
+    except sqlite3.Error as e:
+        return False, f"Error al verificar la integridad: {e}"
+    if not problemas:
+        return True, "Verificación rápida de integridad: ok."
+    return False, "Problemas de integridad:\n" + "\n".join(problemas)
+
+def ejecutar_mantenimiento(ruta_respaldo=None, analizar=True, compactar=True, verificar=True, progreso=None):
+    """
+    Ejecuta los pasos pedidos en orden seguro (respaldo antes de tocar nada) y devuelve un informe:
+    {'antes': tamaños, 'despues': tamaños, 'pasos': [(nombre, exito, mensaje, segundos)]}.
+    progreso(porcentaje) recibe el avance total de 0 a 100.
+    """
+    pasos = []
+    if ruta_respaldo:
+        pasos.append(("Respaldo", None))
+    if verificar: pasos.append(("Verificación", verificar_integridad))
+    if analizar: pasos.append(("Estadísticas", optimizar_estadisticas))
+    if compactar: pasos.append(("VACUUM", vacuum_incremental))
+
+    informe = {'antes': tamano_base_datos(), 'pasos': []}
+    for indice, (nombre, funcion) in enumerate(pasos):
+        inicio_paso, ancho_paso = indice * 100 // len(pasos), 100 // len(pasos)
+        t0 = time.perf_counter()
+        if funcion is None:
+            def _progreso_respaldo(copiadas, total):
+                if progreso and total: progreso(inicio_paso + ancho_paso * copiadas // total)
+            exito, mensaje = respaldar_db(ruta_respaldo, _progreso_respaldo)
+        else:
+            exito, mensaje = funcion()
+        informe['pasos'].append((nombre, exito, mensaje, time.perf_counter() - t0))
+        print(f"[INFO] Mantenimiento - {nombre}: {mensaje}" if exito else f"[ADVERTENCIA] Mantenimiento - {nombre}: {mensaje}")
+        if progreso: progreso(inicio_paso + ancho_paso)
+        if nombre == "Respaldo" and not exito:
+            break  # sin respaldo no se compacta la base de datos
+    informe['despues'] = tamano_base_datos()
+    if progreso: progreso(100)
+    return informe
+
+def _formatear_bytes(cantidad):
+    for unidad in ("B", "KB", "MB"):
+        if cantidad < 1024: return f"{cantidad:.0f} {unidad}" if unidad == "B" else f"{cantidad:.1f} {unidad}"
+        cantidad /= 1024
+    return f"{cantidad:.1f} GB"
+
+def formatear_tamano(tamanos):
+    """Resumen de una sola medición de tamano_base_datos()."""
+    return (f"Archivo: {_formatear_bytes(tamanos['archivo_bytes'])}, WAL: {_formatear_bytes(tamanos['wal_bytes'])}, "
+            f"páginas libres: {tamanos['paginas_libres']} de {tamanos['paginas']}")
+
+def formatear_informe(informe):
+    """Texto del informe de mantenimiento: tamaño antes/después y duración de cada paso."""
+    lineas = []
+    for nombre, exito, mensaje, segundos in informe['pasos']:
+        lineas.append(f"{'✔' if exito else '✘'} {nombre} ({segundos:.2f} s): {mensaje}")
+    antes, despues = informe['antes'], informe['despues']
+    lineas.append("")
+    lineas.append(f"Archivo: {_formatear_bytes(antes['archivo_bytes'])} → {_formatear_bytes(despues['archivo_bytes'])}")
+    lineas.append(f"WAL: {_formatear_bytes(antes['wal_bytes'])} → {_formatear_bytes(despues['wal_bytes'])}")
+    lineas.append(f"Páginas libres: {antes['paginas_libres']} de {antes['paginas']} → {despues['paginas_libres']} de {despues['paginas']}")
+    return "\n".join(lineas)
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Mantenimiento de la base de datos del Gestor de Regatas.")
+    parser.add_argument("--db", help="Ruta de la base de datos (por defecto la de la aplicación).")
+    parser.add_argument("--respaldo", nargs="?", const="", metavar="RUTA",
+                        help="Respaldar antes de compactar; sin RUTA se usa la carpeta 'respaldos'.")
+    parser.add_argument("--sin-analyze", action="store_true", help="No recalcular estadísticas.")
+    parser.add_argument("--sin-vacuum", action="store_true", help="No compactar la base de datos.")
+    parser.add_argument("--sin-verificar", action="store_true", help="No ejecutar quick_check.")
+    opciones = parser.parse_args(argumentos)
+
+    ruta = os.path.abspath(opciones.db) if opciones.db else db.DB_PATH
+    if not os.path.exists(ruta):
+        print(f"[ADVERTENCIA] No existe la base de datos {ruta}")
+        return 1
+    if opciones.db:
+        # Antes de configurar: en modo 'memoria' una ruta inexistente se cargaría vacía y el volcado la crearía
+        db.configurar_base_datos(ruta)
+    ruta_respaldo = None
+    if opciones.respaldo is not None:
+        ruta_respaldo = opciones.respaldo or ruta_respaldo_por_defecto()
+
+    informe = ejecutar_mantenimiento(ruta_respaldo, analizar=not opciones.sin_analyze,
+                                     compactar=not opciones.sin_vacuum, verificar=not opciones.sin_verificar)
+    print(formatear_informe(informe))
+    db.cerrar_base_datos()
+    return 0 if all(exito for _, exito, _, _ in informe['pasos']) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
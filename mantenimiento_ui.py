@@ -0,0 +1,123 @@
+# mantenimiento_ui.py
+# Diálogo de mantenimiento de la base de datos (Archivo > Mantenimiento de base de datos...).
+
+import os
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+    QMessageBox, QFileDialog, QProgressBar, QGroupBox, QCheckBox, QPlainTextEdit
+)
+from PySide6.QtCore import Qt, Signal, QThread
+import database_maraton as db
+import mantenimiento_db as mant
+
+class MantenimientoThread(QThread):
+    progreso_actualizado = Signal(int)
+    finalizado = Signal(bool, str)
+
+    def __init__(self, ruta_respaldo, analizar, compactar, verificar):
+        super().__init__()
+        self.ruta_respaldo = ruta_respaldo
+        self.analizar = analizar
+        self.compactar = compactar
+        self.verificar = verificar
+
+    def run(self):
+        try:
+            informe = mant.ejecutar_mantenimiento(self.ruta_respaldo, self.analizar, self.compactar,
+                                                  self.verificar, progreso=self.progreso_actualizado.emit)
+            exito = all(paso[1] for paso in informe['pasos'])
+            self.finalizado.emit(exito, mant.formatear_informe(informe))
+        except Exception as e:
+            self.finalizado.emit(False, f"Error durante el mantenimiento: {e}")
+        finally:
+            db.cerrar_conexion_hilo()
+
+class MantenimientoDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Mantenimiento de la Base de Datos")
+        self.resize(560, 420)
+        self.thread = None
+        self.ruta_respaldo = mant.ruta_respaldo_por_defecto()
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        opciones_box = QGroupBox("Tareas")
+        opciones_layout = QVBoxLayout(opciones_box)
+        self.chk_respaldo = QCheckBox("Respaldar la base de datos antes de compactar")
+        self.chk_verificar = QCheckBox("Verificación rápida de integridad (quick_check)")
+        self.chk_analizar = QCheckBox("Actualizar estadísticas del planificador (ANALYZE)")
+        self.chk_compactar = QCheckBox("Compactar la base de datos (VACUUM incremental)")
+        for chk in (self.chk_respaldo, self.chk_verificar, self.chk_analizar, self.chk_compactar):
+            chk.setChecked(True)
+            opciones_layout.addWidget(chk)
+        layout.addWidget(opciones_box)
+
+        ruta_layout = QHBoxLayout()
+        self.label_ruta = QLabel(os.path.basename(self.ruta_respaldo))
+        self.btn_seleccionar_respaldo = QPushButton("Cambiar Destino...")
+        ruta_layout.addWidget(QLabel("Respaldo:"))
+        ruta_layout.addWidget(self.label_ruta, 1)
+        ruta_layout.addWidget(self.btn_seleccionar_respaldo)
+        layout.addLayout(ruta_layout)
+
+        self.progress_bar = QProgressBar(self)
+        self.progress_bar.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self.progress_bar)
+
+        self.texto_informe = QPlainTextEdit()
+        self.texto_informe.setReadOnly(True)
+        self.texto_informe.setPlainText(mant.formatear_tamano(mant.tamano_base_datos()))
+        layout.addWidget(self.texto_informe, 1)
+
+        btn_layout = QHBoxLayout()
+        self.btn_ejecutar = QPushButton("Ejecutar")
+        self.btn_cerrar = QPushButton("Cerrar")
+        btn_layout.addWidget(self.btn_ejecutar)
+        btn_layout.addWidget(self.btn_cerrar)
+        layout.addLayout(btn_layout)
+
+        self.btn_seleccionar_respaldo.clicked.connect(self.seleccionar_respaldo)
+        self.chk_respaldo.toggled.connect(self.btn_seleccionar_respaldo.setEnabled)
+        self.btn_ejecutar.clicked.connect(self.iniciar_mantenimiento)
+        self.btn_cerrar.clicked.connect(self.close)
+
+    def seleccionar_respaldo(self):
+        ruta, _ = QFileDialog.getSaveFileName(self, "Guardar Respaldo", self.ruta_respaldo, "Base de datos SQLite (*.db)")
+        if ruta:
+            self.ruta_respaldo = ruta
+            self.label_ruta.setText(os.path.basename(ruta))
+
+    def iniciar_mantenimiento(self):
+        if not any(chk.isChecked() for chk in (self.chk_respaldo, self.chk_verificar, self.chk_analizar, self.chk_compactar)):
+            QMessageBox.warning(self, "Sin Tareas", "Selecciona al menos una tarea de mantenimiento.")
+            return
+        self.btn_ejecutar.setEnabled(False)
+        self.btn_cerrar.setEnabled(False)
+        self.progress_bar.setValue(0)
+        self.texto_informe.setPlainText("Ejecutando mantenimiento...")
+        ruta_respaldo = self.ruta_respaldo if self.chk_respaldo.isChecked() else None
+        self.thread = MantenimientoThread(ruta_respaldo, self.chk_analizar.isChecked(),
+                                          self.chk_compactar.isChecked(), self.chk_verificar.isChecked())
+        self.thread.progreso_actualizado.connect(self.progress_bar.setValue)
+        self.thread.finalizado.connect(self.mantenimiento_finalizado)
+        self.thread.start()
+
+    def mantenimiento_finalizado(self, exito, informe):
+        self.texto_informe.setPlainText(informe)
+        self.progress_bar.setValue(100)
+        self.btn_cerrar.setEnabled(True)
+        self.btn_ejecutar.setEnabled(True)
+        # El próximo respaldo no debe pisar al recién creado
+        self.ruta_respaldo = mant.ruta_respaldo_por_defecto()
+        self.label_ruta.setText(os.path.basename(self.ruta_respaldo))
+        if not exito:
+            QMessageBox.warning(self, "Mantenimiento con Errores", "Alguna tarea no terminó correctamente. Revisa el informe.")
+
+    def closeEvent(self, event):
+        if self.thread and self.thread.isRunning():
+            event.ignore()
+            return
+        super().closeEvent(event)
@@ -0,0 +1,117 @@
+# miniaturas_logos.py
+# Miniaturas de logos para reportes y sitio web. Los logos originales pueden pesar varios MB y se muestran
+# a 14-25 px: incrustarlos tal cual en cada fila hace documentos enormes y lentos de dibujar.
+# Cada logo se reduce una sola vez por uso (fila, cabecera, sponsor...) con QImage, el PNG resultante se
+# guarda en miniaturas/ junto a la base de datos con una clave de ruta + mtime + tamaño del original, y
+# las data URI ya codificadas se guardan en un LRU en memoria.
+
+import os
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from PySide6.QtGui import QImage
+from PySide6.QtCore import Qt, QBuffer
+import database_maraton as db
+
+CARPETA_MINIATURAS = "miniaturas"
+MAXIMO_DATA_URIS = 256
+
+# Caja (ancho, alto) en píxeles de cada uso. QTextDocument ignora max-width/max-height y dibuja las imágenes
+# a su tamaño real, así que las de los reportes se cortan a la caja del CSS; las del sitio web las escala
+# el navegador y se generan al doble para pantallas de alta densidad.
+TAMANOS = {
+    'fila': (80, 14),            # .club-logo, max-height 14px
+    'cabecera': (20, 20),        # .logo del reporte, 20x20
+    'sponsor': (100, 25),        # .sponsor-logo, 100x25
+    'web_cabecera': (500, 500),  # .header-logo del sitio, max-width 250px
+    'web_sponsor': (300, 300),   # .sponsor-logo-footer, max-width 150px
+}
+
+_data_uris = OrderedDict()
+_lock = threading.Lock()
+_estadisticas = {'aciertos_memoria': 0, 'aciertos_disco': 0, 'generadas': 0, 'sin_reducir': 0}
+
+def _mime(ruta):
+    ext = os.path.splitext(ruta)[1].lower()
+    return f"image/{ext[1:]}" if ext in ['.png', '.jpg', '.jpeg', '.gif'] else "image/png"
+
+def _ruta_miniatura(clave):
+    nombre = hashlib.sha1(repr(clave).encode('utf-8')).hexdigest()
+    return os.path.join(os.path.dirname(db.DB_PATH), CARPETA_MINIATURAS, f"{nombre}.png")
+
+def _generar_miniatura(ruta, tipo):
+    """PNG reducido a la caja del tipo, o None si Qt no puede leer la imagen."""
+    imagen = QImage(ruta)
+    if imagen.isNull(): return None
+    ancho, alto = TAMANOS[tipo]
+    if imagen.width() > ancho or imagen.height() > alto:
+        imagen = imagen.scaled(ancho, alto, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    buffer = QBuffer()
+    buffer.open(QBuffer.ReadWrite)
+    imagen.save(buffer, "PNG")
+    return bytes(buffer.data())
+
+def _guardar_en_disco(ruta_miniatura, datos):
+    # Si la carpeta no se puede escribir la miniatura igual queda en memoria
+    try:
+        os.makedirs(os.path.dirname(ruta_miniatura), exist_ok=True)
+        ruta_temporal = f"{ruta_miniatura}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(ruta_temporal, 'wb') as f:
+            f.write(datos)
+        os.replace(ruta_temporal, ruta_miniatura)
+    except OSError as e:
+        print(f"[ADVERTENCIA] No se pudo guardar la miniatura {ruta_miniatura}: {e}")
+
+def _cargar_data_uri(ruta, tipo, clave):
+    ruta_miniatura = _ruta_miniatura(clave)
+    if os.path.exists(ruta_miniatura):
+        with open(ruta_miniatura, 'rb') as f:
+            datos = f.read()
+        _estadisticas['aciertos_disco'] += 1
+        return "image/png", datos
+    datos = _generar_miniatura(ruta, tipo)
+    if datos is None:
+        # Formato que QImage no lee: se incrusta el original como antes
+        _estadisticas['sin_reducir'] += 1
+        with open(ruta, 'rb') as f:
+            return _mime(ruta), f.read()
+    _estadisticas['generadas'] += 1
+    _guardar_en_disco(ruta_miniatura, datos)
+    return "image/png", datos
+
+def logo_data_uri(ruta, tipo):
+    """Data URI de la miniatura del logo para el uso 'tipo' (ver TAMANOS); "" si la ruta no existe."""
+    if tipo not in TAMANOS:
+        raise ValueError(f"Tipo de miniatura desconocido: {tipo}")
+    if not ruta: return ""
+    try:
+        info = os.stat(ruta)
+    except OSError:
+        return ""
+    clave = (os.path.abspath(ruta), info.st_mtime_ns, info.st_size, tipo, TAMANOS[tipo])
+    with _lock:
+        if clave in _data_uris:
+            _data_uris.move_to_end(clave)
+            _estadisticas['aciertos_memoria'] += 1
+            return _data_uris[clave]
+    try:
+        mime, datos = _cargar_data_uri(ruta, tipo, clave)
+    except OSError as e:
+        print(f"Error convirtiendo imagen a base64: {e}")
+        return ""
+    data_uri = f"data:{mime};base64,{base64.b64encode(datos).decode()}"
+    with _lock:
+        _data_uris[clave] = data_uri
+        if len(_data_uris) > MAXIMO_DATA_URIS:
+            _data_uris.popitem(last=False)
+    return data_uri
+
+def limpiar_cache():
+    """Vacía el LRU en memoria; las miniaturas en disco se invalidan solas al cambiar el original."""
+    with _lock:
+        _data_uris.clear()
+
+def obtener_estadisticas():
+    with _lock:
+        return dict(_estadisticas, en_memoria=len(_data_uris))
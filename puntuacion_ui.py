@@ -91,8 +91,7 @@ class PuntuacionTabWidget(QWidget):
         for i in range(1, 11):
             spinner = QSpinBox()
             spinner.setRange(0, 100)
-            puntajes_defecto = {1: 10, 2: 8, 3: 6, 4: 5, 5: 4, 6: 3, 7: 2, 8: 1}
-            spinner.setValue(puntajes_defecto.get(i, 0))
+            spinner.setValue(db.PUNTUACION_POR_DEFECTO.get(i, 0))
             spinner.setStyleSheet("QSpinBox { min-width: 60px; max-width: 80px; }")
             self.spinboxes_puntuacion[i] = spinner
             form_puntuacion.addRow(f"{i}º Lugar:", spinner)
@@ -144,6 +143,14 @@ class PuntuacionTabWidget(QWidget):
         self.label_evento_activo.setText(f"<b>Evento Activo:</b> {self.nombre_evento_activo}")
         self.tabla_puntuacion.setRowCount(0)
         self.tabla_medallas.setRowCount(0)
+        self.cargar_sistema_puntuacion()
+
+    def cargar_sistema_puntuacion(self):
+        """Muestra en los spinbox el sistema de puntuación guardado para el evento activo."""
+        if self.id_evento_activo is None: return
+        sistema_guardado = db.obtener_sistema_puntuacion_activo(self.id_evento_activo)
+        for lugar, spinner in self.spinboxes_puntuacion.items():
+            spinner.setValue(sistema_guardado.get(lugar, 0))
 
     def calcular_y_mostrar_todo(self):
         if self.id_evento_activo is None:
@@ -160,8 +167,9 @@ class PuntuacionTabWidget(QWidget):
         if not sistema_puntuacion:
             QMessageBox.warning(self, "Sin Puntuación", "Define al menos un puntaje para poder calcular el ranking por puntos.")
             return
+        db.guardar_sistema_puntuacion(self.id_evento_activo, sistema_puntuacion)
 
-        resultados_clubes = db.calcular_puntuacion_clubes(self.id_evento_activo, sistema_puntuacion)
+        resultados_clubes = db.calcular_puntuacion_clubes(self.id_evento_activo)
         
         self.tabla_puntuacion.setRowCount(0)
         # --- CORRECCIÓN AQUÍ ---
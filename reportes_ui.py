@@ -16,6 +16,7 @@ from PySide6.QtGui import QTextDocument, QTextCursor, QTextCharFormat
 import database_maraton as db
 import generador_pdf_reportes as gen_reportes
 import generador_web
+from evento_snapshot import EventoSnapshot
 from pdf_preview_dialog_ui import PdfPreviewDialog
 from utils_maraton import resource_path
 
@@ -26,7 +27,6 @@ class ReportesTabWidget(QWidget):
         super().__init__()
         self.id_evento_activo = None
         self.nombre_evento_activo = "Ninguno"
-        self.sistema_puntuacion_actual = {}
         self.logo_path = resource_path(LOGO_FILENAME)
 
         self.init_ui()
@@ -107,10 +107,6 @@ class ReportesTabWidget(QWidget):
         self.label_evento_activo.setText(f"<b>Evento Activo:</b> {self.nombre_evento_activo}")
         self.cargar_combo_categorias()
 
-    def actualizar_sistema_puntuacion(self, sistema_puntuacion):
-        self.sistema_puntuacion_actual = sistema_puntuacion
-        print("[REPORTES] Sistema de puntuación actualizado.")
-
     def cargar_combo_categorias(self):
         self.combo_categorias.clear()
         self.combo_categorias.addItem("Selecciona una categoría...", None)
@@ -133,35 +129,36 @@ class ReportesTabWidget(QWidget):
         
         tipo_reporte = self.combo_tipo_reporte.currentText()
         documento, nombre_archivo_sugerido = None, "reporte.pdf"
-        sponsors = db.obtener_sponsors_por_evento(self.id_evento_activo)
-        sponsor_logo_paths = [s[2] for s in sponsors if s[2]]
+        snapshot = EventoSnapshot.cargar(self.id_evento_activo)
+        if snapshot is None: return None, None
+        sponsor_logo_paths = snapshot.sponsor_logo_paths
+        sistema_puntuacion = snapshot.sistema_puntuacion
 
         if "Programa Oficial" in tipo_reporte:
-            documento, _ = gen_reportes.crear_programa_evento(self.id_evento_activo, self.logo_path, sponsor_logo_paths)
+            documento, _ = gen_reportes.crear_programa_evento_pdf(self.id_evento_activo, sistema_puntuacion, self.logo_path, sponsor_logo_paths, snapshot=snapshot)
             nombre_archivo_sugerido = "Programa_Oficial_Evento.pdf"
         elif "Categoría" in tipo_reporte:
             categoria_id = self.combo_categorias.currentData()
             if categoria_id is None: QMessageBox.warning(self, "Sin Categoría", "Selecciona una categoría para este tipo de reporte."); return None, None
             nombre_cat_limpio = self.combo_categorias.currentText().replace(" ", "_").replace("(", "").replace(")", "")
             if "Listado de Partida" in tipo_reporte:
-                documento, _ = gen_reportes.crear_start_list(self.id_evento_activo, categoria_id, self.logo_path, sponsor_logo_paths)
+                documento, _ = gen_reportes.crear_start_list(self.id_evento_activo, categoria_id, self.logo_path, sponsor_logo_paths, snapshot=snapshot)
                 nombre_archivo_sugerido = f"StartList_{nombre_cat_limpio}.pdf"
             elif "Resultados Finales" in tipo_reporte:
-                documento, _ = gen_reportes.crear_resultados_categoria(self.id_evento_activo, categoria_id, self.logo_path, sponsor_logo_paths)
+                documento, _ = gen_reportes.crear_resultados_categoria(self.id_evento_activo, categoria_id, self.logo_path, sponsor_logo_paths, snapshot=snapshot)
                 nombre_archivo_sugerido = f"Resultados_{nombre_cat_limpio}.pdf"
         elif "Resultados Completos" in tipo_reporte:
-            documento, _ = gen_reportes.crear_resultados_completos(self.id_evento_activo, self.logo_path, sponsor_logo_paths)
+            documento, _ = gen_reportes.crear_resultados_completos(self.id_evento_activo, sistema_puntuacion, self.logo_path, sponsor_logo_paths, snapshot=snapshot)
             nombre_archivo_sugerido = "Resultados_Completos_Evento.pdf"
         elif "Clasificación General" in tipo_reporte or "Ranking Individual" in tipo_reporte:
-            if not self.sistema_puntuacion_actual: QMessageBox.warning(self, "Sin Puntuación", "Calcula la puntuación en la pestaña 'Puntuación' primero."); return None, None
             if "Clasificación General" in tipo_reporte:
-                documento, _ = gen_reportes.crear_ranking_puntuacion_pdf(self.id_evento_activo, self.sistema_puntuacion_actual, self.logo_path, sponsor_logo_paths)
+                documento, _ = gen_reportes.crear_ranking_puntuacion_pdf(self.id_evento_activo, sistema_puntuacion, self.logo_path, sponsor_logo_paths, snapshot=snapshot)
                 nombre_archivo_sugerido = "Clasificacion_General_Clubes.pdf"
             elif "Puntos" in tipo_reporte:
-                documento, _ = gen_reportes.crear_ranking_deportistas_puntos(self.id_evento_activo, self.sistema_puntuacion_actual, self.logo_path, sponsor_logo_paths)
+                documento, _ = gen_reportes.crear_ranking_deportistas_puntos(self.id_evento_activo, sistema_puntuacion, self.logo_path, sponsor_logo_paths, snapshot=snapshot)
                 nombre_archivo_sugerido = "Ranking_Individual_Puntos.pdf"
             elif "Medallas" in tipo_reporte:
-                documento, _ = gen_reportes.crear_ranking_deportistas_medallas(self.id_evento_activo, self.logo_path, sponsor_logo_paths)
+                documento, _ = gen_reportes.crear_ranking_deportistas_medallas(self.id_evento_activo, sistema_puntuacion, self.logo_path, sponsor_logo_paths, snapshot=snapshot)
                 nombre_archivo_sugerido = "Ranking_Individual_Medallas.pdf"
         
         return documento, nombre_archivo_sugerido
@@ -210,8 +207,11 @@ class ReportesTabWidget(QWidget):
 
     def generar_todos_los_reportes(self):
         if self.id_evento_activo is None: QMessageBox.warning(self, "Sin Evento", "Primero selecciona un evento activo."); return
-        sponsors, sponsor_logo_paths = db.obtener_sponsors_por_evento(self.id_evento_activo), [s[2] for s in db.obtener_sponsors_por_evento(self.id_evento_activo) if s[2]]
-        categorias = db.obtener_categorias()
+        # Una sola lectura del evento para todos los reportes de la tanda
+        snapshot = EventoSnapshot.cargar(self.id_evento_activo)
+        if snapshot is None: return
+        sponsor_logo_paths, sistema_puntuacion = snapshot.sponsor_logo_paths, snapshot.sistema_puntuacion
+        categorias = snapshot.categorias
         if not categorias: QMessageBox.warning(self, "Sin Categorías", "No hay categorías definidas."); return
         directorio = QFileDialog.getExistingDirectory(self, "Seleccionar Carpeta para Guardar Reportes", QStandardPaths.writableLocation(QStandardPaths.DocumentsLocation))
         if not directorio: return
@@ -222,7 +222,7 @@ class ReportesTabWidget(QWidget):
         paso_actual = 0
         # Generar Programa Oficial
         progress.setLabelText("Generando Programa Oficial..."); progress.setValue(paso_actual)
-        doc, _ = gen_reportes.crear_programa_evento(self.id_evento_activo, self.logo_path, sponsor_logo_paths)
+        doc, _ = gen_reportes.crear_programa_evento_pdf(self.id_evento_activo, sistema_puntuacion, self.logo_path, sponsor_logo_paths, snapshot=snapshot)
         if doc: self._guardar_documento_pdf(doc, os.path.join(directorio, "Programa_Oficial_Evento.pdf"))
         paso_actual += 1
 
@@ -230,25 +230,23 @@ class ReportesTabWidget(QWidget):
             if progress.wasCanceled(): break
             nombre_cat_limpio = f"{nombre}_{codigo}".replace(" ", "_").replace("(", "").replace(")", "")
             progress.setLabelText(f"Generando listado: {nombre}..."); progress.setValue(paso_actual); paso_actual +=1
-            doc, _ = gen_reportes.crear_start_list(self.id_evento_activo, cat_id, self.logo_path, sponsor_logo_paths)
+            doc, _ = gen_reportes.crear_start_list(self.id_evento_activo, cat_id, self.logo_path, sponsor_logo_paths, snapshot=snapshot)
             if doc: self._guardar_documento_pdf(doc, os.path.join(directorio, f"StartList_{nombre_cat_limpio}.pdf"))
             
             progress.setLabelText(f"Generando resultados: {nombre}..."); progress.setValue(paso_actual); paso_actual += 1
-            doc, _ = gen_reportes.crear_resultados_categoria(self.id_evento_activo, cat_id, self.logo_path, sponsor_logo_paths)
+            doc, _ = gen_reportes.crear_resultados_categoria(self.id_evento_activo, cat_id, self.logo_path, sponsor_logo_paths, snapshot=snapshot)
             if doc: self._guardar_documento_pdf(doc, os.path.join(directorio, f"Resultados_{nombre_cat_limpio}.pdf"))
         
         if not progress.wasCanceled():
             reportes_globales = [
-                ("Resultados Completos Evento", gen_reportes.crear_resultados_completos, (self.id_evento_activo, self.logo_path, sponsor_logo_paths)),
-                ("Clasificacion General Clubes", gen_reportes.crear_puntuacion_general, (self.id_evento_activo, self.sistema_puntuacion_actual, self.logo_path, sponsor_logo_paths)),
-                ("Ranking Individual Puntos", gen_reportes.crear_ranking_deportistas_puntos, (self.id_evento_activo, self.sistema_puntuacion_actual, self.logo_path, sponsor_logo_paths)),
-                ("Ranking Individual Medallas", gen_reportes.crear_ranking_deportistas_medallas, (self.id_evento_activo, self.logo_path, sponsor_logo_paths))
+                ("Resultados Completos Evento", gen_reportes.crear_resultados_completos),
+                ("Clasificacion General Clubes", gen_reportes.crear_ranking_puntuacion_pdf),
+                ("Ranking Individual Puntos", gen_reportes.crear_ranking_deportistas_puntos),
+                ("Ranking Individual Medallas", gen_reportes.crear_ranking_deportistas_medallas)
             ]
-            for nombre, func, args in reportes_globales:
-                if "Clubes" in nombre or "Puntos" in nombre:
-                    if not self.sistema_puntuacion_actual: continue
+            for nombre, func in reportes_globales:
                 progress.setLabelText(f"Generando {nombre}..."); progress.setValue(paso_actual)
-                doc, _ = func(*args)
+                doc, _ = func(self.id_evento_activo, sistema_puntuacion, self.logo_path, sponsor_logo_paths, snapshot=snapshot)
                 if doc: self._guardar_documento_pdf(doc, os.path.join(directorio, f"{nombre.replace(' ', '_')}.pdf"))
                 paso_actual += 1
                 
@@ -260,16 +258,13 @@ class ReportesTabWidget(QWidget):
         if self.id_evento_activo is None:
             QMessageBox.warning(self, "Sin Evento", "Primero selecciona un evento activo.")
             return
-        if not self.sistema_puntuacion_actual:
-            QMessageBox.warning(self, "Sin Puntuación", "Calcula la puntuación en la pestaña 'Puntuación' primero. Se usará para los rankings.")
-            return
         directorio = QFileDialog.getExistingDirectory(self, "Seleccionar Carpeta para Guardar el Sitio Web", QStandardPaths.writableLocation(QStandardPaths.DocumentsLocation))
         if not directorio:
             return
         try:
             nombre_evento_limpio = self.nombre_evento_activo.replace(" ", "_").lower()
             ruta_sitio = os.path.join(directorio, f"sitio_web_{nombre_evento_limpio}")
-            generador_web.generar_sitio_completo(self.id_evento_activo, self.sistema_puntuacion_actual, ruta_sitio)
+            generador_web.generar_sitio_completo(self.id_evento_activo, ruta_sitio)
             QMessageBox.information(self, "Generación Exitosa", f"El sitio web ha sido generado exitosamente en:\n{ruta_sitio}\n\nAbre el archivo 'index.html' en tu navegador para verlo.")
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Ocurrió un error al generar el sitio web: {e}")
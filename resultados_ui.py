@@ -12,20 +12,31 @@ from PySide6.QtWidgets import (
     QGroupBox, QComboBox, QAbstractItemView, QDialog,
     QInputDialog, QCheckBox
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QCoreApplication
 import database_maraton as db
+from cola_resultados import ColaResultadosWorker
 from tiempos_vuelta_dialog_ui import TiemposVueltaDialog
+from utils_maraton import parsear_tiempo_ms, formatear_tiempo_ms
 
 class ResultadosTabWidget(QWidget):
     def __init__(self):
         super().__init__()
         self.id_evento_activo = None
         self.nombre_evento_activo = "Ninguno"
+        self.evento_archivado = False
         self.id_categoria_activa = None
         self.categorias_info = {} 
+        self.estados_categorias = {}
 
         self.init_ui()
 
+        # Los resultados se guardan en segundo plano para no hacer esperar al operador entre llegadas
+        self.cola_resultados = ColaResultadosWorker(self)
+        self.cola_resultados.lote_aplicado.connect(self.procesar_lote_aplicado)
+        self.cola_resultados.start()
+        if QCoreApplication.instance() is not None:
+            QCoreApplication.instance().aboutToQuit.connect(self.cola_resultados.detener)
+
     def init_ui(self):
         layout_principal = QVBoxLayout(self)
         panel_seleccion = QGroupBox("Selección de Evento y Categoría")
@@ -83,7 +94,7 @@ class ResultadosTabWidget(QWidget):
         print("[INFO] Pestaña Resultados inicializada.")
 
     def actualizar_estado_botones(self):
-        is_selected = len(self.tabla_resultados.selectedItems()) > 0
+        is_selected = len(self.tabla_resultados.selectedItems()) > 0 and not self.evento_archivado
         self.btn_gestionar_tiempos.setEnabled(is_selected)
         self.btn_cambiar_estado.setEnabled(is_selected)
 
@@ -91,6 +102,11 @@ class ResultadosTabWidget(QWidget):
         self.id_evento_activo = evento_id
         self.nombre_evento_activo = nombre_evento
         self.label_evento_activo.setText(f"<b>Evento Activo:</b> {self.nombre_evento_activo}")
+        # Los resultados de un evento archivado se muestran desde su archivo, sin permitir cambios
+        self.evento_archivado = evento_id in db.obtener_archivos_eventos()
+        if self.evento_archivado:
+            self.label_evento_activo.setText(f"<b>Evento Activo:</b> {self.nombre_evento_activo} <i>(archivado, solo lectura)</i>")
+        self.check_categoria_valida.setEnabled(not self.evento_archivado)
         self.cargar_combo_categorias()
 
     def cargar_combo_categorias(self):
@@ -98,6 +114,7 @@ class ResultadosTabWidget(QWidget):
         self.categorias_info.clear()
         self.combo_categorias.addItem("Selecciona una categoría...", None)
         if self.id_evento_activo is not None:
+            self.estados_categorias = db.obtener_estados_categorias(self.id_evento_activo)
             categorias = db.obtener_categorias()
             for cat_id, nombre, codigo, _, _, _, _, _, num_vueltas in categorias:
                 self.combo_categorias.addItem(f"{nombre} ({codigo})", cat_id)
@@ -116,41 +133,70 @@ class ResultadosTabWidget(QWidget):
             return
         
         self.check_categoria_valida.setVisible(True)
-        es_valida_int = db.obtener_estado_categoria(self.id_evento_activo, self.id_categoria_activa)
+        es_valida_int = self.estados_categorias.get(self.id_categoria_activa, 1)
         self.check_categoria_valida.blockSignals(True)
         self.check_categoria_valida.setChecked(bool(es_valida_int))
         self.check_categoria_valida.blockSignals(False)
 
-        inscripciones = db.obtener_inscripciones_por_categoria(self.id_evento_activo, self.id_categoria_activa)
-        for row_idx, row_data in enumerate(inscripciones):
-            self.tabla_resultados.insertRow(row_idx)
-            
-            # --- ÍNDICES CORREGIDOS PARA LEER LOS DATOS CORRECTAMENTE ---
-            nombres_list = [row_data[2], row_data[6], row_data[10], row_data[14]]
-            clubes_list = [row_data[4], row_data[8], row_data[12], row_data[16]]
-            
-            lugar = row_data[18]
-            tiempo_final = row_data[19]
-            estado = row_data[20]
-            # -------------------------------------------------------------
-
-            nombres = " / ".join(filter(None, nombres_list))
-            clubes = " / ".join(filter(None, clubes_list))
-
-            self.tabla_resultados.setItem(row_idx, 0, QTableWidgetItem(str(row_data[0]))) # ID
-            self.tabla_resultados.setItem(row_idx, 1, QTableWidgetItem(str(row_data[1]))) # Número
-            self.tabla_resultados.setItem(row_idx, 2, QTableWidgetItem(nombres))
-            self.tabla_resultados.setItem(row_idx, 3, QTableWidgetItem(clubes))
-            self.tabla_resultados.setItem(row_idx, 4, QTableWidgetItem(str(lugar) if lugar else ""))
-            self.tabla_resultados.setItem(row_idx, 5, QTableWidgetItem(tiempo_final or ""))
-            self.tabla_resultados.setItem(row_idx, 6, QTableWidgetItem(estado or 'Inscrito'))
+        resultados = db.obtener_resultados_categoria(self.id_evento_activo, self.id_categoria_activa)
+        self.tabla_resultados.setRowCount(len(resultados))
+        for row_idx, fila in enumerate(resultados):
+            self.tabla_resultados.setItem(row_idx, 0, QTableWidgetItem(str(fila.id)))
+            self.tabla_resultados.setItem(row_idx, 1, QTableWidgetItem(str(fila.numero)))
+            self.tabla_resultados.setItem(row_idx, 2, QTableWidgetItem(fila.nombres))
+            self.tabla_resultados.setItem(row_idx, 3, QTableWidgetItem(fila.clubes))
+            self.tabla_resultados.setItem(row_idx, 4, QTableWidgetItem(str(fila.lugar) if fila.lugar else ""))
+            self.tabla_resultados.setItem(row_idx, 5, QTableWidgetItem(fila.tiempo or ""))
+            self.tabla_resultados.setItem(row_idx, 6, QTableWidgetItem(fila.estado or 'Inscrito'))
 
         self.tabla_resultados.blockSignals(False)
 
+    def encolar_resultado(self, fila, inscripcion_id, tiempo_final, estado, tiempos_vuelta=None):
+        """Muestra el resultado en la fila de inmediato y lo deja en la cola de escritura."""
+        self.tabla_resultados.blockSignals(True)
+        self.tabla_resultados.setItem(fila, 5, QTableWidgetItem(tiempo_final or ""))
+        self.tabla_resultados.setItem(fila, 6, QTableWidgetItem(estado))
+        self.tabla_resultados.blockSignals(False)
+        self.cola_resultados.encolar_resultado(inscripcion_id, tiempo_final, estado, tiempos_vuelta)
+
+    def procesar_lote_aplicado(self, resultados, posiciones):
+        """Slot de la cola: escribe solo los lugares que cambiaron en la categoría visible."""
+        errores = [mensaje for _, exito, mensaje in resultados if not exito]
+        if errores:
+            # Las filas con error muestran un resultado que no se guardó: se vuelve a leer la categoría
+            self.recargar_conservando_seleccion()
+        else:
+            self.actualizar_lugares(posiciones.get((self.id_evento_activo, self.id_categoria_activa), []))
+        if errores:
+            QMessageBox.warning(self, "Resultados no guardados", "\n".join(errores))
+
+    def actualizar_lugares(self, cambios):
+        """Actualiza la columna Lugar de las filas [(inscripcion_id, lugar)] sin recargar la tabla."""
+        if not cambios: return
+        lugares = {str(inscripcion_id): lugar for inscripcion_id, lugar in cambios}
+        self.tabla_resultados.blockSignals(True)
+        for fila in range(self.tabla_resultados.rowCount()):
+            inscripcion_id = self.tabla_resultados.item(fila, 0).text()
+            if inscripcion_id in lugares:
+                lugar = lugares[inscripcion_id]
+                self.tabla_resultados.setItem(fila, 4, QTableWidgetItem(str(lugar) if lugar else ""))
+        self.tabla_resultados.blockSignals(False)
+
+    def recargar_conservando_seleccion(self):
+        fila_actual = self.tabla_resultados.currentRow()
+        id_seleccionado = self.tabla_resultados.item(fila_actual, 0).text() if fila_actual >= 0 else None
+        self.cargar_tabla_resultados()
+        if id_seleccionado is None: return
+        for fila in range(self.tabla_resultados.rowCount()):
+            if self.tabla_resultados.item(fila, 0).text() == id_seleccionado:
+                self.tabla_resultados.selectRow(fila)
+                break
+
     def actualizar_estado_validez_categoria(self):
         if self.id_evento_activo is None or self.id_categoria_activa is None: return
         es_valida = self.check_categoria_valida.isChecked()
         db.actualizar_estado_categoria(self.id_evento_activo, self.id_categoria_activa, es_valida)
+        self.estados_categorias[self.id_categoria_activa] = int(es_valida)
         
     def abrir_dialogo_tiempos(self):
         selected_items = self.tabla_resultados.selectedItems()
@@ -166,27 +212,26 @@ class ResultadosTabWidget(QWidget):
             tiempo_actual = self.tabla_resultados.item(fila_seleccionada, 5).text()
             tiempo, ok = QInputDialog.getText(self, f"Tiempo Final para Nº {numero_competidor}", "Ingresa el tiempo final (HH:MM:SS.ms):", text=tiempo_actual)
             if ok and tiempo:
-                db.actualizar_resultado_inscripcion(inscripcion_id, tiempo.strip(), "Finalizado")
-                db.recalcular_posiciones_categoria(self.id_evento_activo, self.id_categoria_activa)
-                self.cargar_tabla_resultados()
+                try:
+                    tiempo_ms = parsear_tiempo_ms(tiempo)
+                except ValueError:
+                    QMessageBox.warning(self, "Formato Inválido", f"El tiempo '{tiempo.strip()}' no es válido. Use el formato HH:MM:SS o HH:MM:SS.ms.")
+                    return
+                self.encolar_resultado(fila_seleccionada, inscripcion_id, formatear_tiempo_ms(tiempo_ms), "Finalizado")
             return
 
         numero_vueltas = categoria_info["numero_vueltas"]
         
-        inscripciones_actuales = db.obtener_inscripciones_por_categoria(self.id_evento_activo, self.id_categoria_activa)
-        tiempos_vueltas_json = None
-        for insc in inscripciones_actuales:
-            if insc[0] == inscripcion_id:
-                tiempos_vueltas_json = insc[21] # <-- ÍNDICE CORREGIDO
-                break
+        # Si hay tiempos de esta fila esperando en la cola de escritura, esos son los vigentes
+        tiempos_vuelta = self.cola_resultados.vueltas_pendientes(inscripcion_id)
+        if tiempos_vuelta is None:
+            tiempos_vuelta = db.obtener_tiempos_vuelta_inscripcion(inscripcion_id)
         
-        dialogo = TiemposVueltaDialog(numero_vueltas, tiempos_vueltas_json, self)
+        dialogo = TiemposVueltaDialog(numero_vueltas, tiempos_vuelta, self)
         if dialogo.exec() == QDialog.Accepted:
-            tiempos_vueltas_json, tiempo_final_calculado = dialogo.get_tiempos()
-            if tiempos_vueltas_json is not None:
-                db.actualizar_resultado_inscripcion(inscripcion_id, tiempo_final_calculado, "Finalizado", tiempos_vueltas_json)
-                db.recalcular_posiciones_categoria(self.id_evento_activo, self.id_categoria_activa)
-                self.cargar_tabla_resultados()
+            tiempos_vuelta, tiempo_final_calculado = dialogo.get_tiempos()
+            if tiempos_vuelta is not None:
+                self.encolar_resultado(fila_seleccionada, inscripcion_id, tiempo_final_calculado, "Finalizado", tiempos_vuelta)
 
     def cambiar_estado_inscripcion(self):
         selected_items = self.tabla_resultados.selectedItems()
@@ -205,17 +250,5 @@ class ResultadosTabWidget(QWidget):
         if ok and estado != estado_actual:
             tiempo_final = self.tabla_resultados.item(fila_seleccionada, 5).text() if estado == 'Finalizado' else None
             
-            inscripciones_actuales = db.obtener_inscripciones_por_categoria(self.id_evento_activo, self.id_categoria_activa)
-            tiempos_vueltas_json = None
-            for insc in inscripciones_actuales:
-                if insc[0] == inscripcion_id:
-                    tiempos_vueltas_json = insc[21] # <-- ÍNDICE CORREGIDO
-                    break
-            
-            exito, mensaje = db.actualizar_resultado_inscripcion(inscripcion_id, tiempo_final, estado, tiempos_vueltas_json)
-            
-            if exito:
-                db.recalcular_posiciones_categoria(self.id_evento_activo, self.id_categoria_activa)
-                self.cargar_tabla_resultados()
-            else:
-                QMessageBox.critical(self, "Error", f"No se pudo actualizar el estado: {mensaje}")
\ No newline at end of file
+            # Los tiempos de vuelta guardados no se modifican al cambiar el estado
+            self.encolar_resultado(fila_seleccionada, inscripcion_id, tiempo_final, estado)
\ No newline at end of file
@@ -8,7 +8,7 @@ from PySide6.QtWidgets import (
     QTableWidget, QTableWidgetItem, QAbstractItemView, QHeaderView,
     QDialogButtonBox, QMessageBox, QPushButton
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
 import database_maraton as db
 
 class SeleccionarParticipanteDialog(QDialog):
@@ -24,7 +24,12 @@ class SeleccionarParticipanteDialog(QDialog):
         filter_layout = QHBoxLayout()
         self.filtro_input = QLineEdit()
         self.filtro_input.setPlaceholderText("Buscar por nombre, apellido, RUT o club...")
-        self.filtro_input.textChanged.connect(self.filtrar_tabla)
+        # Se espera a que el usuario deje de escribir antes de consultar la base de datos
+        self.timer_filtro = QTimer(self)
+        self.timer_filtro.setSingleShot(True)
+        self.timer_filtro.setInterval(150)
+        self.timer_filtro.timeout.connect(self.filtrar_tabla)
+        self.filtro_input.textChanged.connect(self.timer_filtro.start)
         filter_layout.addWidget(QLabel("Buscar:"))
         filter_layout.addWidget(self.filtro_input)
         layout.addLayout(filter_layout)
@@ -55,23 +60,13 @@ class SeleccionarParticipanteDialog(QDialog):
 
     def cargar_tabla_participantes(self, filtro=None):
         self.tabla_participantes.setRowCount(0)
-        participantes = db.obtener_participantes_con_club()
+        participantes = db.buscar_participantes(filtro)
+        self.tabla_participantes.setRowCount(len(participantes))
         
-        for row_idx, row_data in enumerate(participantes):
+        for current_row, row_data in enumerate(participantes):
             # p.id, p.nombre, p.apellido, p.rut_o_id, ..., c.nombre_club
             id_part, nombre, apellido, rut, _, _, club = row_data
             
-            if filtro:
-                filtro_lower = filtro.lower()
-                if not (filtro_lower in nombre.lower() or 
-                        filtro_lower in apellido.lower() or 
-                        (rut and filtro_lower in rut.lower()) or 
-                        (club and filtro_lower in club.lower())):
-                    continue
-
-            self.tabla_participantes.insertRow(self.tabla_participantes.rowCount())
-            current_row = self.tabla_participantes.rowCount() - 1
-            
             self.tabla_participantes.setItem(current_row, 0, QTableWidgetItem(str(id_part)))
             self.tabla_participantes.setItem(current_row, 1, QTableWidgetItem(nombre))
             self.tabla_participantes.setItem(current_row, 2, QTableWidgetItem(apellido))
@@ -0,0 +1,218 @@
+# temporadas_ui.py
+# Pestaña de temporadas: agrupa eventos y muestra el ranking acumulado (mejores N de M eventos).
+
+import os
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton, QMessageBox,
+    QListWidget, QListWidgetItem, QGroupBox, QSpinBox, QFormLayout, QAbstractItemView,
+    QTableWidget, QTableWidgetItem, QHeaderView, QFileDialog, QDialog
+)
+from PySide6.QtPrintSupport import QPrinter
+from PySide6.QtGui import QPageSize, QPageLayout
+from PySide6.QtCore import Qt, QDate, QMarginsF, QStandardPaths
+import database_maraton as db
+import generador_pdf_reportes as gen_reportes
+import generador_web
+from pdf_preview_dialog_ui import PdfPreviewDialog
+from utils_maraton import resource_path
+
+LOGO_FILENAME = "logo.png"
+
+class TemporadasTabWidget(QWidget):
+    def __init__(self):
+        super().__init__()
+        self.id_temporada_seleccionada = None
+        self.logo_path = resource_path(LOGO_FILENAME)
+        self.init_ui()
+        self.cargar_lista_temporadas()
+
+    def init_ui(self):
+        layout_principal = QHBoxLayout(self)
+
+        panel_izquierdo = QWidget()
+        layout_izquierdo = QVBoxLayout(panel_izquierdo)
+
+        group_form = QGroupBox("Datos de la Temporada")
+        form_layout = QFormLayout(group_form)
+        self.nombre_input = QLineEdit()
+        self.anio_spin = QSpinBox(); self.anio_spin.setRange(2000, 2100)
+        self.mejores_n_spin = QSpinBox(); self.mejores_n_spin.setRange(0, 50)
+        self.mejores_n_spin.setSpecialValueText("Todos")
+        self.mejores_n_spin.setToolTip("Cantidad de mejores resultados por club o deportista que suman en el ranking.")
+        form_layout.addRow("Nombre:", self.nombre_input)
+        form_layout.addRow("Año:", self.anio_spin)
+        form_layout.addRow("Eventos que suman:", self.mejores_n_spin)
+
+        botones_layout = QHBoxLayout()
+        self.btn_nuevo = QPushButton("Nuevo")
+        self.btn_guardar = QPushButton("Guardar")
+        self.btn_eliminar = QPushButton("Eliminar")
+        botones_layout.addWidget(self.btn_nuevo)
+        botones_layout.addWidget(self.btn_guardar)
+        botones_layout.addWidget(self.btn_eliminar)
+
+        group_lista = QGroupBox("Temporadas Guardadas")
+        layout_lista = QVBoxLayout(group_lista)
+        self.lista_temporadas_widget = QListWidget()
+        self.lista_temporadas_widget.setSelectionMode(QAbstractItemView.SingleSelection)
+        layout_lista.addWidget(self.lista_temporadas_widget)
+
+        group_eventos = QGroupBox("Eventos de la Temporada")
+        layout_eventos = QVBoxLayout(group_eventos)
+        self.lista_eventos_widget = QListWidget()
+        self.btn_guardar_eventos = QPushButton("Guardar Eventos")
+        layout_eventos.addWidget(self.lista_eventos_widget)
+        layout_eventos.addWidget(self.btn_guardar_eventos)
+
+        layout_izquierdo.addWidget(group_form)
+        layout_izquierdo.addLayout(botones_layout)
+        layout_izquierdo.addWidget(group_lista)
+        layout_izquierdo.addWidget(group_eventos)
+
+        panel_derecho = QWidget()
+        layout_derecho = QVBoxLayout(panel_derecho)
+        group_ranking = QGroupBox("Ranking de Temporada por Clubes")
+        layout_ranking = QVBoxLayout(group_ranking)
+        self.tabla_ranking = QTableWidget()
+        self.tabla_ranking.setColumnCount(4)
+        self.tabla_ranking.setHorizontalHeaderLabels(["Lugar", "Club", "Puntos", "Eventos"])
+        self.tabla_ranking.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.tabla_ranking.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout_ranking.addWidget(self.tabla_ranking)
+
+        botones_reportes = QHBoxLayout()
+        self.btn_pdf_clubes = QPushButton("PDF Ranking Clubes")
+        self.btn_pdf_deportistas = QPushButton("PDF Ranking Individual")
+        self.btn_sitio_web = QPushButton("🌐 Generar Sitio de la Temporada")
+        botones_reportes.addWidget(self.btn_pdf_clubes)
+        botones_reportes.addWidget(self.btn_pdf_deportistas)
+        botones_reportes.addWidget(self.btn_sitio_web)
+        layout_ranking.addLayout(botones_reportes)
+        layout_derecho.addWidget(group_ranking)
+
+        layout_principal.addWidget(panel_izquierdo, 1)
+        layout_principal.addWidget(panel_derecho, 1)
+
+        self.btn_nuevo.clicked.connect(self.limpiar_formulario)
+        self.btn_guardar.clicked.connect(self.guardar_temporada)
+        self.btn_eliminar.clicked.connect(self.eliminar_temporada)
+        self.lista_temporadas_widget.itemClicked.connect(self.cargar_temporada_seleccionada)
+        self.btn_guardar_eventos.clicked.connect(self.guardar_eventos)
+        self.btn_pdf_clubes.clicked.connect(lambda: self.generar_pdf(gen_reportes.crear_ranking_temporada_clubes_pdf, "Ranking_Temporada_Clubes"))
+        self.btn_pdf_deportistas.clicked.connect(lambda: self.generar_pdf(gen_reportes.crear_ranking_temporada_deportistas_pdf, "Ranking_Temporada_Individual"))
+        self.btn_sitio_web.clicked.connect(self.generar_sitio_web)
+
+        self.limpiar_formulario()
+        print("[INFO] Pestaña Temporadas inicializada.")
+
+    def limpiar_formulario(self):
+        self.id_temporada_seleccionada = None
+        self.nombre_input.clear()
+        self.anio_spin.setValue(QDate.currentDate().year())
+        self.mejores_n_spin.setValue(0)
+        self.lista_temporadas_widget.clearSelection()
+        self.lista_eventos_widget.clear()
+        self.tabla_ranking.setRowCount(0)
+        self.habilitar_acciones_temporada(False)
+
+    def habilitar_acciones_temporada(self, habilitar):
+        for boton in (self.btn_eliminar, self.btn_guardar_eventos, self.btn_pdf_clubes, self.btn_pdf_deportistas, self.btn_sitio_web):
+            boton.setEnabled(habilitar)
+
+    def cargar_lista_temporadas(self):
+        self.lista_temporadas_widget.clear()
+        for temporada_id, nombre, anio, mejores_n in db.obtener_temporadas():
+            item = QListWidgetItem(f"{nombre} ({anio})")
+            item.setData(Qt.UserRole, temporada_id)
+            self.lista_temporadas_widget.addItem(item)
+
+    def cargar_temporada_seleccionada(self, item):
+        temporada = db.obtener_info_temporada(item.data(Qt.UserRole))
+        if not temporada: return
+        self.id_temporada_seleccionada, nombre, anio, mejores_n = temporada
+        self.nombre_input.setText(nombre)
+        self.anio_spin.setValue(anio or QDate.currentDate().year())
+        self.mejores_n_spin.setValue(mejores_n or 0)
+        self.cargar_eventos()
+        self.cargar_ranking()
+        self.habilitar_acciones_temporada(True)
+
+    def cargar_eventos(self):
+        """Lista todos los eventos; los de la temporada seleccionada aparecen marcados."""
+        self.lista_eventos_widget.clear()
+        en_temporada = {evento_id for evento_id, _, _ in db.obtener_eventos_temporada(self.id_temporada_seleccionada)}
+        for evento_id, nombre, fecha, _ in db.obtener_eventos():
+            item = QListWidgetItem(f"{nombre} ({fecha})")
+            item.setData(Qt.UserRole, evento_id)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked if evento_id in en_temporada else Qt.Unchecked)
+            self.lista_eventos_widget.addItem(item)
+
+    def cargar_ranking(self):
+        ranking = db.calcular_ranking_temporada_clubes(self.id_temporada_seleccionada)
+        self.tabla_ranking.setRowCount(len(ranking))
+        for fila, (club, logo_path, puntos, eventos) in enumerate(ranking):
+            self.tabla_ranking.setItem(fila, 0, QTableWidgetItem(str(fila + 1)))
+            self.tabla_ranking.setItem(fila, 1, QTableWidgetItem(club))
+            self.tabla_ranking.setItem(fila, 2, QTableWidgetItem(str(puntos)))
+            self.tabla_ranking.setItem(fila, 3, QTableWidgetItem(str(eventos)))
+
+    def guardar_temporada(self):
+        nombre = self.nombre_input.text().strip()
+        if not nombre:
+            QMessageBox.warning(self, "Campo Requerido", "El nombre de la temporada es obligatorio.")
+            return
+        datos = {'nombre': nombre, 'anio': self.anio_spin.value(), 'mejores_n': self.mejores_n_spin.value() or None}
+        temporada_id, mensaje = db.agregar_o_actualizar_temporada(datos, self.id_temporada_seleccionada)
+        if temporada_id:
+            self.cargar_lista_temporadas()
+            self.id_temporada_seleccionada = temporada_id
+            self.cargar_eventos()
+            self.cargar_ranking()
+            self.habilitar_acciones_temporada(True)
+            QMessageBox.information(self, "Éxito", mensaje)
+        else:
+            QMessageBox.critical(self, "Error", mensaje)
+
+    def eliminar_temporada(self):
+        if self.id_temporada_seleccionada is None: return
+        confirmacion = QMessageBox.question(self, "Confirmar Eliminación", f"¿Estás seguro de que quieres eliminar la temporada '{self.nombre_input.text()}'?\nLos eventos y sus resultados no se borran.", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, QMessageBox.StandardButton.No)
+        if confirmacion == QMessageBox.StandardButton.Yes:
+            db.eliminar_temporada(self.id_temporada_seleccionada)
+            self.cargar_lista_temporadas()
+            self.limpiar_formulario()
+
+    def guardar_eventos(self):
+        if self.id_temporada_seleccionada is None: return
+        evento_ids = [self.lista_eventos_widget.item(i).data(Qt.UserRole) for i in range(self.lista_eventos_widget.count())
+                      if self.lista_eventos_widget.item(i).checkState() == Qt.Checked]
+        exito, mensaje = db.guardar_eventos_temporada(self.id_temporada_seleccionada, evento_ids)
+        self.cargar_ranking()
+        QMessageBox.information(self, "Éxito", mensaje)
+
+    def generar_pdf(self, funcion_creadora, nombre_base):
+        if self.id_temporada_seleccionada is None: return
+        documento, _ = funcion_creadora(self.id_temporada_seleccionada, self.logo_path)
+        if not documento: return
+        preview_dialog = PdfPreviewDialog(documento, self)
+        if preview_dialog.exec() != QDialog.Accepted: return
+        directorio = QStandardPaths.writableLocation(QStandardPaths.DocumentsLocation)
+        ruta_sugerida = os.path.join(directorio, f"{nombre_base}_{self.nombre_input.text().strip().replace(' ', '_')}.pdf")
+        filePath, _ = QFileDialog.getSaveFileName(self, "Guardar Reporte PDF", ruta_sugerida, "Archivos PDF (*.pdf)")
+        if filePath:
+            printer = QPrinter(QPrinter.HighResolution)
+            printer.setOutputFormat(QPrinter.PdfFormat); printer.setOutputFileName(filePath)
+            printer.setPageSize(QPageSize(QPageSize.A4)); printer.setPageMargins(QMarginsF(15, 15, 15, 15), QPageLayout.Millimeter)
+            documento.print_(printer)
+            QMessageBox.information(self, "Éxito", f"Reporte PDF guardado en:\n{filePath}")
+
+    def generar_sitio_web(self):
+        if self.id_temporada_seleccionada is None: return
+        directorio = QFileDialog.getExistingDirectory(self, "Seleccionar Carpeta para Guardar el Sitio Web", QStandardPaths.writableLocation(QStandardPaths.DocumentsLocation))
+        if not directorio: return
+        ruta_sitio = os.path.join(directorio, f"temporada_{self.nombre_input.text().strip().replace(' ', '_').lower()}")
+        exito, mensaje = generador_web.generar_sitio_temporada(self.id_temporada_seleccionada, ruta_sitio)
+        if exito:
+            QMessageBox.information(self, "Generación Exitosa", mensaje)
+        else:
+            QMessageBox.critical(self, "Error", mensaje)
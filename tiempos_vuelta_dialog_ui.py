@@ -6,10 +6,10 @@ from PySide6.QtWidgets import (
     QDialogButtonBox, QMessageBox, QScrollArea, QWidget
 )
 from PySide6.QtCore import Qt
-import datetime
+from utils_maraton import parsear_tiempo_ms, formatear_tiempo_ms
 
 class TiemposVueltaDialog(QDialog):
-    def __init__(self, numero_vueltas, tiempos_existentes_str=None, parent=None):
+    def __init__(self, numero_vueltas, tiempos_existentes=None, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Ingresar Tiempos por Vuelta")
         self.setMinimumWidth(350)
@@ -24,19 +24,14 @@ class TiemposVueltaDialog(QDialog):
         container_widget = QWidget()
         container_layout = QFormLayout(container_widget)
         
-        tiempos_existentes = []
-        if tiempos_existentes_str:
-            try:
-                import json
-                tiempos_existentes = json.loads(tiempos_existentes_str)
-            except (json.JSONDecodeError, TypeError):
-                tiempos_existentes = []
+        # tiempos_existentes: {vuelta: tiempo_ms} tal como los guarda la base de datos
+        tiempos_existentes = tiempos_existentes or {}
 
         for i in range(numero_vueltas):
             tiempo_input = QLineEdit()
             tiempo_input.setPlaceholderText("HH:MM:SS.ms")
-            if i < len(tiempos_existentes):
-                tiempo_input.setText(tiempos_existentes[i])
+            if (i + 1) in tiempos_existentes:
+                tiempo_input.setText(formatear_tiempo_ms(tiempos_existentes[i + 1]))
             
             container_layout.addRow(f"Tiempo Vuelta {i+1}:", tiempo_input)
             self.line_edits_vueltas.append(tiempo_input)
@@ -50,9 +45,9 @@ class TiemposVueltaDialog(QDialog):
         self.layout.addWidget(self.button_box)
 
     def get_tiempos(self):
-        """Valida y devuelve los tiempos ingresados y su suma."""
-        tiempos_str = []
-        suma_tiempos = datetime.timedelta()
+        """Valida y devuelve los tiempos ingresados ({vuelta: tiempo_ms}) y su suma como texto."""
+        tiempos_ms = {}
+        suma_ms = 0
         
         for i, line_edit in enumerate(self.line_edits_vueltas):
             tiempo_texto = line_edit.text().strip()
@@ -60,31 +55,13 @@ class TiemposVueltaDialog(QDialog):
                 continue # Ignorar vueltas vacías por ahora
 
             try:
-                # Intentar parsear con milisegundos
-                if '.' in tiempo_texto:
-                    parte_principal, parte_ms = tiempo_texto.split('.')
-                    h, m, s = map(int, parte_principal.split(':'))
-                    ms = int(parte_ms.ljust(6, '0')) # Asegurar 6 dígitos para microsegundos
-                    td = datetime.timedelta(hours=h, minutes=m, seconds=s, microseconds=ms)
-                else: # Parsear sin milisegundos
-                    h, m, s = map(int, tiempo_texto.split(':'))
-                    td = datetime.timedelta(hours=h, minutes=m, seconds=s)
-                
-                tiempos_str.append(tiempo_texto)
-                suma_tiempos += td
+                tiempos_ms[i + 1] = parsear_tiempo_ms(tiempo_texto)
+                suma_ms += tiempos_ms[i + 1]
             except ValueError:
                 QMessageBox.warning(self, "Formato Inválido", f"El tiempo ingresado para la vuelta {i+1} ('{tiempo_texto}') no es válido.\nUse el formato HH:MM:SS o HH:MM:SS.ms")
                 return None, None # Indicar error
 
         # Formatear el tiempo total
-        total_seconds = int(suma_tiempos.total_seconds())
-        microseconds = suma_tiempos.microseconds
-        hours, remainder = divmod(total_seconds, 3600)
-        minutes, seconds = divmod(remainder, 60)
-        
-        tiempo_final_str = f"{hours:02}:{minutes:02}:{seconds:02}"
-        if microseconds > 0:
-            tiempo_final_str += f".{str(microseconds // 1000).zfill(3)}"
+        tiempo_final_str = formatear_tiempo_ms(suma_ms)
 
-        import json
-        return json.dumps(tiempos_str), tiempo_final_str
+        return tiempos_ms, tiempo_final_str
@@ -22,3 +22,29 @@ def resource_path(relative_path):
             base_path = os.path.abspath(".")
     
     return os.path.join(base_path, relative_path)
+
+def parsear_tiempo_ms(tiempo_texto):
+    """
+    Convierte un tiempo 'HH:MM:SS' o 'HH:MM:SS.ms' a milisegundos enteros.
+    La parte decimal se interpreta como fracción de segundo ('.5' = 500 ms).
+    Lanza ValueError si el formato no es válido.
+    """
+    tiempo_texto = tiempo_texto.strip()
+    if '.' in tiempo_texto:
+        parte_principal, parte_ms = tiempo_texto.split('.')
+        microsegundos = int(parte_ms.ljust(6, '0'))
+    else:
+        parte_principal, microsegundos = tiempo_texto, 0
+    h, m, s = map(int, parte_principal.split(':'))
+    return ((h * 60 + m) * 60 + s) * 1000 + microsegundos // 1000
+
+def formatear_tiempo_ms(tiempo_ms):
+    """Formatea milisegundos como 'HH:MM:SS' (o 'HH:MM:SS.mmm' si hay milisegundos)."""
+    if tiempo_ms is None: return None
+    total_segundos, ms = divmod(int(tiempo_ms), 1000)
+    horas, resto = divmod(total_segundos, 3600)
+    minutos, segundos = divmod(resto, 60)
+    tiempo_str = f"{horas:02}:{minutos:02}:{segundos:02}"
+    if ms > 0:
+        tiempo_str += f".{str(ms).zfill(3)}"
+    return tiempo_str